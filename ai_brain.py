@@ -1,13 +1,26 @@
+import asyncio
+import functools
 import json
 import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 import dotenv
-from zhipuai import ZhipuAI
 
 import api
 import tools
 from initial_prompt import initial_prompt
+from llm_cache import cached_completion, cached_completion_async
+from llm_client import get_async_client, get_client
+from schema_catalog import schema_catalog
+from tool_cache import tool_cache
+
+
+# 并发执行工具调用的线程数，所有问题共用同一个线程池
+TOOL_CALL_WORKERS = 8
+tool_executor = ThreadPoolExecutor(
+    max_workers=TOOL_CALL_WORKERS, thread_name_prefix="tool"
+)
 
 function_map = {
     "calculate_uptime": api.calculate_uptime,
@@ -20,6 +33,7 @@ function_map = {
     "get_device_status_by_time_range": api.get_device_status_by_time_range,
     "calculate_total_energy_consumption": api.calculate_total_energy_consumption,
     "calculate_generator_energy_consumption": api.calculate_generator_energy_consumption,
+    "calculate_group_integral_by_time_ranges": api.calculate_group_integral_by_time_ranges,
     "check_ajia_angle": api.check_ajia_angle,
     "calculate_fuel_consumption": api.calculate_fuel_consumption,
     "calculate_fuel_consumption_weight": api.calculate_fuel_consumption_weight,
@@ -30,9 +44,11 @@ function_map = {
     "get_work_time": api.get_work_time,
     "find_missing_records": api.find_missing_records,
     "count_oscillations": api.count_oscillations,
+    "count_oscillations_batch": api.count_oscillations_batch,
     "find_min_value": api.find_min_value,
     "find_max_value": api.find_max_value,
     "find_avg_value": api.find_avg_value,
+    "find_range_statistics": api.find_range_statistics,
     "calculate_total_rudder_energy": api.calculate_total_rudder_energy,
     "count_swing_with_threshold": api.count_swing_with_threshold,
     "count_swing_with_rule": api.count_swing_with_rule,
@@ -42,9 +58,8 @@ function_map = {
 
 def create_chat_completion(messages, model="glm-4-plus"):
     print("发起AI对话")
-    client = ZhipuAI()
-    response = client.chat.completions.create(
-        model=model, stream=False, messages=messages
+    response = cached_completion(
+        get_client(), model=model, messages=messages, stream=False
     )
     print("! AI回复:", response.choices[0].message.content)
     return response
@@ -52,8 +67,12 @@ def create_chat_completion(messages, model="glm-4-plus"):
 
 def choose_table(question):
     print("向AI查询需要的数据表")
-    with open("dict.json", "r", encoding="utf-8") as file:
-        context_text = str(json.load(file))
+    response = create_chat_completion(choose_table_messages(question))
+    return str(response.choices[0].message.content)
+
+
+def choose_table_messages(question):
+    context_text = schema_catalog().text
     prompt = f"""我有如下数据表：<{context_text}>
     现在需要回答问题：{question}。
     请结合问题描述需要查询哪些数据表。
@@ -61,109 +80,198 @@ def choose_table(question):
     若问题中提到A架动作,包括关机、开机、A架摆出、缆绳挂妥、征服者出水、征服者落座、征服者起吊、征服者入水、缆绳解除、A架摆回，则使用Ajia_plc_1这个数据表。
     若问题中提到折臂吊车及小艇动作,包括折臂吊车关机、折臂吊车开机、小艇检查完毕、小艇入水、小艇落座，则使用device_13_11_meter_1311这个数据表。
     """
-    messages = [{"role": "user", "content": prompt}]
-    response = create_chat_completion(messages)
-    return str(response.choices[0].message.content)
+    return [{"role": "user", "content": prompt}]
 
 
 def glm4_create(max_attempts, messages, tools=None, model="glm-4-plus"):
     print("发起AI对话")
-    client = ZhipuAI()
+    client = get_client()
     for attempt in range(max_attempts):
-        response = client.chat.completions.create(
+        response = cached_completion(
+            client,
             model=model,
             messages=messages,
             tools=tools,
         )
-        print("! 尝试次数：", attempt)
-        if response.choices[0].message.content:
-            print("! AI回复:", response.choices[0].message.content)
-        if response.choices and response.choices[0].message:
+        if _accept_response(response, attempt):
             return response
-        else:
-            continue
     return response
 
 
-def get_answer_2(question, tools, api_look: bool = True):
-    filtered_tools = tools
-    try:
-        messages = [
-            {
-                "role": "system",
-                "content": initial_prompt,
-            },
-            {
-                "role": "user",
-                "content": f"现在需要回答这个问题{question}可以使用的工具函数已给出。请先结合提供的工具函数与说明，深度思考并详细说明使用工具函数的步骤以及解答思路。不要编写任何代码！",
-            },
-        ]
-        # 第一次调用模型
-        response = glm4_create(6, messages, filtered_tools)
-        messages.append(response.choices[0].message.model_dump())
-        function_results = []
-        # 最大迭代次数
-        iteration = 1
-        while True:
-            iteration += 1
-            if (
-                response.choices[0].message.content
-                and "已完成回答" in response.choices[0].message.content
-            ):
-                break
-
-            if response.choices[0].finish_reason == "tool_calls":
-                for tool_call in response.choices[0].message.tool_calls:
-                    # 获取工具调用信息
-                    print("! 调用函数:", tool_call)
-                    args = json.loads(tool_call.function.arguments)
-                    function_name = tool_call.function.name
-
-                    # 执行工具函数
-                    if function_name in function_map:
-                        print(f"! 执行工具函数: {function_name}，参数: {args}")
-                        function_result = function_map[function_name](**args)
-                        print(f"! 工具函数执行结果: {function_result}")
-
-                        function_results.append(function_result)
-                        messages.append(
-                            {
-                                "role": "tool",
-                                "content": f"{function_result}",
-                                "tool_call_id": tool_call.id,
-                            }
-                        )
-                    else:
-                        print(f"未找到对应的工具函数: {function_name}")
-                        break
-                print(f"第{iteration}次调用模型")
-                response = glm4_create(8, messages, filtered_tools)
-            else:
-                messages.append(response.choices[0].message.model_dump())
+def _accept_response(response, attempt):
+    # glm4_create 每次尝试后的检查：回复中有消息时不再重试
+    print("! 尝试次数：", attempt)
+    if response.choices[0].message.content:
+        print("! AI回复:", response.choices[0].message.content)
+    return bool(response.choices and response.choices[0].message)
+
+
+def call_tool(function_name, **args):
+    """
+    执行工具函数。批量运行开启了工具结果缓存时，相同函数与参数的调用在各问题之间共享结果。
+    """
+    function = function_map[function_name]
+    cache = tool_cache()
+    if cache is None:
+        return function(**args)
+    return cache.call(function_name, function, args)
+
+
+def parse_tool_calls(tool_calls):
+    """
+    解析模型一轮回复中的工具调用。遇到未知的工具函数时，只保留它之前的调用。
+    Args:
+        tool_calls (list): 模型返回的工具调用列表。
+    Returns:
+        list: (工具调用, 可直接调用的工具函数) 列表，按原始顺序排列。
+    """
+    calls = []
+    for tool_call in tool_calls:
+        # 获取工具调用信息
+        print("! 调用函数:", tool_call)
+        args = json.loads(tool_call.function.arguments)
+        function_name = tool_call.function.name
+        if function_name not in function_map:
+            print(f"未找到对应的工具函数: {function_name}")
+            break
+        print(f"! 执行工具函数: {function_name}，参数: {args}")
+        calls.append((tool_call, functools.partial(call_tool, function_name, **args)))
+    return calls
+
+
+def _tool_results(calls, function_results):
+    results = []
+    for (tool_call, _), function_result in zip(calls, function_results):
+        print(f"! 工具函数执行结果: {function_result}")
+        results.append((tool_call, function_result))
+    return results
+
+
+def run_tool_calls(tool_calls):
+    """
+    执行模型一轮回复中的全部工具调用。
+    多个调用并发提交到共享的线程池，本轮耗时取决于最慢的调用而不是各调用耗时之和；
+    结果按 tool_calls 的原始顺序返回。遇到未知的工具函数时，只执行它之前的调用。
+    Args:
+        tool_calls (list): 模型返回的工具调用列表。
+    Returns:
+        list: (工具调用, 执行结果) 列表，按原始顺序排列。
+    """
+    calls = parse_tool_calls(tool_calls)
+    # 只有一个调用时直接在当前线程执行
+    if len(calls) == 1:
+        function_results = [calls[0][1]()]
+    else:
+        futures = [tool_executor.submit(function) for _, function in calls]
+        function_results = [future.result() for future in futures]
+    return _tool_results(calls, function_results)
+
+
+def _message_dict(message):
+    # 去掉回复消息中值为 None 的字段，同步与异步客户端得到相同的对话消息
+    return message.model_dump(exclude_none=True)
+
+
+def answer_steps(question, tools):
+    """
+    get_answer_2 的对话流程，同步与异步版本共用。
+    生成器依次产出需要执行的操作，调用方执行后通过 send() 传回结果：
+        ("llm", max_attempts, messages, tools): 调用大模型，传回回复；
+        ("tools", tool_calls): 执行工具调用，传回 (工具调用, 执行结果) 列表。
+    Returns:
+        tuple: (最终答案, 全部工具函数结果的文本)，作为生成器的返回值。
+    """
+    messages = [
+        {
+            "role": "system",
+            "content": initial_prompt,
+        },
+        {
+            "role": "user",
+            "content": f"现在需要回答这个问题{question}可以使用的工具函数已给出。请先结合提供的工具函数与说明，深度思考并详细说明使用工具函数的步骤以及解答思路。不要编写任何代码！",
+        },
+    ]
+    # 第一次调用模型
+    response = yield ("llm", 6, messages, tools)
+    messages.append(_message_dict(response.choices[0].message))
+    function_results = []
+    # 最大迭代次数
+    iteration = 1
+    while True:
+        iteration += 1
+        if (
+            response.choices[0].message.content
+            and "已完成回答" in response.choices[0].message.content
+        ):
+            break
+
+        if response.choices[0].finish_reason == "tool_calls":
+            tool_calls = response.choices[0].message.tool_calls
+            for tool_call, function_result in (yield ("tools", tool_calls)):
+                function_results.append(function_result)
                 messages.append(
                     {
-                        "role": "user",
-                        "content": "继续解答或调用工具函数。若已完成回答，只输出'已完成回答'。注意，不要假设结果！",
+                        "role": "tool",
+                        "content": f"{function_result}",
+                        "tool_call_id": tool_call.id,
                     }
                 )
-                print(f"第{iteration}次调用模型")
-                response = glm4_create(8, messages, filtered_tools)
-        messages.append(response.choices[0].message.model_dump())
-        messages.append(
-            {
-                "role": "user",
-                "content": "请根据上述回答过程，简洁地回答问题，不要分段落。注意加上数值的单位、回答格式等。",
-            }
-        )
-        print(f"第{iteration}次调用模型")
-        response = glm4_create(8, messages, filtered_tools)
-        return response.choices[0].message.content, str(function_results)
+            print(f"第{iteration}次调用模型")
+            response = yield ("llm", 8, messages, tools)
+        else:
+            messages.append(_message_dict(response.choices[0].message))
+            messages.append(
+                {
+                    "role": "user",
+                    "content": "继续解答或调用工具函数。若已完成回答，只输出'已完成回答'。注意，不要假设结果！",
+                }
+            )
+            print(f"第{iteration}次调用模型")
+            response = yield ("llm", 8, messages, tools)
+    messages.append(_message_dict(response.choices[0].message))
+    messages.append(
+        {
+            "role": "user",
+            "content": "请根据上述回答过程，简洁地回答问题，不要分段落。注意加上数值的单位、回答格式等。",
+        }
+    )
+    print(f"第{iteration}次调用模型")
+    response = yield ("llm", 8, messages, tools)
+    return response.choices[0].message.content, str(function_results)
+
+
+def get_answer_2(question, tools, api_look: bool = True):
+    try:
+        steps = answer_steps(question, tools)
+        step = next(steps)
+        while True:
+            if step[0] == "llm":
+                result = glm4_create(*step[1:])
+            else:
+                result = run_tool_calls(*step[1:])
+            step = steps.send(result)
+    except StopIteration as stop:
+        return stop.value
     except Exception as e:
         print(f"Error generating answer for question: {question}, {e}")
         return None, None
 
 
 def select_api_based_on_question(question, tools):
+    api_list_filter = match_api_list(question)
+    table_name_string = None
+    if len(api_list_filter) == 3:
+        # 如果问题不匹配任何关键字，则由大模型选择数据表
+        table_name_string = choose_table(question)
+    return apply_api_selection(question, tools, api_list_filter, table_name_string)
+
+
+def match_api_list(question):
+    """
+    根据问题中的关键字选择需要提供的 API。
+    Returns:
+        list: API 名称列表，前 3 个为始终提供的通用 API。
+    """
     api_list_filter = ["calculate_percent", "query_device_parameter", "sum_two"]
     # 根据问题内容选择相应的 API
     if "能耗" in question or "做功" in question:
@@ -225,6 +333,13 @@ def select_api_based_on_question(question, tools):
     if "作业" in question:
         print("! 问题包含：作业，提供Api：get_work_time")
         api_list_filter.append("get_work_time")
+    if ("作业" in question or "DP" in question) and (
+        "能耗" in question or "燃油消耗量" in question
+    ):
+        print(
+            "! 问题包含：作业或DP、能耗，提供Api：calculate_group_integral_by_time_ranges"
+        )
+        api_list_filter.append("calculate_group_integral_by_time_ranges")
     if "数据" in question and "缺失" in question:
         print("! 问题包含：数据、缺失，提供Api：find_missing_records")
         api_list_filter.append("find_missing_records")
@@ -243,26 +358,39 @@ def select_api_based_on_question(question, tools):
     if "平均值" in question:
         print("! 问题包含：平均值，提供Api：find_avg_value")
         api_list_filter.append("find_avg_value")
+    if any(keyword in question for keyword in ("最小值", "最大值", "平均值")):
+        print("! 问题包含：最小值/最大值/平均值，提供Api：find_range_statistics")
+        api_list_filter.append("find_range_statistics")
     if "时间差" in question:
         print("! 问题包含：时间差，提供Api：calculate_time_difference")
         api_list_filter.append("calculate_time_difference")
 
-    if len(api_list_filter) == 3:
+    return api_list_filter
+
+
+def apply_api_selection(question, tools, api_list_filter, table_name_string=None):
+    """
+    根据选出的 API 过滤工具列表。
+    Args:
+        question (str): 问题。
+        tools (list): 全部工具说明。
+        api_list_filter (list): match_api_list 选出的 API 名称列表。
+        table_name_string (str): 大模型选择的数据表名，问题不匹配任何关键字时提供。
+    Returns:
+        tuple: (补充了数据表说明的问题, 过滤后的工具列表)。
+    """
+    if table_name_string is not None:
         # 如果问题不匹配上述条件，则根据表名选择 API
-        table_name_string = choose_table(question)
-        with open("dict.json", "r", encoding="utf-8") as file:
-            table_data = json.load(file)
-            table_name = [
-                item for item in table_data if item["数据表名"] in table_name_string
-            ]
-            if "设备参数详情表" in [item["数据表名"] for item in table_name]:
-                print("! 使用设备参数详情表，提供Api：query_device_parameter")
-                api_list_filter.append("query_device_parameter")
-                content_p_1 = str(table_name) + question  # 补充 content_p_1
-            else:
-                print("! 使用数据表，提供Api：get_table_data")
-                api_list_filter.append("get_table_data")
-                content_p_1 = str(table_name) + question
+        catalog = schema_catalog()
+        table_name = catalog.tables_in(table_name_string)
+        if "设备参数详情表" in [item["数据表名"] for item in table_name]:
+            print("! 使用设备参数详情表，提供Api：query_device_parameter")
+            api_list_filter.append("query_device_parameter")
+            content_p_1 = str(table_name) + question  # 补充 content_p_1
+        else:
+            print("! 使用数据表，提供Api：get_table_data")
+            api_list_filter.append("get_table_data")
+            content_p_1 = str(table_name) + question
 
     # 过滤工具列表
     filtered_tools = [
@@ -317,7 +445,7 @@ def enhanced(prompt: str, context=None, instructions=None, modifiers=None):
     if "作业能耗" in enhanced_prompt:
         enhanced_prompt = (
             enhanced_prompt
-            + "（作业能耗是指深海作业A中所有发电机的能耗，应先用get_work_time列出所有作业的时间范围，再用calculate_generator_energy_consumption计算每个作业时间范围的发电机能耗，最后用sum_two计算总和。）"
+            + "（作业能耗是指深海作业A中所有发电机的能耗，应先用get_work_time列出所有作业的时间范围，再把所有作业时间范围一次性传入calculate_group_integral_by_time_ranges（group为'发电机'）计算发电机能耗，返回的合计即为总和。）"
         )
     if "发电效率" in enhanced_prompt:
         enhanced_prompt = (
@@ -330,7 +458,7 @@ def enhanced(prompt: str, context=None, instructions=None, modifiers=None):
     if "DP过程" in enhanced_prompt:
         enhanced_prompt = (
             enhanced_prompt
-            + "（DP过程是指从ON_DP到OFF_DP的过程，应先使用get_device_status_by_time_range查询所有ON_DP和OFF_DP的时间，再计算所有DP过程的能耗，最后使用sum_two函数取总和。）"
+            + "（DP过程是指从ON_DP到OFF_DP的过程，应先使用get_device_status_by_time_range查询所有ON_DP和OFF_DP的时间，再把所有DP过程的时间范围一次性传入calculate_group_integral_by_time_ranges计算能耗，返回的合计即为总和。）"
         )
     if "小艇入水到小艇落座" in enhanced_prompt:
         enhanced_prompt = (
@@ -404,6 +532,101 @@ def get_answer(question):
         return "An error occurred while retrieving the answer."
 
 
+# 以下为异步版本，与同步版本的对话流程一致。大模型请求使用异步 HTTP 客户端，
+# 工具函数（pandas 计算）提交到线程池执行，不阻塞事件循环，可同时处理大量问题。
+
+
+async def create_chat_completion_async(messages, model="glm-4-plus"):
+    print("发起AI对话")
+    response = await cached_completion_async(
+        get_async_client(), model=model, messages=messages, stream=False
+    )
+    print("! AI回复:", response.choices[0].message.content)
+    return response
+
+
+async def choose_table_async(question):
+    print("向AI查询需要的数据表")
+    response = await create_chat_completion_async(choose_table_messages(question))
+    return str(response.choices[0].message.content)
+
+
+async def glm4_create_async(max_attempts, messages, tools=None, model="glm-4-plus"):
+    print("发起AI对话")
+    client = get_async_client()
+    for attempt in range(max_attempts):
+        response = await cached_completion_async(
+            client,
+            model=model,
+            messages=messages,
+            tools=tools,
+        )
+        if _accept_response(response, attempt):
+            return response
+    return response
+
+
+async def run_tool_calls_async(tool_calls):
+    """
+    run_tool_calls 的异步版本：工具函数提交到共享的线程池，本轮的调用并发执行，结果按原始顺序返回。
+    """
+    calls = parse_tool_calls(tool_calls)
+    loop = asyncio.get_running_loop()
+    function_results = await asyncio.gather(
+        *(loop.run_in_executor(tool_executor, function) for _, function in calls)
+    )
+    return _tool_results(calls, function_results)
+
+
+async def get_answer_2_async(question, tools, api_look: bool = True):
+    try:
+        steps = answer_steps(question, tools)
+        step = next(steps)
+        while True:
+            if step[0] == "llm":
+                result = await glm4_create_async(*step[1:])
+            else:
+                result = await run_tool_calls_async(*step[1:])
+            step = steps.send(result)
+    except StopIteration as stop:
+        return stop.value
+    except Exception as e:
+        print(f"Error generating answer for question: {question}, {e}")
+        return None, None
+
+
+async def select_api_based_on_question_async(question, tools):
+    api_list_filter = match_api_list(question)
+    table_name_string = None
+    if len(api_list_filter) == 3:
+        # 如果问题不匹配任何关键字，则由大模型选择数据表
+        table_name_string = await choose_table_async(question)
+    return apply_api_selection(question, tools, api_list_filter, table_name_string)
+
+
+async def run_conversation_xietong_async(question):
+    question = enhanced(question)
+    content_p_1, filtered_tool = await select_api_based_on_question_async(
+        question, tools.tools_all
+    )
+    print("content_p_1:", content_p_1)
+    print("filtered_tool:", [tool["function"]["name"] for tool in filtered_tool])
+    answer, select_result = await get_answer_2_async(
+        question=content_p_1, tools=filtered_tool, api_look=False
+    )
+    return answer
+
+
+async def get_answer_async(question):
+    try:
+        print(f"! 尝试解决问题：{question}")
+        last_answer = await run_conversation_xietong_async(question)
+        return last_answer
+    except Exception as e:
+        print(f"Error occurred while executing get_answer: {e}")
+        return "An error occurred while retrieving the answer."
+
+
 if __name__ == "__main__":
     dotenv.load_dotenv()
 
@@ -1,7 +1,44 @@
-import json
 
+import numpy as np
 import pandas as pd
 
+from data_store import (
+    USE_DATA_PATH,
+    load_columns,
+    load_table,
+    table_cache,
+    table_columns,
+    time_bounds,
+    time_bounds_many,
+    time_slice,
+)
+from indexes import (
+    bigram_index,
+    coverage_bitmap,
+    event_index,
+    integral_index,
+    range_aggregate_index,
+)
+from rollups import aligned_rollup
+from schema_catalog import schema_catalog
+from signals import (
+    band_entry_counts,
+    difference_runs,
+    minmax_downsample,
+    rule_swings,
+    threshold_swings,
+)
+
+
+# get_table_data 默认返回的记录数上限，避免整段分钟数据写入对话
+TABLE_DATA_MAX_POINTS = 200
+
+# find_missing_records 返回的缺失时间段数量上限，超出时只返回前若干段和总段数
+MISSING_GAPS_LIMIT = 20
+
+# 摆动计数返回的摆动时间数量上限，超出时只返回最早和最晚的各一半
+SWING_TIMES_LIMIT = 10
+
 
 def calculate_uptime(start_time, end_time, shebeiname="折臂吊车"):
     """
@@ -32,39 +69,21 @@ def calculate_uptime(start_time, end_time, shebeiname="折臂吊车"):
     # 获取设备配置
     file_path, start_status, end_status = device_config[shebeiname]
 
-    # 读取 CSV 文件
-    df = pd.read_csv(file_path)
-
-    # 将时间列转换为 datetime 类型
-    df["csvTime"] = pd.to_datetime(df["csvTime"])
-
     # 将传入的开始时间和结束时间转换为 datetime 类型
     start_time = pd.to_datetime(start_time)
     end_time = pd.to_datetime(end_time)
 
-    # 筛选出指定时间段内的数据
-    df_filtered = df[(df["csvTime"] >= start_time) & (df["csvTime"] <= end_time)]
-
-    # 初始化变量
-    total_duration = pd.Timedelta(0)
-    start_uptime = None
-    end_uptime = None
-    count = 0
-    uptime_list = []
-
-    # 遍历筛选后的数据
-    for index, row in df_filtered.iterrows():
-        if row["status"] == start_status:
-            start_uptime = row["csvTime"]
-        elif row["status"] == end_status and start_uptime is not None:
-            end_uptime = row["csvTime"]
-            duration = end_uptime - start_uptime
-            count += 1
-            uptime_list.append(
-                {f"第{count}次开机时长": int(duration.total_seconds() / 60)}
-            )
-            total_duration += duration
-            start_uptime = None
+    # 通过事件索引将指定时间段内的开机、关机记录配对为开机区间
+    starts, ends = event_index(file_path, "status").intervals(
+        start_status, end_status, start_time, end_time, include_end=True
+    )
+    durations = pd.to_timedelta(ends - starts)
+    count = len(durations)
+    uptime_list = [
+        {f"第{i}次开机时长": int(seconds / 60)}
+        for i, seconds in enumerate(durations.total_seconds(), start=1)
+    ]
+    total_duration = durations.sum()
 
     # 计算三种格式的开机时长
     seconds = total_duration.total_seconds()
@@ -103,30 +122,15 @@ def compute_operational_duration(start_time, end_time, device_name="A架"):
     # 获取设备配置
     file_path, start_status, end_status = device_config[device_name]
 
-    # 读取 CSV 文件
-    df = pd.read_csv(file_path)
-
-    # 将时间列转换为 datetime 类型
-    df["csvTime"] = pd.to_datetime(df["csvTime"])
-
     # 将传入的开始时间和结束时间转换为 datetime 类型
     start_time = pd.to_datetime(start_time)
     end_time = pd.to_datetime(end_time)
 
-    # 筛选出指定时间段内的数据
-    df_filtered = df[(df["csvTime"] >= start_time) & (df["csvTime"] <= end_time)]
-
-    # 初始化变量
-    total_duration = pd.Timedelta(0)
-    start_uptime = None
-    # 遍历筛选后的数据
-    for index, row in df_filtered.iterrows():
-        if row["check_current_presence"] == start_status:
-            start_uptime = row["csvTime"]
-        elif row["check_current_presence"] == end_status and start_uptime is not None:
-            end_uptime = row["csvTime"]
-            total_duration += end_uptime - start_uptime
-            start_uptime = None
+    # 通过事件索引将指定时间段内的有电流、无电流记录配对为运行区间
+    starts, ends = event_index(file_path, "check_current_presence").intervals(
+        start_status, end_status, start_time, end_time, include_end=True
+    )
+    total_duration = pd.to_timedelta(ends - starts).sum()
 
     # 计算三种格式的开机时长
     seconds = total_duration.total_seconds()
@@ -145,7 +149,15 @@ def compute_operational_duration(start_time, end_time, device_name="A架"):
     )
 
 
-def get_table_data(table_name, start_time, end_time, columns=None, status=None):
+def get_table_data(
+    table_name,
+    start_time,
+    end_time,
+    columns=None,
+    status=None,
+    max_points=TABLE_DATA_MAX_POINTS,
+    cursor=None,
+):
     """
     根据数据表名、开始时间、结束时间、列名和状态获取指定时间范围内的相关数据。
 
@@ -155,9 +167,13 @@ def get_table_data(table_name, start_time, end_time, columns=None, status=None):
     end_time (str): 结束时间，格式为 'YYYY-MM-DD HH:MM:SS'
     columns (list): 需要查询的列名列表，如果为None，则返回所有列
     status (str): 需要筛选的状态（例如 "开机"、"关机"），如果为None，则不筛选状态
+    max_points (int): 返回记录数的上限（正整数），超出时返回最值保留的降采样结果（包含 csvTime 列）和各列的统计摘要，
+        为None时不限制
+    cursor (int): 分页读取原始记录的起始位置，从 0 开始；每页最多 max_points 条，
+        元数据中的 next_cursor 为下一页的起始位置，没有下一页时为 None
 
     返回:
-    dict: 包含指定列名和对应值的字典，或错误信息
+    dict: 包含指定列名和对应值的字典，或错误信息。元数据中的 rows_scanned 为实际读取的记录数
     """
     # 创建一个字典来存储元数据
     metadata = {
@@ -168,14 +184,15 @@ def get_table_data(table_name, start_time, end_time, columns=None, status=None):
         "status": status,
     }
 
+    if max_points is not None and (not isinstance(max_points, int) or max_points <= 0):
+        return {"error": f"max_points 应为正整数，当前为 {max_points!r}", "metadata": metadata}
+
     try:
-        df = pd.read_csv(f"database_in_use/{table_name}.csv")
+        # 只读取列名，数据在确定需要哪些列之后再加载
+        available_columns = table_columns(table_name)
     except FileNotFoundError:
         return {"error": f"数据表 {table_name} 不存在", "metadata": metadata}
 
-    # 将csvTime列从时间戳转换为datetime类型
-    df["csvTime"] = pd.to_datetime(df["csvTime"], unit="ns")  # 假设时间戳是纳秒级别
-
     # 将开始时间和结束时间转换为datetime类型
     start_time = pd.to_datetime(start_time)
     end_time = pd.to_datetime(end_time)
@@ -189,51 +206,183 @@ def get_table_data(table_name, start_time, end_time, columns=None, status=None):
         start_time = start_time.replace(second=0)
         # 将结束时间设置为这一分钟的59秒
         end_time = end_time.replace(second=59)
-    # 筛选指定时间范围内的数据
-    filtered_data = df[(df["csvTime"] >= start_time) & (df["csvTime"] <= end_time)]
 
-    if filtered_data.empty:
+    # 按状态筛选时数据表需要有状态列
+    if status is not None and "status" not in available_columns:
         return {
-            "error": f"在数据表 {table_name} 中未找到时间范围 {start_time} 到 {end_time} 的数据",
+            "error": f"列名 ['status'] 在数据表 {table_name} 中不存在",
             "metadata": metadata,
         }
 
-    # 如果传入了 status 参数，则进一步筛选状态
+    # 事件状态只有几百条记录，通过事件索引直接定位所在行，不需要读取状态列
+    events = None
     if status is not None:
+        events = event_index(table_name, "status")
+    scan_status = events is not None and status not in events.labels
+
+    # 投影下推：只加载 csvTime、需要返回的列以及需要逐行筛选的状态列
+    if columns is None:
+        projection = available_columns
+    else:
+        projection = [column for column in columns if column in available_columns]
+    if scan_status:
+        projection = projection + ["status"]
+    df = load_columns(table_name, projection)
+
+    # 时间条件下推：二分查找时间窗口对应的行号范围
+    lo, hi = time_bounds(
+        df["csvTime"].to_numpy(), start_time, end_time, include_end=True
+    )
+    metadata["rows_scanned"] = hi - lo
+
+    if hi == lo:
+        return {
+            "error": f"在数据表 {table_name} 中未找到时间范围 {start_time} 到 {end_time} 的数据",
+            "metadata": metadata,
+        }
+
+    if events is None:
+        filtered_data = df.iloc[lo:hi]
+    elif scan_status:
+        filtered_data = df.iloc[lo:hi]
         filtered_data = filtered_data[filtered_data["status"] == status]
-        if filtered_data.empty:
-            return {
-                "error": f"在数据表 {table_name} 中未找到状态为 {status} 的数据",
-                "metadata": metadata,
-            }
+    else:
+        _, _, rows = events.select(
+            start_time, end_time, include_end=True, labels=(status,)
+        )
+        filtered_data = df.iloc[rows]
+        metadata["rows_scanned"] = len(rows)
+
+    # 如果传入了 status 参数，检查筛选结果
+    if status is not None and filtered_data.empty:
+        return {
+            "error": f"在数据表 {table_name} 中未找到状态为 {status} 的数据",
+            "metadata": metadata,
+        }
 
     # 如果未指定列名，则返回所有列
     if columns is None:
-        columns = filtered_data.columns.tolist()
+        columns = available_columns
 
     # 检查列名是否存在
-    missing_columns = [
-        column for column in columns if column not in filtered_data.columns
-    ]
+    missing_columns = [column for column in columns if column not in available_columns]
     if missing_columns:
         return {
             "error": f"列名 {missing_columns} 在数据表 {table_name} 中不存在",
             "metadata": metadata,
         }
 
-    # 获取指定列名和对应的值
+    total_rows = len(filtered_data)
+    if cursor is not None:
+        # 分页读取原始记录，cursor 为筛选结果中的起始位置
+        cursor = max(int(cursor), 0)
+        page_size = total_rows if max_points is None else max_points
+        page = filtered_data.iloc[cursor : cursor + page_size]
+        next_cursor = cursor + len(page)
+        metadata["total_rows"] = total_rows
+        metadata["returned_rows"] = len(page)
+        metadata["next_cursor"] = next_cursor if next_cursor < total_rows else None
+        return {"result": _table_rows(page, columns), "metadata": metadata}
+
+    if max_points is not None and total_rows > max_points:
+        # 超出返回记录数上限时返回最值保留的降采样结果和统计摘要
+        sampled = _downsample_rows(filtered_data, columns, max_points)
+        sampled_columns = columns if "csvTime" in columns else ["csvTime"] + columns
+        metadata["total_rows"] = total_rows
+        metadata["returned_rows"] = len(sampled)
+        metadata["downsampled"] = True
+        metadata["next_cursor"] = 0
+        return {
+            "result": _table_rows(sampled, sampled_columns),
+            "summary": _summarize_rows(filtered_data, columns),
+            "metadata": metadata,
+        }
+
+    # 返回结果和元数据
+    return {"result": _table_rows(filtered_data, columns), "metadata": metadata}
+
+
+def _table_rows(df, columns):
+    """
+    获取指定列名和对应的值，时间格式化为字符串。
+    """
     result = {}
     for column in columns:
         if column == "csvTime":
             # 将时间格式化为字符串
-            result[column] = (
-                filtered_data[column].dt.strftime("%Y-%m-%d %H:%M:%S").tolist()
-            )
+            result[column] = df[column].dt.strftime("%Y-%m-%d %H:%M:%S").tolist()
         else:
-            result[column] = filtered_data[column].values.tolist()
+            result[column] = df[column].values.tolist()
+    return result
 
-    # 返回结果和元数据
-    return {"result": result, "metadata": metadata}
+
+def _numeric_values(series):
+    """
+    将列转换为浮点数组，字符串列中无法转换的值（如 'error'）记为 NaN；没有任何数值时返回 None。
+    """
+    if pd.api.types.is_bool_dtype(series.dtype):
+        return None
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        values = series.to_numpy(dtype=float)
+    elif isinstance(series.dtype, pd.CategoricalDtype):
+        return None
+    else:
+        values = pd.to_numeric(series, errors="coerce").to_numpy(dtype=float)
+    return None if np.isnan(values).all() else values
+
+
+def _downsample_rows(df, columns, max_points):
+    """
+    按数值列做最值保留降采样，返回的记录数不超过 max_points；没有数值列时等间隔抽样。
+    """
+    numeric = [
+        values
+        for values in (
+            _numeric_values(df[column]) for column in columns if column != "csvTime"
+        )
+        if values is not None
+    ]
+    if numeric:
+        buckets = max((max_points - 2) // (2 * len(numeric)), 1)
+        rows = minmax_downsample(np.column_stack(numeric), buckets)
+        if len(rows) > max_points:
+            # 数值列较多或 max_points 很小时每桶的最值超出上限，再等间隔抽取（保留首尾）
+            rows = rows[np.unique(np.linspace(0, len(rows) - 1, max_points).astype(np.int64))]
+    else:
+        rows = np.unique(np.linspace(0, len(df) - 1, max_points).astype(np.int64))
+    return df.iloc[rows]
+
+
+def _summarize_rows(df, columns):
+    """
+    计算各列的统计摘要：数值列为记录数、最小值、最大值及其时间和平均值，其余列为各取值的出现次数。
+    """
+    times = df["csvTime"].dt.strftime("%Y-%m-%d %H:%M:%S").to_numpy()
+    summary = {"csvTime": {"start": times[0], "end": times[-1], "count": len(df)}}
+    for column in columns:
+        if column == "csvTime":
+            continue
+        values = _numeric_values(df[column])
+        if values is None:
+            counts = df[column].astype(str).value_counts().head(10)
+            summary[column] = {
+                "count": int(df[column].count()),
+                "values": {str(key): int(value) for key, value in counts.items()},
+            }
+            continue
+        keys = np.where(np.isnan(values), np.inf, values)
+        min_row = int(np.argmin(keys))
+        keys = np.where(np.isnan(values), -np.inf, values)
+        max_row = int(np.argmax(keys))
+        summary[column] = {
+            "count": int((~np.isnan(values)).sum()),
+            "min": float(values[min_row]),
+            "min_time": times[min_row],
+            "max": float(values[max_row]),
+            "max_time": times[max_row],
+            "mean": round(float(np.nanmean(values)), 4),
+        }
+    return summary
 
 
 # 能耗计算
@@ -247,20 +396,12 @@ def load_and_filter_data(file_path, start_time, end_time, power_column):
     :return: 筛选后的 DataFrame
     """
     try:
-        df = pd.read_csv(file_path)
+        df = load_table(file_path)
     except FileNotFoundError:
         raise FileNotFoundError(f"文件 {file_path} 未找到")
 
-    # 确保时间列是 datetime 类型
-    try:
-        df["csvTime"] = pd.to_datetime(df["csvTime"])
-    except Exception as e:
-        raise ValueError(f"时间列转换失败: {e}")
-
     # 筛选特定时间范围内的数据
-    filtered_data = df[
-        (df["csvTime"] >= start_time) & (df["csvTime"] < end_time)
-    ].copy()
+    filtered_data = time_slice(df, start_time, end_time).copy()
 
     if filtered_data.empty:
         return None
@@ -278,6 +419,246 @@ def load_and_filter_data(file_path, start_time, end_time, power_column):
     return filtered_data
 
 
+# 积分设备注册表：设备组 -> 配置
+#   devices: 设备名称 -> (表名, 列名, 积分单位)。单位为 kWh 的列为功率（kW），单位为 L 的列为燃油消耗率（L/h）
+#   total_key: 返回结果中合计值的键名
+#   sample_seconds: 每个采样点固定代表的时长（秒），为 None 时按相邻采样点的时间差积分
+# 新增设备或设备组只需在此处添加配置，即可通过 calculate_group_integral 查询
+INTEGRAL_GROUPS = {
+    "甲板机械": {
+        "devices": {
+            "折臂吊车": ("device_13_11_meter_1311", "13-11-6_v", "kWh"),
+            "一号门架": ("device_1_5_meter_105", "1-5-6_v", "kWh"),
+            "二号门架": ("device_13_14_meter_1314", "13-14-6_v", "kWh"),
+            "绞车": ("device_1_15_meter_115", "1-15-6_v", "kWh"),
+        },
+        "total_key": "总能耗",
+        "sample_seconds": None,
+    },
+    "推进系统": {
+        "devices": {
+            "一号推进变频器": ("Port3_ksbg_8", "P3_15", "kWh"),
+            "二号推进变频器": ("Port4_ksbg_7", "P4_16", "kWh"),
+            "艏推": ("Port3_ksbg_9", "P3_18", "kWh"),
+            "可伸缩推": ("Port4_ksbg_8", "P4_21", "kWh"),
+        },
+        "total_key": "总能耗",
+        "sample_seconds": None,
+    },
+    "发电机": {
+        "devices": {
+            "一号发电机": ("Port1_ksbg_3", "P1_66", "kWh"),
+            "二号发电机": ("Port1_ksbg_3", "P1_75", "kWh"),
+            "三号发电机": ("Port2_ksbg_2", "P2_51", "kWh"),
+            "四号发电机": ("Port2_ksbg_3", "P2_60", "kWh"),
+        },
+        "total_key": "总能耗",
+        "sample_seconds": None,
+    },
+    "燃油": {
+        "devices": {
+            "一号发电机": ("Port1_ksbg_1", "P1_3", "L"),
+            "二号发电机": ("Port1_ksbg_1", "P1_25", "L"),
+            "三号发电机": ("Port2_ksbg_1", "P2_3", "L"),
+            "四号发电机": ("Port2_ksbg_1", "P2_25", "L"),
+        },
+        "total_key": "总燃油消耗量",
+        "sample_seconds": None,
+    },
+    "舵桨": {
+        "devices": {
+            "一号舵桨A": ("device_1_2_meter_102", "1-2-6_v", "kWh"),
+            "一号舵桨B": ("device_1_3_meter_103", "1-3-6_v", "kWh"),
+            "二号舵桨A": ("device_13_2_meter_1302", "13-2-6_v", "kWh"),
+            "二号舵桨B": ("device_13_3_meter_1303", "13-3-6_v", "kWh"),
+        },
+        "total_key": "总能耗",
+        # 舵桨按每个采样点代表 1 分钟计算
+        "sample_seconds": 60,
+    },
+}
+
+
+def integrate_device_group_by_time_ranges(
+    time_ranges, group, devices=None, skip_missing=False
+):
+    """
+    按积分设备注册表计算设备组内各设备在多个时间范围内的积分值。
+    同一数据表的多列只加载一次，所有时间范围通过一次批量二分查找和一次前缀和相减算出。
+    Args:
+        time_ranges (list): (开始时间, 结束时间) 列表，开始时间包含、结束时间不包含，为 None 时不限制。
+        group (str): 设备组名称，见 INTEGRAL_GROUPS。
+        devices (list): 需要计算的设备名称，默认为设备组内全部设备。
+        skip_missing (bool): 数据文件缺失时是否跳过，跳过的设备结果为 NaN。
+    Returns:
+        dict: 设备名称 -> 各时间范围积分值的数组，时间范围内没有数据时为 NaN。
+    Raises:
+        ValueError: 如果设备组或设备名称未知。
+        FileNotFoundError: 如果数据文件未找到且未设置 skip_missing。
+    """
+    if group not in INTEGRAL_GROUPS:
+        raise ValueError(f"未知的设备组: {group}")
+    config = INTEGRAL_GROUPS[group]
+    if devices is None:
+        devices = list(config["devices"])
+    for device in devices:
+        if device not in config["devices"]:
+            raise ValueError(f"未知的设备名称: {device}")
+
+    # 按数据表归并列，索引始终覆盖设备组在该表中的全部列，便于不同查询共用缓存
+    table_columns = {}
+    for table_name, column, _ in config["devices"].values():
+        columns = table_columns.setdefault(table_name, [])
+        if column not in columns:
+            columns.append(column)
+
+    start_times = [start for start, _ in time_ranges]
+    end_times = [end for _, end in time_ranges]
+    results = {}
+    for table_name, columns in table_columns.items():
+        wanted = [
+            device for device in devices if config["devices"][device][0] == table_name
+        ]
+        if not wanted:
+            continue
+        file_path = f"{USE_DATA_PATH}{table_name}.csv"
+        try:
+            # 时间范围对齐到整点或整天时直接合并预处理生成的汇总
+            summary = aligned_rollup(file_path, start_times + end_times)
+            if summary is not None and set(columns) <= set(summary.columns):
+                values = summary.integrals(
+                    columns, start_times, end_times, config["sample_seconds"]
+                )
+            else:
+                values = integral_index(
+                    file_path, columns, config["sample_seconds"]
+                ).window_integrals(start_times, end_times)
+        except FileNotFoundError:
+            if not skip_missing:
+                raise
+            print(f"文件未找到: {file_path}")
+            values = np.full((len(time_ranges), len(columns)), np.nan)
+        for device in wanted:
+            column = config["devices"][device][1]
+            results[device] = values[:, columns.index(column)]
+
+    return {device: results[device] for device in devices}
+
+
+def integrate_device_group(
+    start_time, end_time, group, devices=None, skip_missing=False
+):
+    """
+    按积分设备注册表计算设备组内各设备在指定时间范围内的积分值。
+    Args:
+        start_time: 开始时间（包含），为 None 时从第一条记录开始。
+        end_time: 结束时间（不包含），为 None 时到最后一条记录为止。
+        group (str): 设备组名称，见 INTEGRAL_GROUPS。
+        devices (list): 需要计算的设备名称，默认为设备组内全部设备。
+        skip_missing (bool): 数据文件缺失时是否跳过，跳过的设备结果为 None。
+    Returns:
+        dict: 设备名称 -> 积分值，时间范围内没有数据的设备为 None。
+    Raises:
+        ValueError: 如果设备组或设备名称未知。
+        FileNotFoundError: 如果数据文件未找到且未设置 skip_missing。
+    """
+    results = integrate_device_group_by_time_ranges(
+        [(start_time, end_time)], group, devices, skip_missing
+    )
+    return {
+        device: None if np.isnan(values[0]) else values[0]
+        for device, values in results.items()
+    }
+
+
+def calculate_group_integral(start_time, end_time, group):
+    """
+    计算注册表中任一设备组在指定时间范围内各设备的能耗（或燃油消耗量）以及合计值。
+    Params:
+        start_time (str): 指定时间范围的开始时间，格式为 'YYYY-MM-DD HH:MM:SS'。
+        end_time (str): 指定时间范围的结束时间，格式为 'YYYY-MM-DD HH:MM:SS'。
+        group (str): 设备组名称，如 '甲板机械'、'推进系统'、'发电机'、'燃油'、'舵桨'。
+    Returns:
+        dict: 各设备的积分值与合计值的字典，如果任一设备的数据为空则返回 None。
+    Raises:
+        FileNotFoundError: 如果文件未找到。
+        ValueError: 如果设备组未知。
+    """
+    try:
+        results = integrate_device_group(start_time, end_time, group)
+    except FileNotFoundError as e:
+        raise FileNotFoundError(f"文件未找到: {e}")
+
+    if any(value is None for value in results.values()):
+        return None
+
+    results[INTEGRAL_GROUPS[group]["total_key"]] = round(sum(results.values()), 2)
+    return results
+
+
+def _parse_time_range(time_range):
+    """
+    解析时间范围，支持 {'start_time', 'end_time'}、get_work_time 返回的 {'作业开始', '作业结束'}
+    以及 [开始时间, 结束时间] 三种形式。
+    """
+    if isinstance(time_range, dict):
+        for start_key, end_key in (
+            ("start_time", "end_time"),
+            ("作业开始", "作业结束"),
+        ):
+            if start_key in time_range and end_key in time_range:
+                return time_range[start_key], time_range[end_key]
+        raise ValueError(f"无法解析时间范围: {time_range}")
+    if len(time_range) != 2:
+        raise ValueError(f"无法解析时间范围: {time_range}")
+    return time_range[0], time_range[1]
+
+
+def calculate_group_integral_by_time_ranges(time_ranges, group="发电机"):
+    """
+    一次计算多个时间范围内某设备组的能耗（或燃油消耗量），返回每个时间范围的结果和所有时间范围的合计。
+    适用于作业能耗、DP过程能耗等需要对多段时间分别计算再求和的问题。
+    Params:
+        time_ranges (list): 时间范围列表，每项为 {'start_time': ..., 'end_time': ...}，
+            也可直接使用 get_work_time 返回的 {'作业开始': ..., '作业结束': ...}。
+        group (str): 设备组名称，'甲板机械'、'推进系统'、'发电机'、'燃油' 或 '舵桨'，默认为 '发电机'。
+    Returns:
+        dict: 包含 '分段结果' 和 '合计'。'分段结果' 中每项包含开始时间、结束时间和与
+            calculate_group_integral 相同的结果（数据为空时为 None）；'合计' 为所有非空时间范围之和。
+    Raises:
+        FileNotFoundError: 如果文件未找到。
+        ValueError: 如果设备组未知或时间范围无法解析。
+    """
+    ranges = [_parse_time_range(time_range) for time_range in time_ranges]
+    try:
+        results = integrate_device_group_by_time_ranges(ranges, group)
+    except FileNotFoundError as e:
+        raise FileNotFoundError(f"文件未找到: {e}")
+
+    total_key = INTEGRAL_GROUPS[group]["total_key"]
+    devices = list(results)
+    values = np.column_stack([results[device] for device in devices])
+    # 与 calculate_group_integral 一致，任一设备没有数据的时间范围记为 None
+    valid = ~np.isnan(values).any(axis=1)
+
+    segments = []
+    for i, (start_time, end_time) in enumerate(ranges):
+        result = None
+        if valid[i]:
+            result = {device: float(value) for device, value in zip(devices, values[i])}
+            result[total_key] = round(float(values[i].sum()), 2)
+        segments.append({"开始时间": start_time, "结束时间": end_time, "结果": result})
+
+    device_totals = values[valid].sum(axis=0)
+    total = {
+        device: round(float(value), 2) for device, value in zip(devices, device_totals)
+    }
+    total[total_key] = round(float(device_totals.sum()), 2)
+    total["无数据时间段数"] = int((~valid).sum())
+
+    return {"分段结果": segments, "合计": total}
+
+
 def calculate_total_energy(start_time, end_time, device_name="折臂吊车"):
     """
     计算指定时间段内的总能耗
@@ -286,30 +667,16 @@ def calculate_total_energy(start_time, end_time, device_name="折臂吊车"):
     :param device_name: 设备名称，默认为 '折臂吊车'
     :return: 总能耗（kWh，float 类型）
     """
-    # 设备配置映射：设备名称 -> (表名, 功率列名)
-    device_config = {
-        "折臂吊车": ("device_13_11_meter_1311", "13-11-6_v"),
-        "一号门架": ("device_1_5_meter_105", "1-5-6_v"),  # 一号门架的配置
-        "二号门架": ("device_13_14_meter_1314", "13-14-6_v"),  # 二号门架的配置
-        "绞车": ("device_1_15_meter_115", "1-15-6_v"),  # 添加绞车的配置
-    }
-
     # 检查设备名称是否有效
-    if device_name not in device_config:
+    if device_name not in INTEGRAL_GROUPS["甲板机械"]["devices"]:
         raise ValueError(f"未知的设备名称: {device_name}")
 
-    # 获取设备配置
-    table_name, power_column = device_config[device_name]
-
-    # 读取 CSV 文件并计算能耗
-    file_path = f"database_in_use/{table_name}.csv"
     try:
-        filtered_data = load_and_filter_data(
-            file_path, start_time, end_time, power_column
-        )
-        if filtered_data is None:
+        total_energy = integrate_device_group(
+            start_time, end_time, "甲板机械", [device_name]
+        )[device_name]
+        if total_energy is None:
             return None
-        total_energy = filtered_data["energy_kWh"].sum()
         return round(total_energy, 2)
     except Exception as e:
         raise ValueError(f"计算能耗时出错: {e}")
@@ -327,108 +694,7 @@ def calculate_total_deck_machinery_energy(start_time, end_time):
         FileNotFoundError: 如果文件未找到。
         ValueError: 如果时间列转换失败。
     """
-    file_path_zhebidiaoche = "database_in_use/device_13_11_meter_1311.csv"
-    power_column_zhebidiaoche = "13-11-6_v"  # 折臂吊车液压-Pt有功功率,单位:kW
-
-    file_path_mengjia1 = "database_in_use/device_1_5_meter_105.csv"
-    power_column_mengjia1 = "1-5-6_v"  # 一号门架主液压泵-Pt有功功率,单位:kW
-
-    file_path_mengjia2 = "database_in_use/device_13_14_meter_1314.csv"
-    power_column_mengjia2 = "13-14-6_v"  # 二号门架主液压泵-Pt有功功率,单位:kW
-
-    file_path_jiaoche = "database_in_use/device_1_15_meter_115.csv"
-    power_column_jiaoche = "1-15-6_v"  # 绞车变频器-Pt有功功率,单位:kW
-
-    try:
-        df_zhebidiaoche = pd.read_csv(file_path_zhebidiaoche)
-        df_mengjia1 = pd.read_csv(file_path_mengjia1)
-        df_mengjia2 = pd.read_csv(file_path_mengjia2)
-        df_jiaoche = pd.read_csv(file_path_jiaoche)
-    except FileNotFoundError as e:
-        raise FileNotFoundError(f"文件未找到: {e}")
-
-    try:
-        df_zhebidiaoche["csvTime"] = pd.to_datetime(df_zhebidiaoche["csvTime"])
-        df_mengjia1["csvTime"] = pd.to_datetime(df_mengjia1["csvTime"])
-        df_mengjia2["csvTime"] = pd.to_datetime(df_mengjia2["csvTime"])
-        df_jiaoche["csvTime"] = pd.to_datetime(df_jiaoche["csvTime"])
-    except Exception as e:
-        raise ValueError(f"时间列转换失败: {e}")
-
-    filtered_data_zhebidiaoche = df_zhebidiaoche[
-        (df_zhebidiaoche["csvTime"] >= start_time)
-        & (df_zhebidiaoche["csvTime"] < end_time)
-    ].copy()
-    filtered_data_mengjia1 = df_mengjia1[
-        (df_mengjia1["csvTime"] >= start_time) & (df_mengjia1["csvTime"] < end_time)
-    ].copy()
-    filtered_data_mengjia2 = df_mengjia2[
-        (df_mengjia2["csvTime"] >= start_time) & (df_mengjia2["csvTime"] < end_time)
-    ].copy()
-    filtered_data_jiaoche = df_jiaoche[
-        (df_jiaoche["csvTime"] >= start_time) & (df_jiaoche["csvTime"] < end_time)
-    ].copy()
-
-    if (
-        filtered_data_zhebidiaoche.empty
-        or filtered_data_mengjia1.empty
-        or filtered_data_mengjia2.empty
-        or filtered_data_jiaoche.empty
-    ):
-        return None
-
-    filtered_data_zhebidiaoche.loc[:, "diff_seconds"] = (
-        filtered_data_zhebidiaoche["csvTime"].diff().dt.total_seconds().shift(-1)
-    )
-    filtered_data_mengjia1.loc[:, "diff_seconds"] = (
-        filtered_data_mengjia1["csvTime"].diff().dt.total_seconds().shift(-1)
-    )
-    filtered_data_mengjia2.loc[:, "diff_seconds"] = (
-        filtered_data_mengjia2["csvTime"].diff().dt.total_seconds().shift(-1)
-    )
-    filtered_data_jiaoche.loc[:, "diff_seconds"] = (
-        filtered_data_jiaoche["csvTime"].diff().dt.total_seconds().shift(-1)
-    )
-
-    filtered_data_zhebidiaoche.loc[:, "energy_kWh"] = (
-        filtered_data_zhebidiaoche["diff_seconds"]
-        * filtered_data_zhebidiaoche[power_column_zhebidiaoche]
-        / 3600
-    )
-    filtered_data_mengjia1.loc[:, "energy_kWh"] = (
-        filtered_data_mengjia1["diff_seconds"]
-        * filtered_data_mengjia1[power_column_mengjia1]
-        / 3600
-    )
-    filtered_data_mengjia2.loc[:, "energy_kWh"] = (
-        filtered_data_mengjia2["diff_seconds"]
-        * filtered_data_mengjia2[power_column_mengjia2]
-        / 3600
-    )
-    filtered_data_jiaoche.loc[:, "energy_kWh"] = (
-        filtered_data_jiaoche["diff_seconds"]
-        * filtered_data_jiaoche[power_column_jiaoche]
-        / 3600
-    )
-
-    total_energy_zhebidiaoche = filtered_data_zhebidiaoche["energy_kWh"].sum()
-    total_energy_mengjia1 = filtered_data_mengjia1["energy_kWh"].sum()
-    total_energy_mengjia2 = filtered_data_mengjia2["energy_kWh"].sum()
-    total_energy_jiaoche = filtered_data_jiaoche["energy_kWh"].sum()
-
-    return {
-        "折臂吊车": total_energy_zhebidiaoche,
-        "一号门架": total_energy_mengjia1,
-        "二号门架": total_energy_mengjia2,
-        "绞车": total_energy_jiaoche,
-        "总能耗": round(
-            total_energy_zhebidiaoche
-            + total_energy_mengjia1
-            + total_energy_mengjia2
-            + total_energy_jiaoche,
-            2,
-        ),
-    }
+    return calculate_group_integral(start_time, end_time, "甲板机械")
 
 
 def calculate_energy_consumption(start_time, end_time):
@@ -438,67 +704,49 @@ def calculate_energy_consumption(start_time, end_time):
     :param end_time: 结束时间（字符串或 datetime 类型）
     :return: 总能耗（kWh，float 类型），如果数据为空则返回 None
     """
-    # 文件路径和功率列名直接定义在函数内部
-    file_path = "database_in_use/Port3_ksbg_9.csv"
-    power_column = "P3_18"  # 使用 "艏推功率反馈,单位:kW" 列
-
     try:
-        # 加载 CSV 文件
-        df = pd.read_csv(file_path)
-    except FileNotFoundError:
-        raise FileNotFoundError(f"文件 {file_path} 未找到")
-
-    # 确保时间列是 datetime 类型
-    try:
-        df["csvTime"] = pd.to_datetime(df["csvTime"])
-    except Exception as e:
-        raise ValueError(f"时间列转换失败: {e}")
-
-    # 筛选特定时间范围内的数据
-    filtered_data = df[
-        (df["csvTime"] >= start_time) & (df["csvTime"] < end_time)
-    ].copy()
+        total_energy = integrate_device_group(
+            start_time, end_time, "推进系统", ["艏推"]
+        )["艏推"]
+    except FileNotFoundError as e:
+        raise FileNotFoundError(f"文件 {e.filename} 未找到")
 
-    if filtered_data.empty:
+    if total_energy is None:
         return None
 
-    # 计算时间差（秒）
-    filtered_data.loc[:, "diff_seconds"] = (
-        filtered_data["csvTime"].diff().dt.total_seconds().shift(-1)
-    )
-
-    # 计算每个时间间隔的能耗（kWh）
-    filtered_data.loc[:, "energy_kWh"] = (
-        filtered_data["diff_seconds"] * filtered_data[power_column] / 3600
-    )
-
-    # 计算总能耗
-    total_energy = filtered_data["energy_kWh"].sum()
-
     return round(total_energy, 2)
 
 
 def query_device_parameter(parameter_name_cn):
     """
     通过参数中文名查询设备参数信息
-    :param parameter_name_cn: 参数中文名
-    :param device_parameter_file: 设备参数详情表的文件路径，默认为'设备参数详情表.csv'
-    :return: 返回包含参数信息的字典
+    :param parameter_name_cn: 参数中文名（或英文名），多个关键字以空格分隔，按顺序匹配
+    :return: 返回包含参数信息的字典列表；没有完全匹配的参数时返回最相近的参数，并附带匹配度
     """
     print("-------query_device_parameter执行-------")
-    # 读取设备参数详情表
-    df = pd.read_csv("database_in_use/设备参数详情表.csv")
-
-    parameter_name_cn = ".*".join(parameter_name_cn.split(" "))
-
-    # 检查参数中文名是否包含在 Channel_Text_CN 列中
-    if not df["Channel_Text_CN"].str.contains(parameter_name_cn).any():
+    # 读取设备参数详情表及其中英文参数名的倒排索引
+    df = load_table("设备参数详情表")
+    index = bigram_index("设备参数详情表", ("Channel_Text_CN", "Channel_Text"))
+    keywords = parameter_name_cn.split()
+
+    # 先按中文名、再按英文名查找按顺序包含全部关键字的参数
+    rows = index.search(keywords, "Channel_Text_CN")
+    if len(rows) == 0:
+        rows = index.search(keywords, "Channel_Text")
+
+    # 都没有时返回最相近的参数及其匹配度，避免再次查询
+    scores = None
+    if len(rows) == 0:
+        rows, scores = index.rank(keywords)
+    if len(rows) == 0:
         return {
-            "result": (f"未找到包含 '{parameter_name_cn}' 的参数，请减少关键字再查询。")
+            "result": (
+                f"未找到包含 '{'.*'.join(keywords)}' 的参数，请减少关键字再查询。"
+            )
         }
 
-    # 获取包含参数中文名的所有行
-    parameter_infos = df[df["Channel_Text_CN"].str.contains(parameter_name_cn)]
+    # 获取匹配的所有行
+    parameter_infos = df.iloc[rows]
 
     # 将参数信息转换为字典
     parameter_dict = [
@@ -516,6 +764,9 @@ def query_device_parameter(parameter_name_cn):
         }
         for parameter_info in parameter_infos.to_dict(orient="records")
     ]
+    if scores is not None:
+        for parameter_info, score in zip(parameter_dict, scores):
+            parameter_info["匹配度"] = round(float(score), 2)
     return parameter_dict
 
 
@@ -531,110 +782,7 @@ def calculate_total_energy_consumption(start_time, end_time):
         FileNotFoundError: 如果文件未找到。
         ValueError: 如果时间列转换失败。
     """
-    # 文件路径和功率列名
-    file_path_1 = "database_in_use/Port3_ksbg_8.csv"
-    power_column_1 = "P3_15"  # 一号推进变频器功率反馈,单位:kW
-
-    file_path_2 = "database_in_use/Port4_ksbg_7.csv"
-    power_column_2 = "P4_16"  # 二号推进变频器功率反馈,单位:kW
-
-    file_path_shoutui = "database_in_use/Port3_ksbg_9.csv"
-    power_column_shoutui = "P3_18"  # 艏推功率反馈,单位:kW
-
-    file_path_shensuotui = "database_in_use/Port4_ksbg_8.csv"
-    power_column_shensuotui = "P4_21"  # 可伸缩推功率反馈,单位:kW
-
-    try:
-        # 加载 CSV 文件
-        df1 = pd.read_csv(file_path_1)
-        df2 = pd.read_csv(file_path_2)
-        df_shoutui = pd.read_csv(file_path_shoutui)
-        df_shensuotui = pd.read_csv(file_path_shensuotui)
-    except FileNotFoundError as e:
-        raise FileNotFoundError(f"文件未找到: {e}")
-
-    # 确保时间列是 datetime 类型
-    try:
-        df1["csvTime"] = pd.to_datetime(df1["csvTime"])
-        df2["csvTime"] = pd.to_datetime(df2["csvTime"])
-        df_shoutui["csvTime"] = pd.to_datetime(df_shoutui["csvTime"])
-        df_shensuotui["csvTime"] = pd.to_datetime(df_shensuotui["csvTime"])
-    except Exception as e:
-        raise ValueError(f"时间列转换失败: {e}")
-
-    # 筛选特定时间范围内的数据
-    filtered_data_1 = df1[
-        (df1["csvTime"] >= start_time) & (df1["csvTime"] < end_time)
-    ].copy()
-    filtered_data_2 = df2[
-        (df2["csvTime"] >= start_time) & (df2["csvTime"] < end_time)
-    ].copy()
-    filtered_data_shoutui = df_shoutui[
-        (df_shoutui["csvTime"] >= start_time) & (df_shoutui["csvTime"] < end_time)
-    ].copy()
-    filtered_data_shensuotui = df_shensuotui[
-        (df_shensuotui["csvTime"] >= start_time) & (df_shensuotui["csvTime"] < end_time)
-    ].copy()
-
-    if (
-        filtered_data_1.empty
-        or filtered_data_2.empty
-        or filtered_data_shoutui.empty
-        or filtered_data_shensuotui.empty
-    ):
-        return None
-
-    # 计算时间差（秒）
-    filtered_data_1.loc[:, "diff_seconds"] = (
-        filtered_data_1["csvTime"].diff().dt.total_seconds().shift(-1)
-    )
-    filtered_data_2.loc[:, "diff_seconds"] = (
-        filtered_data_2["csvTime"].diff().dt.total_seconds().shift(-1)
-    )
-    filtered_data_shoutui.loc[:, "diff_seconds"] = (
-        filtered_data_shoutui["csvTime"].diff().dt.total_seconds().shift(-1)
-    )
-    filtered_data_shensuotui.loc[:, "diff_seconds"] = (
-        filtered_data_shensuotui["csvTime"].diff().dt.total_seconds().shift(-1)
-    )
-
-    # 计算每个时间间隔的能耗（kWh）
-    filtered_data_1.loc[:, "energy_kWh"] = (
-        filtered_data_1["diff_seconds"] * filtered_data_1[power_column_1] / 3600
-    )
-    filtered_data_2.loc[:, "energy_kWh"] = (
-        filtered_data_2["diff_seconds"] * filtered_data_2[power_column_2] / 3600
-    )
-    filtered_data_shoutui.loc[:, "energy_kWh"] = (
-        filtered_data_shoutui["diff_seconds"]
-        * filtered_data_shoutui[power_column_shoutui]
-        / 3600
-    )
-    filtered_data_shensuotui.loc[:, "energy_kWh"] = (
-        filtered_data_shensuotui["diff_seconds"]
-        * filtered_data_shensuotui[power_column_shensuotui]
-        / 3600
-    )
-
-    # 计算总能耗
-    total_energy_1 = filtered_data_1["energy_kWh"].sum()
-    total_energy_2 = filtered_data_2["energy_kWh"].sum()
-    total_energy_shoutui = filtered_data_shoutui["energy_kWh"].sum()
-    total_energy_shensuotui = filtered_data_shensuotui["energy_kWh"].sum()
-
-    return {
-        "一号推进变频器": total_energy_1,
-        "二号推进变频器": total_energy_2,
-        "艏推": total_energy_shoutui,
-        "可伸缩推": total_energy_shensuotui,
-        "总能耗": round(
-            total_energy_1
-            + total_energy_2
-            + total_energy_shoutui
-            + total_energy_shensuotui,
-            2,
-        ),
-    }
+    return calculate_group_integral(start_time, end_time, "推进系统")
 
 
 def get_device_status_by_time_range(start_time, end_time, device_name):
@@ -667,51 +815,34 @@ def get_device_status_by_time_range(start_time, end_time, device_name):
         }
 
         try:
-            df = pd.read_csv(f"database_in_use/{table_name}.csv")
+            events = event_index(table_name, "status")
         except FileNotFoundError:
             return {"error": f"数据表 {table_name} 不存在", "metadata": metadata}
-
-        # 将csvTime列从时间戳转换为datetime类型
-        df["csvTime"] = pd.to_datetime(df["csvTime"], unit="ns")  # 假设时间戳是纳秒级别
-
-        # 将开始时间和结束时间转换为datetime类型
-        start_time_dt = pd.to_datetime(start_time)
-        end_time_dt = pd.to_datetime(end_time)
-
-        # 筛选指定时间范围内的数据，并排除 status 为 'False' 的记录
-        filtered_data = df[
-            (df["csvTime"] >= start_time_dt)
-            & (df["csvTime"] <= end_time_dt)
-            & (df["status"] != "False")
-        ]
-
-        if filtered_data.empty:
+        except KeyError:
             return {
-                "error": f"在数据表 {table_name} 中未找到时间范围 {start_time} 到 {end_time} 且 status 不为 'False' 的数据",
+                "error": f"数据表 {table_name} 中不存在 'status' 列",
                 "metadata": metadata,
             }
 
-        # 检查是否存在status列
-        if "status" not in filtered_data.columns:
+        # 通过事件索引查找指定时间范围内 status 不为 'False' 的记录
+        times, statuses, _ = events.select(start_time, end_time, include_end=True)
+
+        if len(times) == 0:
             return {
-                "error": f"数据表 {table_name} 中不存在 'status' 列",
+                "error": f"在数据表 {table_name} 中未找到时间范围 {start_time} 到 {end_time} 且 status 不为 'False' 的数据",
                 "metadata": metadata,
             }
 
         # 获取设备状态变化的时间点和对应状态
-        status_changes = filtered_data[
-            ["csvTime", "status"]
-        ].copy()  # 显式创建副本以避免警告
-
-        # 使用 .loc 避免 SettingWithCopyWarning
-        status_changes.loc[:, "csvTime"] = status_changes["csvTime"].dt.strftime(
-            "%Y-%m-%d %H:%M:%S"
-        )
+        status_changes = [
+            {"csvTime": pd.Timestamp(time), "status": status}
+            for time, status in zip(times, statuses)
+        ]
 
         # 将结果转换为字典
         return {
             "设备名称": device_name,
-            "正在进行的关键动作": status_changes.to_dict(orient="records"),
+            "正在进行的关键动作": status_changes,
         }
 
     # 获取三个设备的状态变化
@@ -744,109 +875,24 @@ def calculate_generator_energy_consumption(start_time, end_time):
     Returns:
         dict: 包含四个发电机的能耗和总能耗（kWh）的字典，如果数据为空则返回 None。
     """
-    file_path_1 = "database_in_use/Port1_ksbg_3.csv"
-    power_column_1 = "P1_66"  # 一号发电机功率,单位:kW
-
-    file_path_2 = "database_in_use/Port1_ksbg_3.csv"
-    power_column_2 = "P1_75"  # 二号发电机功率,单位:kW
-
-    file_path_3 = "database_in_use/Port2_ksbg_2.csv"
-    power_column_3 = "P2_51"  # 三号发电机功率,单位:kW
-
-    file_path_4 = "database_in_use/Port2_ksbg_3.csv"
-    power_column_4 = "P2_60"  # 四号发电机功率,单位:kW
-
-    try:
-        # 加载 CSV 文件
-        df1 = pd.read_csv(file_path_1)
-        df2 = pd.read_csv(file_path_2)
-        df3 = pd.read_csv(file_path_3)
-        df4 = pd.read_csv(file_path_4)
-    except FileNotFoundError as e:
-        raise FileNotFoundError(f"文件未找到: {e}")
+    return calculate_group_integral(start_time, end_time, "发电机")
 
-    # 确保时间列是 datetime 类型
-    try:
-        df1["csvTime"] = pd.to_datetime(df1["csvTime"])
-        df2["csvTime"] = pd.to_datetime(df2["csvTime"])
-        df3["csvTime"] = pd.to_datetime(df3["csvTime"])
-        df4["csvTime"] = pd.to_datetime(df4["csvTime"])
-    except Exception as e:
-        raise ValueError(f"时间列转换失败: {e}")
-
-    # 筛选特定时间范围内的数据
-    filtered_data_1 = df1[
-        (df1["csvTime"] >= start_time) & (df1["csvTime"] < end_time)
-    ].copy()
-    filtered_data_2 = df2[
-        (df2["csvTime"] >= start_time) & (df2["csvTime"] < end_time)
-    ].copy()
-    filtered_data_3 = df3[
-        (df3["csvTime"] >= start_time) & (df3["csvTime"] < end_time)
-    ].copy()
-    filtered_data_4 = df4[
-        (df4["csvTime"] >= start_time) & (df4["csvTime"] < end_time)
-    ].copy()
-
-    if (
-        filtered_data_1.empty
-        or filtered_data_2.empty
-        or filtered_data_3.empty
-        or filtered_data_4.empty
-    ):
-        return None
-
-    # 计算时间差（秒）
-    filtered_data_1.loc[:, "diff_seconds"] = (
-        filtered_data_1["csvTime"].diff().dt.total_seconds().shift(-1)
-    )
-    filtered_data_2.loc[:, "diff_seconds"] = (
-        filtered_data_2["csvTime"].diff().dt.total_seconds().shift(-1)
-    )
-    filtered_data_3.loc[:, "diff_seconds"] = (
-        filtered_data_3["csvTime"].diff().dt.total_seconds().shift(-1)
-    )
-    filtered_data_4.loc[:, "diff_seconds"] = (
-        filtered_data_4["csvTime"].diff().dt.total_seconds().shift(-1)
-    )
 
-    # 计算每个时间间隔的能耗（kWh）
-    filtered_data_1.loc[:, "energy_kWh"] = (
-        filtered_data_1["diff_seconds"] * filtered_data_1[power_column_1] / 3600
-    )
-    filtered_data_2.loc[:, "energy_kWh"] = (
-        filtered_data_2["diff_seconds"] * filtered_data_2[power_column_2] / 3600
-    )
-    filtered_data_3.loc[:, "energy_kWh"] = (
-        filtered_data_3["diff_seconds"] * filtered_data_3[power_column_3] / 3600
-    )
-    filtered_data_4.loc[:, "energy_kWh"] = (
-        filtered_data_4["diff_seconds"] * filtered_data_4[power_column_4] / 3600
-    )
-
-    # 计算总能耗
-    total_energy_1 = filtered_data_1["energy_kWh"].sum()
-    total_energy_2 = filtered_data_2["energy_kWh"].sum()
-    total_energy_3 = filtered_data_3["energy_kWh"].sum()
-    total_energy_4 = filtered_data_4["energy_kWh"].sum()
-
-    return {
-        "一号发电机": total_energy_1,
-        "二号发电机": total_energy_2,
-        "三号发电机": total_energy_3,
-        "四号发电机": total_energy_4,
-        "总能耗": round(
-            total_energy_1 + total_energy_2 + total_energy_3 + total_energy_4, 2
-        ),
-    }
-
-
-def check_ajia_angle(start_time, end_time):
+def check_ajia_angle(
+    start_time,
+    end_time,
+    threshold=5,
+    columns=("Ajia-0_v", "Ajia-1_v"),
+    invalid="break",
+):
     """
     检查在指定时间范围内的 A 架角度异常数据。
     Params:
         start_time (datetime): 起始时间。
         end_time (datetime): 结束时间。
+        threshold (float): 左右舷角度之差的阈值，差值的绝对值大于该值视为异常，默认为 5。
+        columns (tuple): 参与比较的两个角度列，默认为 ('Ajia-0_v', 'Ajia-1_v')。
+        invalid (str): 角度为 'error' 等无效值时的处理方式，'break' 表示结束当前异常段，'skip' 表示跳过该记录。
     Returns:
         list: 包含异常时间段的元组列表，每个元组包含异常开始时间和结束时间。如果没有异常数据，返回 None。
     Exceptions:
@@ -857,51 +903,33 @@ def check_ajia_angle(start_time, end_time):
 
     # 读取 CSV 文件
     try:
-        df = pd.read_csv(file_path)
+        df = load_table(file_path)
     except FileNotFoundError:
         raise FileNotFoundError(f"文件 {file_path} 未找到")
 
-    # 确保时间列是 datetime 类型
-    try:
-        df["csvTime"] = pd.to_datetime(df["csvTime"])
-    except Exception as e:
-        raise ValueError(f"时间列转换失败: {e}")
-
     # 筛选特定时间范围内的数据
-    filtered_data: pd.DataFrame = df[
-        (df["csvTime"] >= start_time) & (df["csvTime"] < end_time)
-    ].copy()
+    filtered_data: pd.DataFrame = time_slice(df, start_time, end_time)
 
     # 检查数据是否存在
     if filtered_data.empty:
         print(f"在时间范围 {start_time} 到 {end_time} 未找到数据")
         return None
 
+    # 'error' 等无法转换为数值的角度记为 NaN，作为无效值处理
+    left, right = (
+        pd.to_numeric(filtered_data[column], errors="coerce").to_numpy(dtype=float)
+        for column in columns
+    )
+    starts, ends = difference_runs(left, right, threshold, invalid)
+
+    times = filtered_data["csvTime"].to_numpy()
     error_time = []
-    error_status = False
-    error_start_time = ""
-    error_end_time = ""
-    for index, row in filtered_data.iterrows():
-        if row["Ajia-0_v"] == "error" or row["Ajia-1_v"] == "error":
-            if not error_status:
-                continue
-            else:
-                error_end_time = filtered_data.loc[index - 1, "csvTime"]
-                print("A架角度异常数据结束：", error_end_time)
-                error_time.append((error_start_time, error_end_time))
-                error_status = False
-                continue
-        if abs(float(row["Ajia-0_v"]) - float(row["Ajia-1_v"])) > 5:
-            if not error_status:
-                error_status = True
-                error_start_time = row["csvTime"]
-                print("A架角度异常数据开始：", error_start_time)
-        else:
-            if error_status:
-                error_end_time = filtered_data.loc[index - 1, "csvTime"]
-                print("A架角度异常数据结束：", error_end_time)
-                error_time.append((error_start_time, error_end_time))
-                error_status = False
+    for start, end in zip(starts, ends):
+        error_start_time = pd.Timestamp(times[start])
+        error_end_time = pd.Timestamp(times[end])
+        print("A架角度异常数据开始：", error_start_time)
+        print("A架角度异常数据结束：", error_end_time)
+        error_time.append((error_start_time, error_end_time))
     print("A架角度异常数据时间段：", error_time)
     return error_time
 
@@ -918,101 +946,7 @@ def calculate_fuel_consumption(start_time, end_time):
         FileNotFoundError: 如果 CSV 文件未找到。
         ValueError: 如果时间列转换失败。
     """
-    file_path_1 = "database_in_use/Port1_ksbg_1.csv"
-    fuel_column_1 = "P1_3"  # 一号发动机燃油消耗,单位:L/h
-
-    file_path_2 = "database_in_use/Port1_ksbg_1.csv"
-    fuel_column_2 = "P1_25"  # 二号发动机燃油消耗,单位:L/h
-
-    file_path_3 = "database_in_use/Port2_ksbg_1.csv"
-    fuel_column_3 = "P2_3"  # 三号发动机燃油消耗,单位:L/h
-
-    file_path_4 = "database_in_use/Port2_ksbg_1.csv"
-    fuel_column_4 = "P2_25"  # 四号发动机燃油消耗,单位:L/h
-
-    try:
-        # 加载 CSV 文件
-        df1 = pd.read_csv(file_path_1)
-        df2 = pd.read_csv(file_path_2)
-        df3 = pd.read_csv(file_path_3)
-        df4 = pd.read_csv(file_path_4)
-    except FileNotFoundError as e:
-        raise FileNotFoundError(f"文件未找到: {e}")
-
-    # 确保时间列是 datetime 类型
-    try:
-        df1["csvTime"] = pd.to_datetime(df1["csvTime"])
-        df2["csvTime"] = pd.to_datetime(df2["csvTime"])
-        df3["csvTime"] = pd.to_datetime(df3["csvTime"])
-        df4["csvTime"] = pd.to_datetime(df4["csvTime"])
-    except Exception as e:
-        raise ValueError(f"时间列转换失败: {e}")
-
-    # 筛选特定时间范围内的数据
-    filtered_data_1: pd.DataFrame = df1[
-        (df1["csvTime"] >= start_time) & (df1["csvTime"] < end_time)
-    ].copy()
-    filtered_data_2: pd.DataFrame = df2[
-        (df2["csvTime"] >= start_time) & (df2["csvTime"] < end_time)
-    ].copy()
-    filtered_data_3: pd.DataFrame = df3[
-        (df3["csvTime"] >= start_time) & (df3["csvTime"] < end_time)
-    ].copy()
-    filtered_data_4: pd.DataFrame = df4[
-        (df4["csvTime"] >= start_time) & (df4["csvTime"] < end_time)
-    ].copy()
-
-    if (
-        filtered_data_1.empty
-        or filtered_data_2.empty
-        or filtered_data_3.empty
-        or filtered_data_4.empty
-    ):
-        return None
-
-    # 计算时间差（秒）
-    filtered_data_1.loc[:, "diff_seconds"] = (
-        filtered_data_1["csvTime"].diff().dt.total_seconds().shift(-1)
-    )
-    filtered_data_2.loc[:, "diff_seconds"] = (
-        filtered_data_2["csvTime"].diff().dt.total_seconds().shift(-1)
-    )
-    filtered_data_3.loc[:, "diff_seconds"] = (
-        filtered_data_3["csvTime"].diff().dt.total_seconds().shift(-1)
-    )
-    filtered_data_4.loc[:, "diff_seconds"] = (
-        filtered_data_4["csvTime"].diff().dt.total_seconds().shift(-1)
-    )
-
-    # 计算每个时间间隔的燃油消耗（L）
-    filtered_data_1.loc[:, "fuel_L"] = (
-        filtered_data_1["diff_seconds"] * filtered_data_1[fuel_column_1] / 3600
-    )
-    filtered_data_2.loc[:, "fuel_L"] = (
-        filtered_data_2["diff_seconds"] * filtered_data_2[fuel_column_2] / 3600
-    )
-    filtered_data_3.loc[:, "fuel_L"] = (
-        filtered_data_3["diff_seconds"] * filtered_data_3[fuel_column_3] / 3600
-    )
-    filtered_data_4.loc[:, "fuel_L"] = (
-        filtered_data_4["diff_seconds"] * filtered_data_4[fuel_column_4] / 3600
-    )
-
-    # 计算总燃油消耗量
-    total_fuel_1 = filtered_data_1["fuel_L"].sum()
-    total_fuel_2 = filtered_data_2["fuel_L"].sum()
-    total_fuel_3 = filtered_data_3["fuel_L"].sum()
-    total_fuel_4 = filtered_data_4["fuel_L"].sum()
-
-    return {
-        "一号发电机": total_fuel_1,
-        "二号发电机": total_fuel_2,
-        "三号发电机": total_fuel_3,
-        "四号发电机": total_fuel_4,
-        "总燃油消耗量": round(
-            total_fuel_1 + total_fuel_2 + total_fuel_3 + total_fuel_4, 2
-        ),
-    }
+    return calculate_group_integral(start_time, end_time, "燃油")
 
 
 def calculate_fuel_consumption_weight(volume, density):
@@ -1067,9 +1001,8 @@ def get_field_dict():
     Returns:
         dict: 包含字段名和字段中文名的字典。
     """
-    with open("dict.json", "r", encoding="utf-8") as f:
-        field_dict = json.load(f)
-    return field_dict
+    # 字段注释在进程内只解析一次，返回副本避免调用方修改共享的目录
+    return schema_catalog().to_dict()
 
 
 def sum_two(a: float, b: float):
@@ -1093,47 +1026,26 @@ def get_work_time(start_time, end_time):
     Returns:
         list of dict: 包含作业开始时间和结束时间的字典列表。
     """
-    try:
-        action_ajia = get_device_status_by_time_range(start_time, end_time, "A架")[
-            "正在进行的关键动作"
-        ]
-        action_dp = get_device_status_by_time_range(start_time, end_time, "定位设备")[
-            "正在进行的关键动作"
-        ]
-    except Exception as e:
-        return {"result": "没有进行作业。"}
-
-    action_ajia = [
-        action
-        for action in action_ajia
-        if action["status"] == "开机" or action["status"] == "关机"
-    ]
-    action_dp = [
-        action
-        for action in action_dp
-        if action["status"] == "ON_DP" or action["status"] == "OFF_DP"
-    ]
-
+    # 作业区间为 A架开机到关机，以及定位设备 ON_DP 到 OFF_DP 的区间
     time_section = []
-    start = None
-    end = None
-    for action in action_ajia:
-        if action["status"] == "开机":
-            start = action["csvTime"]
-        if action["status"] == "关机":
-            end = action["csvTime"]
-            time_section.append((start, end))
-            start = None
-            end = None
-    for action in action_dp:
-        if action["status"] == "ON_DP":
-            start = action["csvTime"]
-        if action["status"] == "OFF_DP":
-            end = action["csvTime"]
-            time_section.append((start, end))
-            start = None
-            end = None
+    for table_name, start_status, end_status in (
+        ("Ajia_plc_1", "开机", "关机"),
+        ("Port3_ksbg_9", "ON_DP", "OFF_DP"),
+    ):
+        events = event_index(table_name, "status")
+        # 设备在时间范围内没有任何动作时，视为没有进行作业
+        if len(events.select(start_time, end_time, include_end=True)[0]) == 0:
+            return {"result": "没有进行作业。"}
+        starts, ends = events.intervals(
+            start_status, end_status, start_time, end_time, include_end=True
+        )
+        time_section.extend(
+            (pd.Timestamp(start), pd.Timestamp(end)) for start, end in zip(starts, ends)
+        )
 
+    # 有动作但没有成对的开始与结束状态时，同样视为没有进行作业
+    if not time_section:
+        return {"result": "没有进行作业。"}
     time_section.sort(key=lambda x: x[0])
 
     merged_time_section = []
@@ -1153,68 +1065,147 @@ def get_work_time(start_time, end_time):
     return merged_time_section
 
 
-def find_missing_records(table_name: str, start_time, end_time):
-    # 读取 CSV 文件
-    df = pd.read_csv("./database_in_use/" + table_name, parse_dates=["csvTime"])
-
-    start_time = pd.to_datetime(start_time)
-    end_time = pd.to_datetime(end_time)
+def find_missing_records(
+    table_name: str, start_time, end_time, by_day=False, with_gaps=False
+):
+    """
+    统计指定时间范围内没有任何记录的分钟数。
+    Params:
+        table_name (str): 数据表名。
+        start_time (str): 开始时间，格式为 'YYYY-MM-DD HH:MM:SS'。
+        end_time (str): 结束时间，格式为 'YYYY-MM-DD HH:MM:SS'。
+        by_day (bool): 是否同时返回每天的缺失分钟数。
+        with_gaps (bool): 是否同时返回连续缺失的时间段，最多返回最早的 MISSING_GAPS_LIMIT 段。
+    Returns:
+        dict: 包含缺失记录数量的字典，按需包含每天的缺失数量、缺失时间段及总段数 gap_count。
+    """
+    # 通过分钟覆盖位图统计缺失的时间点
+    bitmap = coverage_bitmap(table_name)
+
+    result = {"missing_count": bitmap.missing_count(start_time, end_time)}
+    if by_day:
+        result["missing_by_day"] = bitmap.missing_by_day(start_time, end_time)
+    if with_gaps:
+        gap_count, gaps = bitmap.gaps(start_time, end_time, limit=MISSING_GAPS_LIMIT)
+        result["gap_count"] = gap_count
+        result["missing_gaps"] = [
+            {
+                "start": pd.Timestamp(gap_start).strftime("%Y-%m-%d %H:%M"),
+                "end": pd.Timestamp(gap_end).strftime("%Y-%m-%d %H:%M"),
+                "minutes": minutes,
+            }
+            for gap_start, gap_end, minutes in gaps
+        ]
 
-    # 确保时间格式为 年-月-日 时:分
-    df["csvTime"] = df["csvTime"].dt.strftime("%Y-%m-%d %H:%M")
+    # 返回字典
+    return result
 
-    # 生成完整的时间范围
-    full_time_range = pd.date_range(start=start_time, end=end_time, freq="T").strftime(
-        "%Y-%m-%d %H:%M"
-    )
 
-    # 现有数据的时间集合
-    existing_times = set(df["csvTime"])
+def _oscillation_angles(name):
+    """
+    读取 A 架一侧的全部有效角度及其时间，'error' 等无效值已剔除。
+    解析结果随数据表一同缓存，多次查询不必重复转换角度列。
+    """
+    # 选择正确的角度字段
+    angle_column = "Ajia-1_v" if name == "左舷" else "Ajia-0_v"
 
-    # 找到缺失的时间点
-    missing_times = [t for t in full_time_range if t not in existing_times]
+    def build(df):
+        # 转换角度列为浮点数，并获取角度数据
+        angles = pd.to_numeric(df[angle_column], errors="coerce").to_numpy(float)
+        valid = ~np.isnan(angles)
+        return df["csvTime"].to_numpy()[valid], angles[valid]
 
-    # 返回字典
-    return {"missing_count": len(missing_times)}
+    return table_cache.derive("Ajia_plc_1", ("angles", angle_column), build)
 
 
 def count_oscillations(
     start_time, end_time, name: str, angle_range_start, angle_range_end
 ):
+    times, angles = _oscillation_angles(name)
+    lo, hi = time_bounds(times, start_time, end_time, include_end=True)
 
-    # 读取 CSV 文件
-    df = pd.read_csv(
-        "./database_in_use/" + "Ajia_plc_1" + ".csv", parse_dates=["csvTime"]
+    # 计算摆动次数
+    oscillation_count = band_entry_counts(
+        angles, [(angle_range_start, angle_range_end)], [lo], [hi]
+    )[0, 0]
+
+    return {"count": int(oscillation_count)}
+
+
+def count_oscillations_batch(time_ranges, name: str, angle_ranges):
+    """
+    一次统计 A 架在多个时间范围内、多个角度范围的摆动次数（进入角度范围的次数）。
+    Params:
+        time_ranges (list): 时间范围列表，每项为 {'start_time': ..., 'end_time': ...}。
+        name (str): 用来判断摆动的位置，输入'左舷'或'右舷'。
+        angle_ranges (list): 角度范围列表，每项为 [起始角度, 结束角度]。
+    Returns:
+        dict: 'count' 为角度范围 × 时间范围的摆动次数矩阵，第 i 行第 j 列为第 i 个角度范围在第 j 个时间范围内的次数。
+    """
+    ranges = [_parse_time_range(time_range) for time_range in time_ranges]
+    bands = [tuple(angle_range) for angle_range in angle_ranges]
+
+    times, angles = _oscillation_angles(name)
+    lo, hi = time_bounds_many(
+        times,
+        [start for start, _ in ranges],
+        [end for _, end in ranges],
+        include_end=True,
     )
+    counts = band_entry_counts(angles, bands, lo, hi)
 
-    start_time = pd.to_datetime(start_time)
-    end_time = pd.to_datetime(end_time)
+    return {
+        "角度范围": [list(band) for band in bands],
+        "时间范围": [{"start_time": start, "end_time": end} for start, end in ranges],
+        "count": counts.tolist(),
+    }
 
-    # 选择正确的角度字段
-    angle_column = "Ajia-1_v" if name == "左舷" else "Ajia-0_v"
 
-    # 过滤时间范围内的数据
-    df = df[(df["csvTime"] >= start_time) & (df["csvTime"] <= end_time)]
+def _aggregate_index(table_name, column_name):
+    """
+    获取数值列的区间聚合索引；非数值列返回 None，由调用方按原方式用 pandas 计算。
+    Raises:
+        KeyError: 如果列不存在。
+    """
+    dtype = load_table(table_name)[column_name].dtype
+    if not pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_bool_dtype(dtype):
+        return None
+    return range_aggregate_index(table_name, column_name)
 
-    # 转换角度列为浮点数
-    df[angle_column] = pd.to_numeric(df[angle_column], errors="coerce")
 
-    # 获取角度数据
-    angles = df[angle_column].dropna().values
+def _window_statistics(table_name, column_name, start_times, end_times):
+    """
+    计算数值列在多个时间窗口（包含结束时间）内的统计值。
+    窗口均对齐到整点或整天时直接合并预处理生成的汇总，不需要加载数据表；否则使用区间聚合索引。
+    Returns:
+        dict: count、sum、mean、min_value、min_time、max_value、max_time 数组，没有有效值的窗口最值为 None；
+            非数值列返回 None，由调用方按原方式用 pandas 计算。
+    Raises:
+        KeyError: 如果列不存在。
+    """
+    start_times = [pd.to_datetime(start_time) for start_time in start_times]
+    end_times = [pd.to_datetime(end_time) for end_time in end_times]
+    summary = aligned_rollup(table_name, start_times + end_times)
+    if summary is not None and column_name in summary.columns:
+        return summary.statistics(column_name, start_times, end_times, include_end=True)
+
+    index = _aggregate_index(table_name, column_name)
+    if index is None:
+        return None
+    aggregates = index.window_aggregate(start_times, end_times, include_end=True)
 
-    # 计算摆动次数
-    oscillation_count = 0
-    in_range = False
-
-    for angle in angles:
-        if angle_range_start <= angle <= angle_range_end:
-            if not in_range:
-                oscillation_count += 1
-                in_range = True
-        else:
-            in_range = False
+    def pick(array, rows, fill):
+        return np.array([fill if row < 0 else array[row] for row in rows])
 
-    return {"count": oscillation_count}
+    return {
+        "count": aggregates["count"],
+        "sum": aggregates["sum"],
+        "mean": aggregates["mean"],
+        "min_value": pick(index.values, aggregates["min_row"], None),
+        "min_time": pick(index.times, aggregates["min_row"], np.datetime64("NaT")),
+        "max_value": pick(index.values, aggregates["max_row"], None),
+        "max_time": pick(index.times, aggregates["max_row"], np.datetime64("NaT")),
+    }
 
 
 def find_min_value(start_time, end_time, table_name, column_name):
@@ -1228,22 +1219,35 @@ def find_min_value(start_time, end_time, table_name, column_name):
     Returns:
         dict: 包含最小值和对应时间的字典。
     """
-    # 读取 CSV 文件
-    df = pd.read_csv("./database_in_use/" + table_name, parse_dates=["csvTime"])
+    statistics = _window_statistics(table_name, column_name, [start_time], [end_time])
+    if statistics is None:
+        # 从缓存读取数据表
+        df = load_table(table_name)
 
-    start_time = pd.to_datetime(start_time)
-    end_time = pd.to_datetime(end_time)
+        start_time = pd.to_datetime(start_time)
+        end_time = pd.to_datetime(end_time)
 
-    # 过滤时间范围内的数据
-    df = df[(df["csvTime"] >= start_time) & (df["csvTime"] <= end_time)]
+        # 过滤时间范围内的数据
+        df = time_slice(df, start_time, end_time, include_end=True)
+
+        # 获取最小值
+        min_value = df[column_name].min()
 
-    # 获取最小值
-    min_value = df[column_name].min()
+        # 获取最小值对应的时间
+        min_time = df.loc[df[column_name].idxmin(), "csvTime"]
 
-    # 获取最小值对应的时间
-    min_time = df.loc[df[column_name].idxmin(), "csvTime"]
+        return {"min_value": min_value, "min_time": min_time}
 
-    return {"min_value": min_value, "min_time": min_time}
+    # 最小值及其第一次出现的时间
+    if statistics["min_value"][0] is None:
+        raise ValueError(
+            f"时间范围 {start_time} 到 {end_time} 内没有 {column_name} 的数据"
+        )
+
+    return {
+        "min_value": statistics["min_value"][0],
+        "min_time": pd.Timestamp(statistics["min_time"][0]),
+    }
 
 
 def find_max_value(start_time, end_time, table_name, column_name):
@@ -1257,22 +1261,35 @@ def find_max_value(start_time, end_time, table_name, column_name):
     Returns:
         dict: 包含最大值和对应时间的字典。
     """
-    # 读取 CSV 文件
-    df = pd.read_csv("./database_in_use/" + table_name, parse_dates=["csvTime"])
+    statistics = _window_statistics(table_name, column_name, [start_time], [end_time])
+    if statistics is None:
+        # 从缓存读取数据表
+        df = load_table(table_name)
 
-    start_time = pd.to_datetime(start_time)
-    end_time = pd.to_datetime(end_time)
+        start_time = pd.to_datetime(start_time)
+        end_time = pd.to_datetime(end_time)
 
-    # 过滤时间范围内的数据
-    df = df[(df["csvTime"] >= start_time) & (df["csvTime"] <= end_time)]
+        # 过滤时间范围内的数据
+        df = time_slice(df, start_time, end_time, include_end=True)
 
-    # 获取最小值
-    max_value = df[column_name].max()
+        # 获取最小值
+        max_value = df[column_name].max()
 
-    # 获取最小值对应的时间
-    max_time = df.loc[df[column_name].idxmax(), "csvTime"]
+        # 获取最小值对应的时间
+        max_time = df.loc[df[column_name].idxmax(), "csvTime"]
 
-    return {"min_value": max_value, "min_time": max_time}
+        return {"min_value": max_value, "min_time": max_time}
+
+    # 最大值及其第一次出现的时间
+    if statistics["max_value"][0] is None:
+        raise ValueError(
+            f"时间范围 {start_time} 到 {end_time} 内没有 {column_name} 的数据"
+        )
+
+    return {
+        "min_value": statistics["max_value"][0],
+        "min_time": pd.Timestamp(statistics["max_time"][0]),
+    }
 
 
 def find_avg_value(start_time, end_time, table_name, column_name):
@@ -1286,21 +1303,103 @@ def find_avg_value(start_time, end_time, table_name, column_name):
     Returns:
         dict: 包含平均值的字典。
     """
-    # 读取 CSV 文件
-    df = pd.read_csv("./database_in_use/" + table_name, parse_dates=["csvTime"])
+    statistics = _window_statistics(table_name, column_name, [start_time], [end_time])
+    if statistics is None:
+        # 从缓存读取数据表
+        df = load_table(table_name)
 
-    start_time = pd.to_datetime(start_time)
-    end_time = pd.to_datetime(end_time)
+        start_time = pd.to_datetime(start_time)
+        end_time = pd.to_datetime(end_time)
 
-    # 过滤时间范围内的数据
-    df = df[(df["csvTime"] >= start_time) & (df["csvTime"] <= end_time)]
+        # 过滤时间范围内的数据
+        df = time_slice(df, start_time, end_time, include_end=True)
+
+        # 获取平均值
+        avg_value = df[column_name].mean()
 
-    # 获取平均值
-    avg_value = df[column_name].mean()
+        return {"avg_value": avg_value}
+
+    avg_value = statistics["mean"][0]
 
     return {"avg_value": avg_value}
 
 
+def find_range_statistics(table_name, columns, time_ranges):
+    """
+    一次查询指定数据表中多个列在多个时间范围内的统计值。
+    Args:
+        table_name (str): 数据表名。
+        columns (list): 列名列表。
+        time_ranges (list): 时间范围列表，每项为 {'start_time': ..., 'end_time': ...}，包含结束时间。
+    Returns:
+        dict: 列名 -> 各时间范围统计值的列表。数值列包含记录数、总和、平均值、最小值、最大值及对应时间；
+            非数值列只包含记录数、最小值、最大值及对应时间。没有数据的时间范围最值为 None。
+    """
+    ranges = [_parse_time_range(time_range) for time_range in time_ranges]
+    start_times = [pd.to_datetime(start) for start, _ in ranges]
+    end_times = [pd.to_datetime(end) for _, end in ranges]
+
+    def timestamp(times, row):
+        return pd.Timestamp(times[row]).strftime("%Y-%m-%d %H:%M:%S")
+
+    result = {}
+    for column_name in columns:
+        aggregates = _window_statistics(table_name, column_name, start_times, end_times)
+        statistics = []
+        if aggregates is not None:
+            for i, (start, end) in enumerate(ranges):
+                empty = aggregates["min_value"][i] is None
+                statistics.append(
+                    {
+                        "start_time": start,
+                        "end_time": end,
+                        "count": int(aggregates["count"][i]),
+                        "sum": None if empty else aggregates["sum"][i].item(),
+                        "mean": None if empty else float(aggregates["mean"][i]),
+                        "min_value": (
+                            None if empty else aggregates["min_value"][i].item()
+                        ),
+                        "min_time": (
+                            None if empty else timestamp(aggregates["min_time"], i)
+                        ),
+                        "max_value": (
+                            None if empty else aggregates["max_value"][i].item()
+                        ),
+                        "max_time": (
+                            None if empty else timestamp(aggregates["max_time"], i)
+                        ),
+                    }
+                )
+        else:
+            # 非数值列按原方式用 pandas 逐个时间范围计算
+            df = load_table(table_name)
+            for (start, end), start_time, end_time in zip(
+                ranges, start_times, end_times
+            ):
+                values = time_slice(df, start_time, end_time, include_end=True)
+                series = values[column_name].reset_index(drop=True)
+                times = values["csvTime"].to_numpy()
+                empty = series.count() == 0
+                statistics.append(
+                    {
+                        "start_time": start,
+                        "end_time": end,
+                        "count": int(series.count()),
+                        "min_value": None if empty else series.min(),
+                        "min_time": (
+                            None if empty else timestamp(times, series.idxmin())
+                        ),
+                        "max_value": None if empty else series.max(),
+                        "max_time": (
+                            None if empty else timestamp(times, series.idxmax())
+                        ),
+                    }
+                )
+        result[column_name] = statistics
+
+    return result
+
+
 def calculate_total_rudder_energy(start_time, end_time):
     """
     计算指定时间范围内舵桨的能耗（kWh），包括一号船舵A、一号船舵B、二号船舵A、二号船舵B和总能耗。
@@ -1311,55 +1410,78 @@ def calculate_total_rudder_energy(start_time, end_time):
     Returns:
         dict: 包括一号船舵A、一号船舵B、二号船舵A、二号船舵B和总体的能耗（kWh）的字典。
     """
+    energy_results = integrate_device_group(
+        start_time or None, end_time or None, "舵桨", skip_missing=True
+    )
 
-    # 文件路径和功率列名
-    files_and_columns = {
-        "一号舵桨A": ("database_in_use/device_1_2_meter_102.csv", "1-2-6_v"),
-        "一号舵桨B": ("database_in_use/device_1_3_meter_103.csv", "1-3-6_v"),
-        "二号舵桨A": ("database_in_use/device_13_2_meter_1302.csv", "13-2-6_v"),
-        "二号舵桨B": ("database_in_use/device_13_3_meter_1303.csv", "13-3-6_v"),
+    # 数据为空或文件缺失时，能耗记为 0
+    energy_results = {
+        rudder_name: 0.00 if energy is None else round(energy, 2)
+        for rudder_name, energy in energy_results.items()
     }
 
-    energy_results = {}
-
-    for rudder_name, (file_path, power_column) in files_and_columns.items():
-        try:
-            # 读取数据
-            df = pd.read_csv(file_path)
-
-            # 确保时间列是 datetime 格式
-            df["csvTime"] = pd.to_datetime(df["csvTime"])
+    # 计算总能耗
+    energy_results["总能耗"] = round(sum(energy_results.values()), 2)
 
-            # 筛选时间范围（如果提供）
-            if start_time:
-                start_time_dt = pd.to_datetime(start_time)
-                df = df[df["csvTime"] >= start_time_dt]
-            if end_time:
-                end_time_dt = pd.to_datetime(end_time)
-                df = df[df["csvTime"] < end_time_dt]
+    return energy_results
 
-            if df.empty:
-                energy_results[rudder_name] = 0.00
-                continue  # 如果数据为空，跳过这个文件
 
-            # 计算时间间隔（分钟 → 小时）
-            df["time_diff_hours"] = 1 / 60  # 1 分钟 = 1/60 小时
+def _swing_angles(start_time, end_time, side):
+    """
+    读取指定时间范围内 A 架一侧或两侧的角度序列，供摆动计数使用。
+    Args:
+        start_time (str): 起始时间。
+        end_time (str): 结束时间。
+        side (str or list): '左舷'、'右舷'、'两舷'，或舷侧名称列表。
+    Returns:
+        list: (舷侧, 时间数组, 角度数组) 列表，角度为 'error' 等无效值的记录已剔除。
+    """
+    sides = ["左舷", "右舷"] if side == "两舷" else side
+    if isinstance(sides, str):
+        sides = [sides]
 
-            # 计算当前文件的总能耗（kWh）
-            df["Energy_kWh"] = df[power_column] * df["time_diff_hours"]
-            total_energy = df["Energy_kWh"].sum()
+    # 从缓存读取数据表
+    df = load_table("Ajia_plc_1")
 
-            # 记录到字典
-            energy_results[rudder_name] = round(total_energy, 2)
+    start_time = pd.to_datetime(start_time)
+    end_time = pd.to_datetime(end_time)
 
-        except FileNotFoundError:
-            print(f"文件未找到: {file_path}")
-            energy_results[rudder_name] = 0.00  # 文件缺失时，能耗记为 0
+    # 过滤时间范围内的数据
+    df = time_slice(df, start_time, end_time, include_end=True)
+    times = df["csvTime"].to_numpy()
+
+    results = []
+    for name in sides:
+        # 选择正确的角度字段
+        angle_column = "Ajia-1_v" if name == "左舷" else "Ajia-0_v"
+        # 转换角度列为浮点数，并剔除无效值
+        angles = pd.to_numeric(df[angle_column], errors="coerce").to_numpy(float)
+        valid = ~np.isnan(angles)
+        results.append((name, times[valid], angles[valid]))
+    return results
 
-    # 计算总能耗
-    energy_results["总能耗"] = round(sum(energy_results.values()), 2)
 
-    return energy_results
+def _swing_result(swings):
+    """
+    整理摆动计数结果，单侧时直接返回该侧结果，多侧时按舷侧分别返回。
+    摆动次数超过 SWING_TIMES_LIMIT 时只列出最早和最晚的摆动时间，并给出省略的次数。
+    """
+    half = SWING_TIMES_LIMIT // 2
+    results = {}
+    for name, times, positions in swings:
+        if len(positions) > SWING_TIMES_LIMIT:
+            shown = np.concatenate((positions[:half], positions[-half:]))
+        else:
+            shown = positions
+        results[name] = {
+            "摆动次数": len(positions),
+            "摆动时间": pd.DatetimeIndex(times[shown]).strftime("%Y-%m-%d %H:%M:%S").tolist(),
+        }
+        if len(shown) < len(positions):
+            results[name]["省略的摆动时间数"] = len(positions) - len(shown)
+    if len(results) == 1:
+        return next(iter(results.values()))
+    return results
 
 
 def count_swing_with_rule(
@@ -1370,93 +1492,20 @@ def count_swing_with_rule(
     Params:
         start_time (str): 起始时间，格式为 'YYYY-MM-DD HH:MM:SS'。
         end_time (str): 结束时间，格式为 'YYYY-MM-DD HH:MM:SS'。
-        side (str): 用来判断摆动的位置，输入'左舷'或'右舷'。
+        side (str): 用来判断摆动的位置，输入'左舷'、'右舷'，或'两舷'同时计算两侧。
         front_angle (float): 正向摆动阈值。
         back_angle (float): 负向摆动阈值。
     Returns:
-        dict: 包含摆动次数的字典。
+        dict: 包含摆动次数和摆动时间（超过 10 次时只列出最早和最晚各 5 次）的字典；两舷时按舷侧分别给出。
     """
     # 减小阈值
     front_angle = front_angle - 5
 
-    # 读取 CSV 文件
-    df = pd.read_csv("./database_in_use/Ajia_plc_1.csv", parse_dates=["csvTime"])
-
-    start_time = pd.to_datetime(start_time)
-    end_time = pd.to_datetime(end_time)
-
-    # 选择正确的角度字段
-    angle_column = "Ajia-1_v" if side == "左舷" else "Ajia-0_v"
-
-    # 过滤时间范围内的数据
-    df = df[(df["csvTime"] >= start_time) & (df["csvTime"] <= end_time)]
-
-    # 转换角度列为浮点数
-    df[angle_column] = pd.to_numeric(df[angle_column], errors="coerce")
-
-    # 获取角度数据
-    angles = df[angle_column].dropna().values
-
-    swing_count = 0  # 摆动次数
-    swing_direction = None  # 摆动方向，1 为正向，-1 为负向
-    at_front = None  # 是否到达正向摆动阈值
-    at_back = None  # 是否到达负向摆动阈值
-
-    for i in range(len(angles) - 1):
-        current_angle = angles[i]
-        next_angle = angles[i + 1]
-        if next_angle - current_angle > 0:  # 即将正向摆动
-            if (
-                swing_direction is None or at_front is None or at_back is None
-            ):  # 如果尚未初始化
-                swing_direction = 1
-                if back_angle <= current_angle <= front_angle:  # 如果在摆动范围内
-                    at_front = False
-                    at_back = False
-                elif current_angle > front_angle:  # 如果超过正向摆动阈值
-                    at_front = True
-                    at_back = False
-                elif current_angle < back_angle:  # 如果超过负向摆动阈值
-                    at_back = True
-                    at_front = False
-            elif swing_direction == 1:  # 如果当前方向为正向
-                if next_angle > front_angle:  # 如果超过正向摆动阈值
-                    if at_back:  # 如果到达过负向摆动阈值
-                        swing_count += 1
-                        at_back = False
-                    at_front = True
-                else:
-                    continue
-            elif swing_direction == -1:  # 如果当前方向为负向
-                swing_direction = 1
-        elif next_angle - current_angle < 0:  # 即将负向摆动
-            if (
-                swing_direction is None or at_front is None or at_back is None
-            ):  # 如果尚未初始化
-                swing_direction = -1
-                if back_angle <= current_angle <= front_angle:  # 如果在摆动范围内
-                    at_front = False
-                    at_back = False
-                elif current_angle > front_angle:  # 如果超过正向摆动阈值
-                    at_front = True
-                    at_back = False
-                elif current_angle < back_angle:  # 如果超过负向摆动阈值
-                    at_back = True
-                    at_front = False
-            elif swing_direction == -1:  # 如果当前方向为负向
-                if next_angle < back_angle:  # 如果超过负向摆动阈值
-                    if at_front:  # 如果到达过正向摆动阈值
-                        swing_count += 1
-                        at_front = False
-                    at_back = True
-                else:
-                    continue
-            elif swing_direction == 1:  # 如果当前方向为正向
-                swing_direction = -1
-        else:  # 角度未发生变化
-            continue
-
-    return {"摆动次数": swing_count}
+    swings = [
+        (name, times, rule_swings(angles, front_angle, back_angle))
+        for name, times, angles in _swing_angles(start_time, end_time, side)
+    ]
+    return _swing_result(swings)
 
 
 def count_swing_with_threshold(start_time, end_time, side: str, threshold):
@@ -1465,67 +1514,16 @@ def count_swing_with_threshold(start_time, end_time, side: str, threshold):
     Params:
         start_time (str): 起始时间，格式为 'YYYY-MM-DD HH:MM:SS'。
         end_time (str): 结束时间，格式为 'YYYY-MM-DD HH:MM:SS'。
-        side (str): 用来判断摆动的位置，输入'左舷'或'右舷'。
+        side (str): 用来判断摆动的位置，输入'左舷'、'右舷'，或'两舷'同时计算两侧。
         threshold (float): 摆动幅度的阈值。
     Returns:
-        dict: 包含摆动次数的字典。
+        dict: 包含摆动次数和摆动时间（超过 10 次时只列出最早和最晚各 5 次）的字典；两舷时按舷侧分别给出。
     """
-    # 读取 CSV 文件
-    df = pd.read_csv("./database_in_use/Ajia_plc_1.csv", parse_dates=["csvTime"])
-
-    start_time = pd.to_datetime(start_time)
-    end_time = pd.to_datetime(end_time)
-
-    # 选择正确的角度字段
-    angle_column = "Ajia-1_v" if side == "左舷" else "Ajia-0_v"
-
-    # 过滤时间范围内的数据
-    df = df[(df["csvTime"] >= start_time) & (df["csvTime"] <= end_time)]
-
-    # 转换角度列为浮点数
-    df[angle_column] = pd.to_numeric(df[angle_column], errors="coerce")
-
-    # 获取角度数据
-    angles = df[angle_column].dropna().values
-
-    swing_count = 0  # 摆动次数
-    swing_direction = None  # 摆动方向，1 为正向，-1 为负向
-    start_angle = None  # 摆动开始角度
-    end_angle = None  # 摆动结束角度
-
-    for i in range(len(angles) - 1):
-        current_angle = angles[i]  # 当前角度
-        next_angle = angles[i + 1]  # 下一个角度
-        if next_angle - current_angle > 0:  # 即将正向摆动
-            if swing_direction is None:  # 如果尚未确定摆动方向
-                swing_direction = 1
-                start_angle = current_angle
-                end_angle = next_angle
-            elif swing_direction == 1:  # 如果当前方向为正向
-                end_angle = next_angle
-            elif swing_direction == -1:  # 如果当前方向为负向
-                if abs(end_angle - start_angle) >= threshold:  # 如果摆动幅度超过阈值
-                    swing_count += 1
-                swing_direction = 1
-                start_angle = current_angle
-                end_angle = next_angle
-        elif next_angle - current_angle < 0:  # 即将负向摆动
-            if swing_direction is None:  # 如果尚未确定摆动方向
-                swing_direction = -1
-                start_angle = current_angle
-                end_angle = next_angle
-            elif swing_direction == -1:  # 如果当前方向为负向
-                end_angle = next_angle
-            elif swing_direction == 1:  # 如果当前方向为正向
-                if abs(end_angle - start_angle) >= threshold:  # 如果摆动幅度超过阈值
-                    swing_count += 1
-                swing_direction = -1
-                start_angle = current_angle
-                end_angle = next_angle
-        else:  # 角度未发生变化
-            continue
-
-    return {"摆动次数": swing_count}
+    swings = [
+        (name, times, threshold_swings(angles, threshold))
+        for name, times, angles in _swing_angles(start_time, end_time, side)
+    ]
+    return _swing_result(swings)
 
 
 def calculate_time_difference(time1, time2):
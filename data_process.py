@@ -5,11 +5,15 @@ from datetime import datetime
 
 import pandas as pd
 
+from data_store import export_binary_tables
+from indexes import export_event_indexes
 from predict_seq import get_result
+from rollups import export_rollups
 
 RAW_DATA_PATH = "raw_data/"
 USE_DATA_PATH = "database_in_use/"
 MID_DATA_PATH = "data/"
+BIN_DATA_PATH = "database_bin/"
 
 
 def merge_csv_files(folder_path, out_path) -> None:
@@ -1120,3 +1124,15 @@ df_field_dict["字段含义_new"] = df_field_dict["字段含义"] + df_field_dic
 )
 # 将两列转换为字典
 field_dict = df_field_dict.set_index("字段名")["字段含义_new"].to_dict()
+
+
+# Pre4: 生成二进制列存，供 api.py 快速加载
+export_binary_tables(USE_DATA_PATH, BIN_DATA_PATH)
+
+
+# Pre5: 生成状态列的事件索引，供 api.py 按时间二分查找设备动作
+export_event_indexes(USE_DATA_PATH, BIN_DATA_PATH)
+
+
+# Pre6: 生成各数值列按小时、按天的汇总，供 api.py 直接回答整点、整天的时间范围
+export_rollups(USE_DATA_PATH, BIN_DATA_PATH)
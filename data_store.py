@@ -0,0 +1,533 @@
+import json
+import mmap
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+USE_DATA_PATH = "database_in_use/"
+BIN_DATA_PATH = "database_bin/"
+
+# 以分类编码保存并以 Categorical 类型加载的状态列
+STATUS_COLUMNS = ("status", "check_current_presence", "action")
+
+# 缓存的字节预算，默认 512MB，足够容纳 database_in_use 下的全部数据表
+TABLE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+
+def resolve_table_path(table_name, data_path=USE_DATA_PATH):
+    """
+    将数据表名或文件路径统一解析为 CSV 文件路径。
+    Args:
+        table_name (str): 数据表名（如 'Ajia_plc_1'、'Ajia_plc_1.csv'）或 CSV 文件路径。
+        data_path (str): 数据表所在的文件夹路径。
+    Returns:
+        str: 规范化后的 CSV 文件路径。
+    """
+    if os.path.dirname(table_name):
+        path = table_name
+    else:
+        path = os.path.join(data_path, table_name)
+    if not path.endswith(".csv"):
+        path = path + ".csv"
+    return os.path.normpath(path)
+
+
+def read_csv_table(path, columns=None):
+    """
+    读取 CSV 数据表，并将 csvTime 列解析为 datetime 类型。
+    Args:
+        path (str): CSV 文件路径。
+        columns (list): 只读取这些列，为 None 时读取全部列。
+    Returns:
+        pd.DataFrame: 读取后的数据表。
+    """
+    if columns is None:
+        df = pd.read_csv(path)
+    else:
+        wanted = set(columns)
+        df = pd.read_csv(path, usecols=lambda column: column in wanted)
+    if "csvTime" in df.columns:
+        df["csvTime"] = pd.to_datetime(df["csvTime"])
+    return df
+
+
+def binary_table_dir(path, bin_path=BIN_DATA_PATH):
+    """
+    获取 CSV 数据表对应的二进制列存目录。
+    """
+    table_name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(bin_path, table_name)
+
+
+def write_binary_table(df, table_dir, source_path=None):
+    """
+    将数据表按列保存为 .npy 文件。
+    csvTime 列保存为 int64 纳秒时间戳，非数值列保存为分类编码，列信息写入 meta.json。
+    Args:
+        df (pd.DataFrame): 要保存的数据表。
+        table_dir (str): 列存目录。
+        source_path (str): 源 CSV 文件路径，用于判断列存是否过期。
+    Returns:
+        None
+    """
+    tmp_dir = table_dir.rstrip("/") + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    columns = []
+    for i, column in enumerate(df.columns):
+        series = df[column]
+        file_name = f"{i}.npy"
+        if column == "csvTime":
+            values = series.to_numpy(dtype="datetime64[ns]").view(np.int64)
+            columns.append({"name": column, "kind": "time"})
+        elif pd.api.types.is_numeric_dtype(series.dtype):
+            values = series.to_numpy()
+            columns.append({"name": column, "kind": "numeric"})
+        else:
+            categorical = pd.Categorical(series)
+            values = categorical.codes
+            columns.append(
+                {
+                    "name": column,
+                    "kind": "category",
+                    "categories": [str(c) for c in categorical.categories],
+                }
+            )
+        columns[-1]["file"] = file_name
+        columns[-1]["dtype"] = values.dtype.str
+        np.save(os.path.join(tmp_dir, file_name), values)
+
+    meta = {"rows": len(df), "columns": columns}
+    if "csvTime" in df.columns and len(df) > 0:
+        meta["time_start"] = str(df["csvTime"].iloc[0])
+        meta["time_end"] = str(df["csvTime"].iloc[-1])
+    if source_path is not None:
+        stat = os.stat(source_path)
+        meta["source_mtime_ns"] = stat.st_mtime_ns
+        meta["source_size"] = stat.st_size
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=4)
+
+    shutil.rmtree(table_dir, ignore_errors=True)
+    os.rename(tmp_dir, table_dir)
+
+
+def read_binary_table(table_dir, source_path=None, columns=None):
+    """
+    读取二进制列存数据表。
+    Args:
+        table_dir (str): 列存目录。
+        source_path (str): 源 CSV 文件路径，若列存生成后 CSV 被修改则视为过期。
+        columns (list): 只读取这些列，为 None 时读取全部列。
+    Returns:
+        pd.DataFrame: 读取后的数据表；列存不存在或已过期时返回 None。
+    """
+    try:
+        with open(os.path.join(table_dir, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except FileNotFoundError:
+        return None
+
+    if source_path is not None:
+        stat = os.stat(source_path)
+        if meta.get("source_mtime_ns") != stat.st_mtime_ns or meta.get("source_size") != stat.st_size:
+            return None
+
+    data = {}
+    for column in meta["columns"]:
+        if columns is not None and column["name"] not in columns:
+            continue
+        # 以只读内存映射方式打开，多个进程共享操作系统页缓存中的同一份数据
+        values = np.load(os.path.join(table_dir, column["file"]), mmap_mode="r")
+        if column["kind"] == "time":
+            data[column["name"]] = values.view("datetime64[ns]")
+        elif column["name"] in STATUS_COLUMNS:
+            categories = pd.Index(column["categories"], dtype=object)
+            data[column["name"]] = pd.Categorical.from_codes(values, categories)
+        elif column["kind"] == "category":
+            # 混合了数值与字符串的列还原为字符串，保持与 CSV 读取结果一致
+            # 编码 -1 表示缺失值，恰好取到末尾追加的 NaN
+            lookup = np.array(column["categories"] + [np.nan], dtype=object)
+            data[column["name"]] = pd.Series(lookup[values])
+        else:
+            data[column["name"]] = values
+    # copy=False 使数值列直接引用内存映射数组，不复制数据
+    return pd.DataFrame(data, copy=False)
+
+
+def read_table(path, bin_path=BIN_DATA_PATH, columns=None):
+    """
+    读取数据表，优先使用二进制列存，不存在或已过期时回退到 CSV。
+    Args:
+        path (str): CSV 文件路径。
+        bin_path (str): 二进制列存所在的文件夹路径。
+        columns (list): 只读取这些列，为 None 时读取全部列。列存中每列是单独的文件，
+            CSV 则通过 usecols 跳过其余列的解析。
+    Returns:
+        pd.DataFrame: 读取后的数据表，列的顺序与原表一致。
+    """
+    df = read_binary_table(binary_table_dir(path, bin_path), source_path=path, columns=columns)
+    if df is None:
+        df = read_csv_table(path, columns)
+    # 按时间窗口取数依赖 csvTime 升序排列
+    if "csvTime" in df.columns and not df["csvTime"].is_monotonic_increasing:
+        df = df.sort_values("csvTime", kind="stable")
+    return df
+
+
+def export_binary_tables(data_path=USE_DATA_PATH, bin_path=BIN_DATA_PATH):
+    """
+    将文件夹中的全部 CSV 数据表转换为二进制列存，并生成 manifest.json。
+    manifest.json 记录每张表的行数、各列数据类型以及时间范围。
+    Args:
+        data_path (str): CSV 数据表所在的文件夹路径。
+        bin_path (str): 二进制列存保存的文件夹路径。
+    Returns:
+        None
+    """
+    os.makedirs(bin_path, exist_ok=True)
+    manifest = {}
+    for file_name in sorted(os.listdir(data_path)):
+        if not file_name.endswith(".csv"):
+            continue
+        path = os.path.join(data_path, file_name)
+        table_dir = binary_table_dir(path, bin_path)
+        print(f"生成列存：{file_name}")
+        write_binary_table(read_csv_table(path), table_dir, source_path=path)
+
+        with open(os.path.join(table_dir, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        manifest[os.path.basename(table_dir)] = {
+            "rows": meta["rows"],
+            "dtypes": {column["name"]: column["dtype"] for column in meta["columns"]},
+            "time_start": meta.get("time_start"),
+            "time_end": meta.get("time_end"),
+        }
+
+    with open(os.path.join(bin_path, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=4)
+
+
+def read_manifest(bin_path=BIN_DATA_PATH):
+    """
+    读取二进制列存的 manifest.json。
+    Returns:
+        dict: 数据表名 -> 行数、各列数据类型、时间范围；列存不存在时返回空字典。
+    """
+    try:
+        with open(os.path.join(bin_path, "manifest.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _is_mapped(series):
+    """
+    判断列数据是否来自内存映射文件。
+    """
+    values = series.array
+    if isinstance(values, pd.Categorical):
+        values = values.codes
+    base = np.asarray(values)
+    while base is not None:
+        if isinstance(base, (np.memmap, mmap.mmap)):
+            return True
+        base = getattr(base, "base", None)
+    return False
+
+
+class _TableEntry:
+    """
+    缓存中的一张数据表及其派生对象。
+    """
+
+    def __init__(self, path, mtime, nbytes, df):
+        self.path = path
+        self.mtime = mtime
+        self.nbytes = nbytes
+        self.df = df
+        self.derived = {}  # 派生对象名 -> 派生对象（如索引）
+        self.derive_lock = threading.Lock()
+
+
+class TableCache:
+    """
+    进程内共享的数据表缓存。
+    每张表只读取并解析一次，按字节预算进行 LRU 淘汰，文件修改时间变化时自动重新加载。
+    多线程并发请求同一张表时，只有一个线程负责读取，其余线程等待结果。
+    由数据表派生的索引与数据表一同缓存，数据表重新加载或被淘汰时一并丢弃。
+    """
+
+    def __init__(self, data_path=USE_DATA_PATH, max_bytes=TABLE_CACHE_MAX_BYTES):
+        self.data_path = data_path
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # 文件路径 -> _TableEntry
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._load_locks = {}  # 文件路径 -> 加载锁
+
+    def get(self, table_name):
+        """
+        获取数据表的只读视图。
+        Args:
+            table_name (str): 数据表名或 CSV 文件路径。
+        Returns:
+            pd.DataFrame: 数据表的浅拷贝，对其增删列不会影响缓存中的数据。
+        Raises:
+            FileNotFoundError: 如果数据表文件不存在。
+        """
+        return self._get_entry(table_name).df.copy(deep=False)
+
+    def derive(self, table_name, key, builder):
+        """
+        获取由数据表派生的对象，例如前缀和索引。
+        Args:
+            table_name (str): 数据表名或 CSV 文件路径。
+            key (hashable): 派生对象的名称，同一张表内唯一。
+            builder (callable): 接收数据表、返回派生对象的函数，每次加载数据表后只调用一次。
+        Returns:
+            object: 派生对象。
+        Raises:
+            FileNotFoundError: 如果数据表文件不存在。
+        """
+        entry = self._get_entry(table_name)
+        with self._lock:
+            if key in entry.derived:
+                return entry.derived[key]
+        with entry.derive_lock:
+            with self._lock:
+                if key in entry.derived:
+                    return entry.derived[key]
+            value = builder(entry.df.copy(deep=False))
+            nbytes = int(getattr(value, "nbytes", 0))
+            with self._lock:
+                entry.derived[key] = value
+                entry.nbytes += nbytes
+                if self._entries.get(entry.path) is entry:
+                    self._total_bytes += nbytes
+                    self._evict()
+        return value
+
+    def peek(self, table_name):
+        """
+        获取已在缓存中的数据表，不触发加载。
+        Returns:
+            pd.DataFrame: 数据表的浅拷贝；未缓存或文件已被修改时返回 None。
+        Raises:
+            FileNotFoundError: 如果数据表文件不存在。
+        """
+        path = resolve_table_path(table_name, self.data_path)
+        entry = self._lookup(path, os.stat(path).st_mtime_ns)
+        return None if entry is None else entry.df.copy(deep=False)
+
+    def invalidate(self, table_name=None):
+        """
+        清除指定数据表的缓存，未指定时清除全部缓存。
+        """
+        with self._lock:
+            if table_name is None:
+                self._entries.clear()
+                self._total_bytes = 0
+                return
+            path = resolve_table_path(table_name, self.data_path)
+            entry = self._entries.pop(path, None)
+            if entry is not None:
+                self._total_bytes -= entry.nbytes
+
+    def stats(self):
+        """
+        返回缓存的使用情况。
+        """
+        with self._lock:
+            return {
+                "tables": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _get_entry(self, table_name):
+        path = resolve_table_path(table_name, self.data_path)
+        mtime = os.stat(path).st_mtime_ns
+
+        entry = self._lookup(path, mtime)
+        if entry is None:
+            with self._load_lock(path):
+                # 等待锁期间可能已被其他线程加载
+                entry = self._lookup(path, mtime)
+                if entry is None:
+                    entry = self._store(path, mtime, read_table(path))
+        return entry
+
+    def _load_lock(self, path):
+        with self._lock:
+            return self._load_locks.setdefault(path, threading.Lock())
+
+    def _lookup(self, path, mtime):
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                return None
+            if entry.mtime != mtime:
+                # 文件已被修改，丢弃旧数据及其派生对象
+                del self._entries[path]
+                self._total_bytes -= entry.nbytes
+                return None
+            self._entries.move_to_end(path)
+            return entry
+
+    def _store(self, path, mtime, df):
+        # 内存映射的列由页缓存共享，不计入预算
+        usage = df.memory_usage(deep=True, index=False)
+        nbytes = int(sum(usage[c] for c in df.columns if not _is_mapped(df[c])))
+        entry = _TableEntry(path, mtime, nbytes, df)
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self._total_bytes -= old.nbytes
+            self._entries[path] = entry
+            self._total_bytes += nbytes
+            self._evict()
+        return entry
+
+    def _evict(self):
+        # 超出预算时淘汰最久未使用的数据表，至少保留最近使用的数据表
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self._total_bytes -= evicted.nbytes
+
+
+table_cache = TableCache()
+
+
+def load_table(table_name):
+    """
+    从进程级缓存中获取数据表，csvTime 列已解析为 datetime 类型。
+    Args:
+        table_name (str): 数据表名或 CSV 文件路径。
+    Returns:
+        pd.DataFrame: 数据表的只读视图。
+    Raises:
+        FileNotFoundError: 如果数据表文件不存在。
+    """
+    return table_cache.get(table_name)
+
+
+def table_columns(table_name):
+    """
+    获取数据表的列名，不加载数据。
+    依次使用缓存中的数据表、二进制列存的 meta.json 和 CSV 表头。
+    Args:
+        table_name (str): 数据表名或 CSV 文件路径。
+    Returns:
+        list: 列名列表。
+    Raises:
+        FileNotFoundError: 如果数据表文件不存在。
+    """
+    df = table_cache.peek(table_name)
+    if df is not None:
+        return df.columns.tolist()
+    path = resolve_table_path(table_name)
+    stat = os.stat(path)
+    try:
+        with open(os.path.join(binary_table_dir(path), "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("source_mtime_ns") == stat.st_mtime_ns and meta.get("source_size") == stat.st_size:
+            return [column["name"] for column in meta["columns"]]
+    except FileNotFoundError:
+        pass
+    return pd.read_csv(path, nrows=0).columns.tolist()
+
+
+def load_columns(table_name, columns):
+    """
+    只加载数据表的 csvTime 列和指定列（投影下推）。
+    数据表已在缓存中时直接取其中的列；需要全部列时加载整表并放入缓存；
+    否则只从二进制列存（或 CSV）读取这几列，不放入缓存。
+    Args:
+        table_name (str): 数据表名或 CSV 文件路径。
+        columns (list): 列名列表，需为数据表中存在的列。
+    Returns:
+        pd.DataFrame: 包含 csvTime 列和指定列的数据表，列的顺序与原表一致。
+    Raises:
+        FileNotFoundError: 如果数据表文件不存在。
+    """
+    wanted = ["csvTime"] + [column for column in columns if column != "csvTime"]
+    df = table_cache.peek(table_name)
+    if df is None:
+        all_columns = table_columns(table_name)
+        if set(all_columns) <= set(wanted):
+            df = load_table(table_name)
+        else:
+            return read_table(resolve_table_path(table_name), columns=wanted)
+    return df[[column for column in df.columns if column in wanted]]
+
+
+def time_bounds(times, start_time=None, end_time=None, include_end=False):
+    """
+    在升序排列的时间数组中二分查找时间窗口对应的行号范围 [lo, hi)。
+    Args:
+        times (np.ndarray): 升序排列的 datetime64 数组。
+        start_time: 开始时间（包含），为 None 时从第一行开始。
+        end_time: 结束时间，为 None 时到最后一行为止。
+        include_end (bool): 是否包含结束时间。
+    Returns:
+        tuple: (lo, hi)。
+    """
+    lo = 0
+    hi = len(times)
+    if start_time is not None:
+        start = pd.Timestamp(start_time).to_datetime64().astype(times.dtype)
+        lo = int(np.searchsorted(times, start, "left"))
+    if end_time is not None:
+        end = pd.Timestamp(end_time).to_datetime64().astype(times.dtype)
+        hi = int(np.searchsorted(times, end, "right" if include_end else "left"))
+    return lo, max(lo, hi)
+
+
+def time_bounds_many(times, start_times, end_times, include_end=False):
+    """
+    time_bounds 的批量版本，一次二分查找多个时间窗口。
+    Args:
+        times (np.ndarray): 升序排列的 datetime64 数组。
+        start_times (list): 各窗口的开始时间（包含），元素为 None 时从第一行开始。
+        end_times (list): 各窗口的结束时间，元素为 None 时到最后一行为止。
+        include_end (bool): 是否包含结束时间。
+    Returns:
+        tuple: (lo, hi)，两个 int64 数组。
+    """
+
+    def to_datetime64(values):
+        return np.array(
+            [np.datetime64("NaT") if t is None else pd.Timestamp(t).to_datetime64() for t in values]
+        ).astype(times.dtype)
+
+    starts = to_datetime64(start_times)
+    ends = to_datetime64(end_times)
+    lo = np.searchsorted(times, starts, "left").astype(np.int64)
+    hi = np.searchsorted(times, ends, "right" if include_end else "left").astype(np.int64)
+    lo[np.isnat(starts)] = 0
+    hi[np.isnat(ends)] = len(times)
+    return lo, np.maximum(lo, hi)
+
+
+def time_slice(df, start_time=None, end_time=None, include_end=False):
+    """
+    按时间窗口截取数据表，代替逐行比较的布尔筛选。
+    依赖 csvTime 升序排列，通过二分查找定位后返回连续的行切片，不分配新的数据。
+    Args:
+        df (pd.DataFrame): 包含 csvTime 列的数据表。
+        start_time: 开始时间（包含），为 None 时不限制。
+        end_time: 结束时间，为 None 时不限制。
+        include_end (bool): 是否包含结束时间，即 <= end_time 还是 < end_time。
+    Returns:
+        pd.DataFrame: 时间窗口内的数据表切片。
+    """
+    times = df["csvTime"].to_numpy()
+    lo, hi = time_bounds(times, start_time, end_time, include_end)
+    return df.iloc[lo:hi]
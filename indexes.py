@@ -0,0 +1,770 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from data_store import (
+    BIN_DATA_PATH,
+    STATUS_COLUMNS,
+    USE_DATA_PATH,
+    binary_table_dir,
+    read_table,
+    resolve_table_path,
+    table_cache,
+    time_bounds,
+    time_bounds_many,
+)
+from signals import find_runs
+
+
+# 小数值按 10 的幂放大为整数后累加时，最多尝试的小数位数
+MAX_EXACT_DECIMALS = 6
+
+
+def _decimal_integers(values, max_decimals=MAX_EXACT_DECIMALS):
+    """
+    将至多 max_decimals 位小数的浮点数组放大为整数，缺失值按 0 处理。
+    Returns:
+        tuple: (int64 数组, 放大倍数)，存在更多小数位或数值过大时返回 None。
+    """
+    if np.issubdtype(values.dtype, np.integer):
+        return values.astype(np.int64), 1
+    if not np.issubdtype(values.dtype, np.floating):
+        return None
+    values = np.where(np.isnan(values), 0.0, values)
+    if not np.isfinite(values).all():
+        return None
+    for decimals in range(max_decimals + 1):
+        scale = 10**decimals
+        scaled = values * scale
+        integers = np.round(scaled)
+        # CSV 中的十进制小数放大后与整数只差浮点表示误差
+        if np.all(np.abs(scaled - integers) <= 1e-9 * np.maximum(np.abs(scaled), 1)):
+            if np.abs(integers).max(initial=0) >= 2**53:
+                return None
+            return integers.astype(np.int64), scale
+    return None
+
+
+class IntegralIndex:
+    """
+    功率（或燃油消耗率）列的前缀积分索引，可同时包含同一数据表的多列。
+    默认与 api.py 中逐段计算的方式一致，采用左黎曼和：每个采样点的值乘以到下一个采样点的时间差，
+    窗口内最后一个采样点不计入。若指定 sample_seconds，则每个采样点固定代表该时长。
+    任意时间窗口的积分只需两次查表和一次减法。
+    时间戳为整秒、数值至多 6 位小数时，数值放大为整数后用 int64 累加，窗口积分是精确和只做一次除法，
+    不随窗口位置积累浮点误差；否则用浮点累加。
+    """
+
+    def __init__(self, times, values, sample_seconds=None):
+        self.times = times
+        self.sample_seconds = sample_seconds
+        values = np.asarray(values)
+        if values.ndim == 1:
+            values = values[:, None]
+
+        if sample_seconds is not None:
+            seconds = np.full(len(values), sample_seconds)
+            whole_seconds = float(sample_seconds).is_integer()
+        else:
+            diff_ns = np.diff(times).astype("timedelta64[ns]").astype(np.int64)
+            whole_seconds = not np.any(diff_ns % 1_000_000_000)
+            seconds = diff_ns // 1_000_000_000 if whole_seconds else diff_ns / 1e9
+            values = values[:-1]
+
+        scaled = _decimal_integers(values) if whole_seconds else None
+        if scaled is not None:
+            integers, scale = scaled
+            seconds = np.asarray(seconds).astype(np.int64)
+            # 累加过程中的部分和需能精确转换为浮点数（也就不会超出 int64 范围）
+            if np.abs(seconds[:, None] * integers.astype(float)).sum(axis=0).max(initial=0) >= 2**52:
+                scaled = None
+        if scaled is not None:
+            steps = seconds[:, None] * integers
+            zero = np.zeros((1, values.shape[1]), dtype=np.int64)
+            self.divisor = 3600 * scale
+        else:
+            # 与 pandas 的 sum 一致，缺失值按 0 处理
+            steps = np.nan_to_num(np.asarray(seconds, float)[:, None] * values, nan=0.0)
+            zero = np.zeros((1, values.shape[1]))
+            self.divisor = 3600
+        self.cumulative = np.concatenate((zero, np.cumsum(steps, axis=0)))
+
+    @property
+    def nbytes(self):
+        return self.cumulative.nbytes
+
+    def integral(self, lo, hi):
+        """
+        计算行号范围 [lo, hi) 内各列的积分（单位：值的单位 × 小时）。
+        Returns:
+            np.ndarray: 各列的积分值，窗口为空时返回 None。
+        """
+        if hi <= lo:
+            return None
+        if self.sample_seconds is None:
+            hi = hi - 1
+        return (self.cumulative[hi] - self.cumulative[lo]) / self.divisor
+
+    def window_integral(self, start_time, end_time, include_end=False):
+        """
+        计算时间窗口内的积分，窗口为空时返回 None。
+        """
+        lo, hi = time_bounds(self.times, start_time, end_time, include_end)
+        return self.integral(lo, hi)
+
+    def integrals(self, lo, hi):
+        """
+        integral 的批量版本，一次计算多个行号范围 [lo, hi) 内各列的积分。
+        Returns:
+            np.ndarray: 形状为 (窗口数, 列数) 的积分值，窗口为空的行为 NaN。
+        """
+        lo = np.asarray(lo, dtype=np.int64)
+        hi = np.asarray(hi, dtype=np.int64)
+        empty = hi <= lo
+        top = hi if self.sample_seconds is not None else hi - 1
+        # 空窗口可能越过数组末尾，先指向第一行，结果再置为 NaN
+        lo = np.where(empty, 0, lo)
+        top = np.where(empty, 0, top)
+        values = (self.cumulative[top] - self.cumulative[lo]) / self.divisor
+        values[empty] = np.nan
+        return values
+
+    def window_integrals(self, start_times, end_times, include_end=False):
+        """
+        一次计算多个时间窗口内的积分，窗口为空的行为 NaN。
+        """
+        lo, hi = time_bounds_many(self.times, start_times, end_times, include_end)
+        return self.integrals(lo, hi)
+
+
+def _build_integral_index(columns, sample_seconds):
+    def build(df):
+        return IntegralIndex(
+            df["csvTime"].to_numpy(),
+            df[list(columns)].to_numpy(),
+            sample_seconds=sample_seconds,
+        )
+
+    return build
+
+
+def integral_index(table_name, columns, sample_seconds=None):
+    """
+    获取数据表中指定列的前缀积分索引，首次请求时构建并随数据表一同缓存。
+    Args:
+        table_name (str): 数据表名或 CSV 文件路径。
+        columns (tuple): 功率或燃油消耗率列名。
+        sample_seconds (float): 每个采样点固定代表的时长（秒），为 None 时按相邻采样点的时间差积分。
+    Returns:
+        IntegralIndex: 前缀积分索引。
+    """
+    columns = tuple(columns)
+    return table_cache.derive(
+        table_name,
+        ("integral", columns, sample_seconds),
+        _build_integral_index(columns, sample_seconds),
+    )
+
+
+class RangeAggregateIndex:
+    """
+    数值列的区间聚合索引。
+    最小值、最大值使用稀疏表（sparse table）：第 k 层保存每个位置起长度为 2^k 的区间内最值的行号，
+    任意区间由两个重叠的 2^k 区间合并得到，查询为常数时间，并保留最值第一次出现的位置。
+    求和与计数使用前缀和。缺失值不参与统计，与 pandas 的 skipna 行为一致。
+    """
+
+    def __init__(self, times, values):
+        self.times = times
+        self.values = values
+        n = len(values)
+        missing = pd.isna(values)
+
+        self.count = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(~missing, out=self.count[1:])
+        if np.issubdtype(values.dtype, np.integer):
+            # 整数列用整数累加，区间和精确
+            self.total = np.zeros(n + 1, dtype=np.int64)
+            np.cumsum(values, out=self.total[1:])
+        else:
+            self.total = np.zeros(n + 1, dtype=np.float64)
+            np.cumsum(np.where(missing, 0, values), out=self.total[1:])
+
+        float_values = values.astype(np.float64)
+        self._min_table = self._build(np.where(missing, np.inf, float_values), np.less_equal)
+        self._max_table = self._build(np.where(missing, -np.inf, float_values), np.greater_equal)
+
+    @staticmethod
+    def _build(keys, prefer_left):
+        """
+        构建稀疏表。prefer_left(a, b) 为真时保留左侧区间的行号，相等时取左侧即保留第一次出现的位置。
+        """
+        n = len(keys)
+        levels = max(int(n).bit_length(), 1)
+        table = np.zeros((levels, n), dtype=np.int32)
+        table[0] = np.arange(n, dtype=np.int32)
+        for k in range(1, levels):
+            half = 1 << (k - 1)
+            width = n - (1 << k) + 1
+            left = table[k - 1, :width]
+            right = table[k - 1, half : half + width]
+            table[k, :width] = np.where(prefer_left(keys[left], keys[right]), left, right)
+        return keys, table
+
+    @property
+    def nbytes(self):
+        return (
+            self.count.nbytes
+            + self.total.nbytes
+            + sum(keys.nbytes + table.nbytes for keys, table in (self._min_table, self._max_table))
+        )
+
+    @staticmethod
+    def _query(sparse, prefer_left, lo, hi):
+        keys, table = sparse
+        length = np.maximum(hi - lo, 1)
+        # 不超过区间长度的最大 2 的整数次幂对应的层数
+        level = np.frexp(length.astype(np.float64))[1].astype(np.int64) - 1
+        lo = np.minimum(lo, len(keys) - 1)
+        left = table[level, lo]
+        right = table[level, np.maximum(hi - (1 << level), lo)]
+        return np.where(prefer_left(keys[left], keys[right]), left, right)
+
+    def aggregate(self, lo, hi):
+        """
+        批量计算多个行号范围 [lo, hi) 的聚合值。
+        Returns:
+            dict: count、sum、mean 以及 min_row、max_row（最值第一次出现的行号）数组；
+                没有有效值的区间 count 为 0，mean 为 NaN，min_row、max_row 为 -1。
+        """
+        lo = np.asarray(lo, dtype=np.int64)
+        hi = np.asarray(hi, dtype=np.int64)
+        count = self.count[hi] - self.count[lo]
+        total = self.total[hi] - self.total[lo]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(count > 0, total / np.maximum(count, 1), np.nan)
+        if len(self.values):
+            min_row = self._query(self._min_table, np.less_equal, lo, hi)
+            max_row = self._query(self._max_table, np.greater_equal, lo, hi)
+        else:
+            min_row = max_row = np.zeros(len(lo), dtype=np.int64)
+        min_row = np.where(count > 0, min_row, -1)
+        max_row = np.where(count > 0, max_row, -1)
+        return {
+            "count": count,
+            "sum": total,
+            "mean": mean,
+            "min_row": min_row,
+            "max_row": max_row,
+        }
+
+    def window_aggregate(self, start_times, end_times, include_end=False):
+        """
+        批量计算多个时间窗口的聚合值，返回值同 aggregate。
+        """
+        lo, hi = time_bounds_many(self.times, start_times, end_times, include_end)
+        return self.aggregate(lo, hi)
+
+
+def range_aggregate_index(table_name, column):
+    """
+    获取数据表数值列的区间聚合索引，首次请求时构建并随数据表一同缓存。
+    Args:
+        table_name (str): 数据表名或 CSV 文件路径。
+        column (str): 数值列名。
+    Returns:
+        RangeAggregateIndex: 区间聚合索引。
+    """
+    return table_cache.derive(
+        table_name,
+        ("aggregate", column),
+        lambda df: RangeAggregateIndex(df["csvTime"].to_numpy(), np.asarray(df[column].to_numpy())),
+    )
+
+
+# 状态列中表示“无事件”的取值
+NO_EVENT = "False"
+EVENT_FILE_NAME = "events.npz"
+
+
+class EventIndex:
+    """
+    状态列的稀疏事件索引。
+    状态列中绝大多数记录为 'False'，只有几百条记录是开机、关机等事件。
+    事件索引只保存这些记录的时间、事件编码和所在行号，按时间升序排列，
+    查询时通过二分查找定位，不需要扫描整张数据表。
+    """
+
+    def __init__(self, times, codes, rows, labels):
+        self.times = times
+        self.codes = codes
+        self.rows = rows
+        self.labels = labels
+
+    @classmethod
+    def from_series(cls, times, values):
+        """
+        从数据表的 csvTime 列和状态列构建事件索引。
+        Args:
+            times (pd.Series): 升序排列的 csvTime 列。
+            values (pd.Series): 状态列。
+        Returns:
+            EventIndex: 事件索引。
+        """
+        values = values.astype(object).to_numpy()
+        mask = pd.notna(values) & (values != NO_EVENT)
+        labels, codes = np.unique(values[mask].astype(str), return_inverse=True)
+        return cls(
+            times.to_numpy(dtype="datetime64[ns]")[mask],
+            codes.astype(np.int16),
+            np.flatnonzero(mask).astype(np.int64),
+            labels.astype(object),
+        )
+
+    def __len__(self):
+        return len(self.times)
+
+    @property
+    def nbytes(self):
+        return self.times.nbytes + self.codes.nbytes + self.rows.nbytes
+
+    def select(self, start_time=None, end_time=None, include_end=False, labels=None):
+        """
+        查询时间窗口内的事件。
+        Args:
+            start_time: 开始时间（包含），为 None 时不限制。
+            end_time: 结束时间，为 None 时不限制。
+            include_end (bool): 是否包含结束时间。
+            labels (list): 只返回这些事件，为 None 时返回全部事件。
+        Returns:
+            tuple: (时间数组, 事件名称数组, 行号数组)，按时间升序排列。
+        """
+        lo, hi = time_bounds(self.times, start_time, end_time, include_end)
+        codes = self.codes[lo:hi]
+        keep = slice(None)
+        if labels is not None:
+            wanted = np.flatnonzero(np.isin(self.labels, list(labels)))
+            keep = np.isin(codes, wanted)
+        return (
+            self.times[lo:hi][keep],
+            self.labels[codes[keep]],
+            self.rows[lo:hi][keep],
+        )
+
+    def intervals(self, start_label, end_label, start_time=None, end_time=None, include_end=False):
+        """
+        将时间窗口内的开始事件与结束事件配对为区间，配对规则见 pair_intervals。
+        Args:
+            start_label (str): 开始事件，例如 '开机'。
+            end_label (str): 结束事件，例如 '关机'。
+            其余参数同 select。
+        Returns:
+            tuple: (区间开始时间数组, 区间结束时间数组)。
+        """
+        times, labels, _ = self.select(start_time, end_time, include_end, labels=(start_label, end_label))
+        return pair_intervals(times, labels == start_label)
+
+
+def pair_intervals(times, is_start):
+    """
+    将按时间排列的开始、结束事件配对为区间。
+    与逐条遍历的规则一致：结束事件只与紧邻其前的开始事件配对，连续多个开始事件以最后一个为准，
+    没有对应开始事件的结束事件和末尾未结束的开始事件均被忽略。
+    Args:
+        times (np.ndarray): 事件时间，升序排列。
+        is_start (np.ndarray): 布尔数组，True 表示开始事件，False 表示结束事件。
+    Returns:
+        tuple: (区间开始时间数组, 区间结束时间数组)。
+    """
+    is_start = np.asarray(is_start, dtype=bool)
+    paired = is_start[:-1] & ~is_start[1:]
+    return times[:-1][paired], times[1:][paired]
+
+
+def build_event_indexes(df):
+    """
+    为数据表中的全部状态列构建事件索引。
+    Returns:
+        dict: 状态列名 -> EventIndex。
+    """
+    return {
+        column: EventIndex.from_series(df["csvTime"], df[column]) for column in STATUS_COLUMNS if column in df.columns
+    }
+
+
+def write_event_indexes(indexes, path, source_path=None):
+    """
+    将事件索引保存为 .npz 文件。
+    Args:
+        indexes (dict): 状态列名 -> EventIndex。
+        path (str): 保存路径。
+        source_path (str): 源 CSV 文件路径，用于判断事件索引是否过期。
+    Returns:
+        None
+    """
+    arrays = {"columns": np.array(list(indexes), dtype=str)}
+    if source_path is not None:
+        stat = os.stat(source_path)
+        arrays["source"] = np.array([stat.st_mtime_ns, stat.st_size], dtype=np.int64)
+    for column, index in indexes.items():
+        arrays[f"{column}.times"] = index.times.view(np.int64)
+        arrays[f"{column}.codes"] = index.codes
+        arrays[f"{column}.rows"] = index.rows
+        arrays[f"{column}.labels"] = index.labels.astype(str)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def read_event_indexes(path, source_path=None):
+    """
+    读取事件索引。
+    Args:
+        path (str): 事件索引文件路径。
+        source_path (str): 源 CSV 文件路径，若事件索引生成后 CSV 被修改则视为过期。
+    Returns:
+        dict: 状态列名 -> EventIndex；文件不存在或已过期时返回 None。
+    """
+    try:
+        data = np.load(path)
+    except FileNotFoundError:
+        return None
+
+    with data:
+        if source_path is not None:
+            stat = os.stat(source_path)
+            if "source" not in data or list(data["source"]) != [
+                stat.st_mtime_ns,
+                stat.st_size,
+            ]:
+                return None
+        return {
+            str(column): EventIndex(
+                data[f"{column}.times"].view("datetime64[ns]"),
+                data[f"{column}.codes"],
+                data[f"{column}.rows"],
+                data[f"{column}.labels"].astype(object),
+            )
+            for column in data["columns"]
+        }
+
+
+def export_event_indexes(data_path=USE_DATA_PATH, bin_path=BIN_DATA_PATH):
+    """
+    为文件夹中含有状态列的全部 CSV 数据表生成事件索引，保存在对应的二进制列存目录中。
+    Args:
+        data_path (str): CSV 数据表所在的文件夹路径。
+        bin_path (str): 二进制列存所在的文件夹路径。
+    Returns:
+        None
+    """
+    for file_name in sorted(os.listdir(data_path)):
+        if not file_name.endswith(".csv"):
+            continue
+        path = os.path.join(data_path, file_name)
+        indexes = build_event_indexes(read_table(path, bin_path))
+        if not indexes:
+            continue
+        print(f"生成事件索引：{file_name}")
+        table_dir = binary_table_dir(path, bin_path)
+        os.makedirs(table_dir, exist_ok=True)
+        write_event_indexes(indexes, os.path.join(table_dir, EVENT_FILE_NAME), source_path=path)
+
+
+_event_indexes = {}  # 文件路径 -> (修改时间, {状态列名: EventIndex})
+_event_lock = threading.Lock()
+
+
+def event_index(table_name, column="status"):
+    """
+    获取数据表状态列的事件索引。
+    优先读取预处理生成的事件索引文件，不需要加载数据表；文件不存在或已过期时由数据表构建。
+    Args:
+        table_name (str): 数据表名或 CSV 文件路径。
+        column (str): 状态列名。
+    Returns:
+        EventIndex: 事件索引。
+    Raises:
+        FileNotFoundError: 如果数据表文件不存在。
+        KeyError: 如果数据表中不存在该状态列。
+    """
+    path = resolve_table_path(table_name)
+    mtime = os.stat(path).st_mtime_ns
+    with _event_lock:
+        cached = _event_indexes.get(path)
+    if cached is None or cached[0] != mtime:
+        indexes = read_event_indexes(os.path.join(binary_table_dir(path), EVENT_FILE_NAME), source_path=path)
+        if indexes is None:
+            indexes = table_cache.derive(path, ("events",), build_event_indexes)
+        cached = (mtime, indexes)
+        with _event_lock:
+            _event_indexes[path] = cached
+    return cached[1][column]
+
+
+MINUTE = np.timedelta64(1, "m")
+# 每个字节值中 1 的个数，用于 popcount（np.bitwise_count 需要 numpy>=2）
+BYTE_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+
+
+class CoverageBitmap:
+    """
+    数据表的分钟覆盖位图。
+    从数据表第一条记录所在的分钟到最后一条记录所在的分钟，每分钟一位，该分钟内有记录则置 1。
+    任意时间窗口的有记录分钟数为位图切片的 popcount，缺失分钟数由窗口分钟数减去它得到。
+    """
+
+    def __init__(self, origin, bits, length):
+        self.origin = origin
+        self.bits = bits
+        self.length = length
+
+    @classmethod
+    def from_times(cls, times):
+        """
+        由 csvTime 列构建分钟覆盖位图。
+        """
+        minutes = np.asarray(times, dtype="datetime64[m]")
+        if len(minutes) == 0:
+            return cls(np.datetime64("1970-01-01T00:00", "m"), np.zeros(0, np.uint8), 0)
+        origin = minutes.min()
+        offsets = (minutes - origin).astype(np.int64)
+        covered = np.zeros(offsets.max() + 1, dtype=bool)
+        covered[offsets] = True
+        return cls(origin, np.packbits(covered), len(covered))
+
+    @property
+    def nbytes(self):
+        return self.bits.nbytes
+
+    def _offset(self, minute):
+        return int((minute - self.origin) // MINUTE)
+
+    def _covered_mask(self, lo, hi):
+        """
+        返回分钟偏移 [lo, hi) 的覆盖情况布尔数组，位图范围以外的分钟视为无记录。
+        """
+        mask = np.zeros(max(hi - lo, 0), dtype=bool)
+        a, b = max(lo, 0), min(hi, self.length)
+        if a < b:
+            byte_lo, byte_hi = a // 8, (b + 7) // 8
+            unpacked = np.unpackbits(self.bits[byte_lo:byte_hi]).astype(bool)
+            mask[a - lo : b - lo] = unpacked[a - byte_lo * 8 : b - byte_lo * 8]
+        return mask
+
+    def covered_count(self, lo, hi):
+        """
+        统计分钟偏移 [lo, hi) 内有记录的分钟数：整字节部分直接 popcount，两端不足一字节的部分逐位统计。
+        """
+        a, b = max(lo, 0), min(hi, self.length)
+        if a >= b:
+            return 0
+        first_full, last_full = (a + 7) // 8, b // 8
+        if first_full >= last_full:
+            return int(self._covered_mask(a, b).sum())
+        count = int(BYTE_POPCOUNT[self.bits[first_full:last_full]].sum())
+        count += int(self._covered_mask(a, first_full * 8).sum())
+        count += int(self._covered_mask(last_full * 8, b).sum())
+        return count
+
+    def window(self, start_time, end_time):
+        """
+        将时间窗口转换为分钟偏移范围。
+        与 pd.date_range(start_time, end_time, freq='min') 按分钟取整后的结果一致：
+        从开始时间所在的分钟起，共 (结束时间 - 开始时间) 的整分钟数 + 1 个分钟。
+        Returns:
+            tuple: (lo, hi)，hi 不包含。
+        """
+        start = pd.Timestamp(start_time).to_datetime64()
+        end = pd.Timestamp(end_time).to_datetime64()
+        if end < start:
+            return 0, 0
+        lo = self._offset(start.astype("datetime64[m]"))
+        count = int((end - start) // MINUTE) + 1
+        return lo, lo + count
+
+    def missing_count(self, start_time, end_time):
+        """
+        统计时间窗口内没有任何记录的分钟数。
+        """
+        lo, hi = self.window(start_time, end_time)
+        return (hi - lo) - self.covered_count(lo, hi)
+
+    def missing_by_day(self, start_time, end_time):
+        """
+        按天统计时间窗口内没有任何记录的分钟数。
+        Returns:
+            dict: 日期字符串 'YYYY-MM-DD' -> 缺失分钟数。
+        """
+        lo, hi = self.window(start_time, end_time)
+        result = {}
+        day_start = lo
+        while day_start < hi:
+            day = (self.origin + day_start * MINUTE).astype("datetime64[D]")
+            day_end = min(self._offset((day + 1).astype("datetime64[m]")), hi)
+            missing = (day_end - day_start) - self.covered_count(day_start, day_end)
+            result[str(day)] = missing
+            day_start = day_end
+        return result
+
+    def gaps(self, start_time, end_time, limit=None):
+        """
+        找出时间窗口内连续缺失的分钟段。
+        Args:
+            limit (int): 最多返回的缺失段数（按时间顺序），为 None 时全部返回。
+        Returns:
+            tuple: (缺失段总数, (缺失开始分钟, 缺失结束分钟, 缺失分钟数) 列表)，开始和结束分钟均包含。
+        """
+        lo, hi = self.window(start_time, end_time)
+        starts, ends = find_runs(~self._covered_mask(lo, hi))
+        return len(starts), [
+            (self.origin + (lo + s) * MINUTE, self.origin + (lo + e - 1) * MINUTE, e - s)
+            for s, e in zip(starts[:limit].tolist(), ends[:limit].tolist())
+        ]
+
+
+def coverage_bitmap(table_name):
+    """
+    获取数据表的分钟覆盖位图，首次请求时构建并随数据表一同缓存。
+    Args:
+        table_name (str): 数据表名或 CSV 文件路径。
+    Returns:
+        CoverageBitmap: 分钟覆盖位图。
+    """
+    return table_cache.derive(
+        table_name,
+        ("coverage",),
+        lambda df: CoverageBitmap.from_times(df["csvTime"].to_numpy()),
+    )
+
+
+def _grams(text):
+    """
+    文本的检索单元：全部单字和相邻两字（字符二元组），英文统一转为小写。
+    """
+    text = text.lower()
+    return set(text) | {text[i : i + 2] for i in range(len(text) - 1)}
+
+
+def _contains_in_order(text, keywords):
+    """
+    判断各关键字是否按顺序出现在文本中，等价于以 '.*' 连接关键字的正则匹配。
+    """
+    position = 0
+    for keyword in keywords:
+        found = text.find(keyword, position)
+        if found < 0:
+            return False
+        position = found + len(keyword)
+    return True
+
+
+class BigramIndex:
+    """
+    文本列的字符二元组倒排索引，可同时包含同一数据表的多列。
+    每个单字和二元组对应包含它的行号列表（posting list），多关键字查询先对各关键字的
+    posting list 求交集得到候选行，再在候选行上核对关键字的出现顺序，不需要逐行正则匹配。
+    没有完全匹配的行时，按查询二元组的命中比例对各行打分，返回最相近的若干行。
+    """
+
+    def __init__(self, fields):
+        self.fields = {
+            name: [str(text).lower() if pd.notna(text) else "" for text in texts] for name, texts in fields.items()
+        }
+        self.rows = len(next(iter(self.fields.values()), []))
+        postings = {}
+        for texts in self.fields.values():
+            for row, text in enumerate(texts):
+                for gram in _grams(text):
+                    postings.setdefault(gram, set()).add(row)
+        self.postings = {gram: np.array(sorted(rows), dtype=np.int64) for gram, rows in postings.items()}
+
+    @property
+    def nbytes(self):
+        return sum(rows.nbytes for rows in self.postings.values())
+
+    def _posting(self, gram):
+        return self.postings.get(gram, np.array([], dtype=np.int64))
+
+    def candidates(self, keywords):
+        """
+        包含全部关键字所有单字和二元组的行号（升序），关键字为空时返回全部行。
+        """
+        rows = np.arange(self.rows)
+        for gram in set().union(*(_grams(keyword) for keyword in keywords)):
+            rows = np.intersect1d(rows, self._posting(gram), assume_unique=True)
+            if len(rows) == 0:
+                break
+        return rows
+
+    def search(self, keywords, field):
+        """
+        查找指定列中按顺序包含全部关键字的行。
+        Args:
+            keywords (list): 关键字列表。
+            field (str): 列名。
+        Returns:
+            np.ndarray: 行号数组，按原表顺序排列。
+        """
+        keywords = [keyword.lower() for keyword in keywords]
+        texts = self.fields[field]
+        return np.array(
+            [row for row in self.candidates(keywords) if _contains_in_order(texts[row], keywords)],
+            dtype=np.int64,
+        )
+
+    def rank(self, keywords, limit=5, min_score=0.5):
+        """
+        模糊查找：按查询中单字和二元组在各行出现的比例打分，分数相同时文本较短的行优先。
+        每个关键字都至少命中一个二元组（单字关键字命中该字）的行才参与排序。
+        Args:
+            keywords (list): 关键字列表。
+            limit (int): 最多返回的行数。
+            min_score (float): 最低分数，取值 0~1。
+        Returns:
+            tuple: (行号数组, 分数数组)，按分数从高到低排列。
+        """
+        grams = set().union(*(_grams(keyword) for keyword in keywords))
+        # 二元组比单字更能区分文本，计 2 分
+        weights = {gram: len(gram) for gram in grams}
+        total = sum(weights.values())
+        if total == 0:
+            return np.array([], dtype=np.int64), np.array([])
+        scores = np.zeros(self.rows)
+        for gram, weight in weights.items():
+            scores[self._posting(gram)] += weight
+        scores /= total
+        # 只有单字相同的关键字（例如 "主推" 与 "艏推"）不算命中，任一关键字未命中的行不参与排序
+        for keyword in keywords:
+            keyword = keyword.lower()
+            keyword_grams = {keyword[i : i + 2] for i in range(len(keyword) - 1)} or set(keyword)
+            hits = np.zeros(self.rows, dtype=bool)
+            for gram in keyword_grams:
+                hits[self._posting(gram)] = True
+            scores[~hits] = 0.0
+        lengths = np.array(
+            [min(len(texts[row]) or np.inf for texts in self.fields.values()) for row in range(self.rows)]
+        )
+        order = np.lexsort((np.arange(self.rows), lengths, -scores))
+        order = order[scores[order] >= min_score][:limit]
+        return order, scores[order]
+
+
+def bigram_index(table_name, columns):
+    """
+    获取数据表文本列的字符二元组倒排索引，首次请求时构建并随数据表一同缓存。
+    Args:
+        table_name (str): 数据表名或 CSV 文件路径。
+        columns (tuple): 文本列名。
+    Returns:
+        BigramIndex: 倒排索引。
+    """
+    columns = tuple(columns)
+    return table_cache.derive(
+        table_name,
+        ("bigram", columns),
+        lambda df: BigramIndex({column: df[column].tolist() for column in columns}),
+    )
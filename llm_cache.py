@@ -0,0 +1,251 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from openai.types.chat import ChatCompletion
+from zhipuai.types.chat.chat_completion import Completion
+
+
+# 缓存模式：
+#   off: 不使用缓存。
+#   read_through: 先查缓存，未命中时请求大模型并写入缓存。
+#   record: 总是请求大模型，并写入（覆盖）缓存。
+#   replay: 只读缓存，未命中时报错，不请求大模型。
+CACHE_MODES = ("off", "read_through", "record", "replay")
+DEFAULT_CACHE_PATH = "llm_cache.sqlite3"
+
+
+class LLMCacheMiss(KeyError):
+    """
+    replay 模式下缓存中没有对应的请求。
+    """
+
+
+def _drop_none(value):
+    # 同步客户端的 model_dump() 保留值为 None 的字段，异步客户端的消息去掉了这些字段，
+    # 计算指纹前统一去掉，使两种客户端的相同对话得到相同的指纹
+    if isinstance(value, dict):
+        return {k: _drop_none(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_drop_none(v) for v in value]
+    if hasattr(value, "model_dump"):
+        return _drop_none(value.model_dump())
+    return value
+
+
+def request_fingerprint(model, messages, tools=None):
+    """
+    大模型请求的指纹，即 (model, messages, tools) 规范化为 JSON 后的 sha256。
+    Args:
+        model (str): 模型名称。
+        messages (list): 对话消息。
+        tools (list): 工具函数说明，没有时为 None。
+    Returns:
+        str: 十六进制的指纹。
+    """
+    payload = json.dumps(
+        {"model": model, "messages": _drop_none(messages), "tools": tools or []},
+        ensure_ascii=False,
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# OpenAI 接口允许的 finish_reason，智谱特有的取值在回放给异步客户端时需要转换
+FINISH_REASONS = ("stop", "length", "tool_calls", "content_filter", "function_call")
+
+
+def normalize_completion(data, model=None):
+    """
+    将缓存的回复整理为 OpenAI chat.completion 的格式。
+    同步客户端录制的是智谱 Completion，没有 object 字段，异步客户端（OpenAI SDK）
+    校验时要求该字段；异步客户端录制的回复 usage 可能为空，而智谱 Completion 要求 usage。
+    两种客户端的相同请求共用缓存，因此回放前统一补全。
+    Args:
+        data (dict): 回复的 JSON。
+        model (str): 请求的模型名称，回复中没有 model 时使用。
+    Returns:
+        dict: 整理后的回复（副本）。
+    """
+    data = dict(data)
+    data["object"] = "chat.completion"
+    data["id"] = data.get("id") or ""
+    data["created"] = data.get("created") or 0
+    data["model"] = data.get("model") or model or ""
+    if not data.get("usage"):
+        data["usage"] = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+    choices = []
+    for index, choice in enumerate(data.get("choices") or []):
+        choice = dict(choice)
+        choice.setdefault("index", index)
+        reason = choice.get("finish_reason")
+        if reason == "sensitive":
+            choice["finish_reason"] = "content_filter"
+        elif reason not in FINISH_REASONS:
+            choice["finish_reason"] = "stop"
+        choices.append(choice)
+    data["choices"] = choices
+    return data
+
+
+class LLMCache:
+    """
+    保存在 SQLite 文件中的大模型回复缓存，以请求指纹为键，值为回复的 JSON。
+    同一个连接由各线程共用，读写时加锁。
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, mode="read_through"):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"未知的缓存模式: {mode}，可选 {', '.join(CACHE_MODES)}")
+        self.path = path
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        if mode != "off":
+            self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, model TEXT, response TEXT, created REAL)"
+            )
+            self._conn.commit()
+
+    @property
+    def enabled(self):
+        return self.mode != "off"
+
+    def get(self, key):
+        """
+        读取缓存的回复，未命中时返回 None；replay 模式下未命中时抛出 LLMCacheMiss。
+        Returns:
+            dict: 回复的 JSON。
+        """
+        if self.mode in ("off", "record"):
+            return None
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if row is None:
+            if self.mode == "replay":
+                raise LLMCacheMiss(f"缓存中没有该请求: {key}")
+            return None
+        return json.loads(row[0])
+
+    def put(self, key, model, response):
+        """
+        写入回复，相同指纹的旧回复被覆盖。
+        """
+        if self.mode in ("off", "replay"):
+            return
+        data = json.dumps(response.model_dump(), ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (key, model, data, time.time()),
+            )
+            self._conn.commit()
+
+    def stats(self):
+        """
+        缓存命中情况。
+        """
+        return {"mode": self.mode, "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _create_cache(mode=None, path=None):
+    mode = mode or os.environ.get("LLM_CACHE_MODE") or "off"
+    path = path or os.environ.get("LLM_CACHE_PATH") or DEFAULT_CACHE_PATH
+    return LLMCache(path, mode)
+
+
+def configure_llm_cache(mode=None, path=None):
+    """
+    设置进程内共享的缓存，参数为 None 时取自环境变量 LLM_CACHE_MODE（默认 off）
+    与 LLM_CACHE_PATH（默认 llm_cache.sqlite3）。
+    Returns:
+        LLMCache: 缓存。
+    """
+    global _cache
+    cache = _create_cache(mode, path)
+    with _cache_lock:
+        old, _cache = _cache, cache
+    if old is not None:
+        old.close()
+    return cache
+
+
+def llm_cache():
+    """
+    获取进程内共享的缓存，首次调用时按环境变量创建。
+    Returns:
+        LLMCache: 缓存。
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = _create_cache()
+    return _cache
+
+
+def cached_completion(client, model, messages, tools=None, **params):
+    """
+    经过缓存调用同步客户端的 chat.completions.create。
+    Args:
+        client (ZhipuAI): 同步客户端。
+        model (str): 模型名称。
+        messages (list): 对话消息。
+        tools (list): 工具函数说明，为 None 时不传。
+        params: 其余请求参数，不参与指纹计算。
+    Returns:
+        Completion: 大模型回复。
+    """
+    cache = llm_cache()
+    if tools is not None:
+        params["tools"] = tools
+    if not cache.enabled:
+        return client.chat.completions.create(model=model, messages=messages, **params)
+    key = request_fingerprint(model, messages, tools)
+    data = cache.get(key)
+    if data is not None:
+        return Completion.model_validate(normalize_completion(data, model))
+    response = client.chat.completions.create(model=model, messages=messages, **params)
+    cache.put(key, model, response)
+    return response
+
+
+async def cached_completion_async(client, model, messages, tools=None, **params):
+    """
+    经过缓存调用异步客户端的 chat.completions.create，参数同 cached_completion。
+    Returns:
+        ChatCompletion: 大模型回复。
+    """
+    cache = llm_cache()
+    if tools is not None:
+        params["tools"] = tools
+    if not cache.enabled:
+        return await client.chat.completions.create(model=model, messages=messages, **params)
+    key = request_fingerprint(model, messages, tools)
+    data = cache.get(key)
+    if data is not None:
+        return ChatCompletion.model_validate(normalize_completion(data, model))
+    response = await client.chat.completions.create(model=model, messages=messages, **params)
+    cache.put(key, model, response)
+    return response
@@ -0,0 +1,197 @@
+import asyncio
+import itertools
+import os
+import threading
+import weakref
+
+import httpx
+from openai import AsyncOpenAI
+from zhipuai import ZhipuAI
+
+
+# run.py 中并发处理问题的线程数，连接池按此大小保留长连接
+DEFAULT_MAX_WORKERS = 20
+
+# 智谱 API 兼容 OpenAI 接口，异步客户端使用 OpenAI SDK
+DEFAULT_BASE_URL = "https://open.bigmodel.cn/api/paas/v4/"
+
+
+def _env_float(name, default):
+    value = os.environ.get(name)
+    return default if value in (None, "") else float(value)
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return default if value in (None, "") else int(value)
+
+
+def client_settings(max_workers=None):
+    """
+    大模型客户端的连接与超时设置，可通过环境变量调整：
+        ZHIPUAI_TIMEOUT: 单次请求的读取超时（秒），默认 300。
+        ZHIPUAI_CONNECT_TIMEOUT: 建立连接的超时（秒），默认 10。
+        ZHIPUAI_MAX_CONNECTIONS: 连接池大小，默认与并发线程数相同。
+        ZHIPUAI_KEEPALIVE_EXPIRY: 空闲长连接的保留时间（秒），默认 60。
+        ZHIPUAI_MAX_RETRIES: 请求失败时的重试次数，默认 3。
+    Args:
+        max_workers (int): 并发调用大模型的线程数，为 None 时使用 DEFAULT_MAX_WORKERS。
+    Returns:
+        dict: 连接与超时设置。
+    """
+    if max_workers is None:
+        max_workers = DEFAULT_MAX_WORKERS
+    return {
+        "timeout": _env_float("ZHIPUAI_TIMEOUT", 300.0),
+        "connect_timeout": _env_float("ZHIPUAI_CONNECT_TIMEOUT", 10.0),
+        "max_connections": _env_int("ZHIPUAI_MAX_CONNECTIONS", max_workers),
+        "keepalive_expiry": _env_float("ZHIPUAI_KEEPALIVE_EXPIRY", 60.0),
+        "max_retries": _env_int("ZHIPUAI_MAX_RETRIES", 3),
+    }
+
+
+def create_client(max_workers=None):
+    """
+    创建使用长连接池的 ZhipuAI 客户端，api_key 与 base_url 取自环境变量
+    ZHIPUAI_API_KEY、ZHIPUAI_BASE_URL。
+    Args:
+        max_workers (int): 并发调用大模型的线程数，用于确定连接池大小。
+    Returns:
+        ZhipuAI: 客户端。
+    """
+    settings = client_settings(max_workers)
+    timeout = httpx.Timeout(settings["timeout"], connect=settings["connect_timeout"])
+    http_client = httpx.Client(
+        timeout=timeout,
+        limits=httpx.Limits(
+            max_connections=settings["max_connections"],
+            max_keepalive_connections=settings["max_connections"],
+            keepalive_expiry=settings["keepalive_expiry"],
+        ),
+    )
+    return ZhipuAI(
+        timeout=timeout,
+        max_retries=settings["max_retries"],
+        http_client=http_client,
+    )
+
+
+_client = None
+_client_workers = None
+_client_lock = threading.Lock()
+
+
+def configure_client(max_workers):
+    """
+    按并发线程数重新创建进程内共享的客户端，应在开始并发调用之前调用。
+    Args:
+        max_workers (int): 并发调用大模型的线程数。
+    Returns:
+        ZhipuAI: 客户端。
+    """
+    global _client, _client_workers
+    client = create_client(max_workers)
+    with _client_lock:
+        old, _client, _client_workers = _client, client, max_workers
+    if old is not None:
+        old.close()
+    return client
+
+
+def get_client():
+    """
+    获取进程内共享的客户端，首次调用时创建。各线程共用同一个连接池，
+    多轮对话复用已建立的 TLS 连接，不再为每次请求重新创建客户端和连接。
+    Returns:
+        ZhipuAI: 客户端。
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = create_client(_client_workers)
+    return _client
+
+
+def create_async_client(max_concurrency=None, max_connections=None):
+    """
+    创建使用长连接池的异步客户端。智谱 API 兼容 OpenAI 接口，使用 OpenAI SDK 的 AsyncOpenAI，
+    api_key 与 base_url 同样取自环境变量 ZHIPUAI_API_KEY、ZHIPUAI_BASE_URL，连接与超时设置同 client_settings。
+    Args:
+        max_concurrency (int): 同时进行的请求数，用于确定连接池大小。
+        max_connections (int): 连接池大小，为 None 时按 client_settings 确定。
+    Returns:
+        AsyncOpenAI: 异步客户端。
+    """
+    settings = client_settings(max_concurrency)
+    if max_connections is not None:
+        settings["max_connections"] = max_connections
+    timeout = httpx.Timeout(settings["timeout"], connect=settings["connect_timeout"])
+    http_client = httpx.AsyncClient(
+        timeout=timeout,
+        limits=httpx.Limits(
+            max_connections=settings["max_connections"],
+            max_keepalive_connections=settings["max_connections"],
+            keepalive_expiry=settings["keepalive_expiry"],
+        ),
+    )
+    return AsyncOpenAI(
+        api_key=os.environ.get("ZHIPUAI_API_KEY"),
+        base_url=os.environ.get("ZHIPUAI_BASE_URL") or DEFAULT_BASE_URL,
+        timeout=timeout,
+        max_retries=settings["max_retries"],
+        http_client=http_client,
+    )
+
+
+# 单个异步连接池的连接数上限。httpx 连接池每次分配连接都要遍历全部连接和排队请求，
+# 同时进行的请求较多时开销随之平方增长，因此按上限拆分为多个连接池轮流使用
+ASYNC_POOL_CONNECTIONS = 32
+
+# 异步客户端的连接绑定在创建它的事件循环上，每个事件循环各自保留一组
+_async_clients = weakref.WeakKeyDictionary()  # 事件循环 -> AsyncOpenAI 的循环迭代器
+_async_concurrency = None
+
+
+def create_async_clients(max_concurrency=None):
+    """
+    按同时进行的请求数创建一组异步客户端，每个客户端的连接池不超过 ASYNC_POOL_CONNECTIONS。
+    Args:
+        max_concurrency (int): 同时进行的请求数，为 None 时使用 DEFAULT_MAX_WORKERS。
+    Returns:
+        list: AsyncOpenAI 异步客户端列表。
+    """
+    max_connections = client_settings(max_concurrency)["max_connections"]
+    pools = max(1, -(-max_connections // ASYNC_POOL_CONNECTIONS))
+    size = -(-max_connections // pools)
+    return [create_async_client(max_concurrency, size) for _ in range(pools)]
+
+
+def configure_async_client(max_concurrency):
+    """
+    按同时进行的请求数为当前事件循环创建异步客户端，应在开始并发请求之前调用。
+    Args:
+        max_concurrency (int): 同时进行的请求数。
+    Returns:
+        list: AsyncOpenAI 异步客户端列表。
+    """
+    global _async_concurrency
+    _async_concurrency = max_concurrency
+    clients = create_async_clients(max_concurrency)
+    _async_clients[asyncio.get_running_loop()] = itertools.cycle(clients)
+    return clients
+
+
+def get_async_client():
+    """
+    获取当前事件循环共享的异步客户端，首次调用时创建。
+    有多个连接池时轮流返回，使请求均匀分布在各连接池上。
+    Returns:
+        AsyncOpenAI: 异步客户端。
+    """
+    loop = asyncio.get_running_loop()
+    clients = _async_clients.get(loop)
+    if clients is None:
+        clients = itertools.cycle(create_async_clients(_async_concurrency))
+        _async_clients[loop] = clients
+    return next(clients)
@@ -0,0 +1,400 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from data_store import (
+    BIN_DATA_PATH,
+    USE_DATA_PATH,
+    binary_table_dir,
+    read_table,
+    resolve_table_path,
+)
+
+
+# 汇总粒度：名称 -> (numpy 时间单位, pandas 取整频率)，按从粗到细排列
+ROLLUP_FREQS = {"day": ("D", "D"), "hour": ("h", "h")}
+ROLLUP_FILE_NAME = "rollup_{}.npz"
+
+NAT = np.iinfo(np.int64).min
+
+
+def rollup_columns(df):
+    """
+    数据表中需要汇总的数值列（不含布尔列）。
+    """
+    return [
+        column
+        for column in df.columns
+        if column != "csvTime"
+        and pd.api.types.is_numeric_dtype(df[column].dtype)
+        and not pd.api.types.is_bool_dtype(df[column].dtype)
+    ]
+
+
+class Rollup:
+    """
+    数据表按小时或按天预先汇总的结果，每个时间桶、每个数值列保存：
+    记录数、总和、最小值、最大值及其第一次出现的时间、桶内第一条和最后一条记录的值、积分。
+    时间桶从第一条记录所在的桶连续排列到最后一条记录所在的桶，没有记录的桶记录数为 0。
+    开始、结束时间均对齐到桶边界的窗口只需合并若干个桶，不需要加载分钟级数据。
+    积分与 IntegralIndex 一致采用左黎曼和：每条记录的值乘以到下一条记录的时间差（单位：值的单位 × 秒），
+    tail 为桶内最后一条记录的这一项，窗口的积分为各桶之和减去窗口内最后一个非空桶的 tail。
+    """
+
+    STATS = ("sum", "min", "max", "first", "last", "integral", "tail")
+
+    def __init__(self, freq, origin, rows, first_time, last_time, columns, arrays):
+        self.freq = freq
+        self.origin = origin
+        self.rows = rows
+        self.first_time = first_time
+        self.last_time = last_time
+        self.columns = list(columns)
+        self.arrays = arrays
+        self._positions = {column: i for i, column in enumerate(self.columns)}
+        # 每个桶及之前最后一个非空桶的下标，没有时为 -1
+        self._last_nonempty = np.maximum.accumulate(np.where(rows > 0, np.arange(len(rows)), -1))
+
+    @property
+    def unit(self):
+        return ROLLUP_FREQS[self.freq][0]
+
+    @classmethod
+    def from_table(cls, df, freq):
+        """
+        由数据表构建指定粒度的汇总。
+        Args:
+            df (pd.DataFrame): 包含 csvTime 列、按时间升序排列的数据表。
+            freq (str): 汇总粒度，'hour' 或 'day'。
+        Returns:
+            Rollup: 汇总结果。
+        """
+        unit = ROLLUP_FREQS[freq][0]
+        columns = rollup_columns(df)
+        times = df["csvTime"].to_numpy().astype("datetime64[ns]")
+        values = df[columns].to_numpy(dtype=np.float64)
+        integer = np.array(
+            [np.issubdtype(df[column].dtype, np.integer) for column in columns],
+            dtype=bool,
+        )
+        n, width = values.shape
+
+        if n == 0:
+            origin = np.datetime64(0, unit)
+            buckets = np.zeros(0, dtype=np.int64)
+            count = 0
+        else:
+            origin = times[0].astype(f"datetime64[{unit}]")
+            buckets = (times.astype(f"datetime64[{unit}]") - origin).astype(np.int64)
+            count = int(buckets[-1]) + 1
+
+        # 非空桶在记录中的起始行号，reduceat 按这些行号分段聚合后再填回完整的桶序列
+        starts = np.flatnonzero(np.diff(buckets, prepend=-1))
+        ids = buckets[starts]
+        ends = np.append(starts[1:], n)
+        rows = np.zeros(count, dtype=np.int64)
+        rows[ids] = ends - starts
+        first_time = np.full(count, NAT, dtype=np.int64)
+        last_time = np.full(count, NAT, dtype=np.int64)
+        first_time[ids] = times[starts].view(np.int64)
+        last_time[ids] = times[ends - 1].view(np.int64)
+
+        def full(dtype, fill):
+            return np.full((count, width), fill, dtype=dtype)
+
+        arrays = {"integer": integer}
+        missing = np.isnan(values)
+        arrays["count"] = full(np.int64, 0)
+        arrays["sum"] = full(np.float64, 0.0)
+        for key in ("min", "max", "first", "last"):
+            arrays[key] = full(np.float64, np.nan)
+        for key in ("min_time", "max_time"):
+            arrays[key] = full(np.int64, NAT)
+        arrays["integral"] = full(np.float64, 0.0)
+        arrays["tail"] = full(np.float64, 0.0)
+        if n == 0:
+            return cls(freq, origin, rows, first_time, last_time, columns, arrays)
+
+        arrays["count"][ids] = np.add.reduceat((~missing).astype(np.int64), starts, axis=0)
+        arrays["sum"][ids] = np.add.reduceat(np.where(missing, 0, values), starts, axis=0)
+        arrays["first"][ids] = values[starts]
+        arrays["last"][ids] = values[ends - 1]
+
+        # 最值取桶内第一次出现的位置：先求桶内最值，再找等于最值的最小行号
+        segment = np.repeat(np.arange(len(starts)), ends - starts)
+        row_numbers = np.arange(n)[:, None]
+        for key, fill, reduce in (
+            ("min", np.inf, np.minimum),
+            ("max", -np.inf, np.maximum),
+        ):
+            keys = np.where(missing, fill, values)
+            extreme = reduce.reduceat(keys, starts, axis=0)
+            hit = np.where(keys == extreme[segment], row_numbers, n)
+            first_hit = np.minimum.reduceat(hit, starts, axis=0)
+            valid = arrays["count"][ids] > 0
+            arrays[key][ids] = np.where(valid, extreme, np.nan)
+            arrays[f"{key}_time"][ids] = np.where(valid, times[np.minimum(first_hit, n - 1)].view(np.int64), NAT)
+
+        # 与 IntegralIndex 相同的左黎曼和，整秒时间戳与整数值的乘积在 float64 中精确表示
+        diff_ns = np.diff(times).view(np.int64)
+        seconds = np.append(diff_ns / 1e9, 0.0)
+        steps = np.nan_to_num(seconds[:, None] * values, nan=0.0)
+        arrays["integral"][ids] = np.add.reduceat(steps, starts, axis=0)
+        arrays["tail"][ids] = steps[ends - 1]
+        return cls(freq, origin, rows, first_time, last_time, columns, arrays)
+
+    def _bucket(self, time, default):
+        """
+        将对齐的时间转换为桶下标，并限制在 [0, 桶数] 范围内。
+        """
+        if time is None:
+            return default
+        bucket = pd.Timestamp(time).to_datetime64().astype(f"datetime64[{self.unit}]")
+        offset = int((bucket - self.origin).astype(np.int64))
+        return min(max(offset, 0), len(self.rows))
+
+    def _buckets(self, start_time, end_time):
+        a = self._bucket(start_time, 0)
+        b = self._bucket(end_time, len(self.rows))
+        return a, max(a, b)
+
+    def _cast(self, position, value):
+        return np.int64(value) if self.arrays["integer"][position] else value
+
+    def statistics(self, column, start_times, end_times, include_end=False):
+        """
+        计算多个对齐窗口内某列的统计值。
+        Args:
+            column (str): 数值列名。
+            start_times (list): 各窗口的开始时间（包含），需对齐到桶边界。
+            end_times (list): 各窗口的结束时间，需对齐到桶边界。
+            include_end (bool): 是否包含恰好位于结束时间的记录。
+        Returns:
+            dict: count、sum、mean、min_value、min_time、max_value、max_time 数组；
+                没有有效值的窗口 mean 为 NaN，最值为 None，时间为 NaT。
+        """
+        position = self._positions[column]
+        arrays = {
+            key: self.arrays[key][:, position]
+            for key in ("count", "sum", "min", "max", "min_time", "max_time", "first")
+        }
+        result = {
+            key: []
+            for key in (
+                "count",
+                "sum",
+                "mean",
+                "min_value",
+                "min_time",
+                "max_value",
+                "max_time",
+            )
+        }
+        for start_time, end_time in zip(start_times, end_times):
+            a, b = self._buckets(start_time, end_time)
+            count = int(arrays["count"][a:b].sum())
+            total = arrays["sum"][a:b].sum()
+            extremes = {}
+            for key, pick in (("min", np.argmin), ("max", np.argmax)):
+                if count:
+                    values = arrays[key][a:b]
+                    fill = np.inf if key == "min" else -np.inf
+                    i = int(pick(np.where(np.isnan(values), fill, values)))
+                    extremes[key] = (values[i], arrays[f"{key}_time"][a + i])
+                else:
+                    extremes[key] = (None, NAT)
+
+            # 恰好位于结束时间的记录是下一个桶的第一条记录
+            if (
+                include_end
+                and end_time is not None
+                and b < len(self.rows)
+                and self.first_time[b] == pd.Timestamp(end_time).as_unit("ns").value
+                and not np.isnan(arrays["first"][b])
+            ):
+                value = arrays["first"][b]
+                count += 1
+                total += value
+                # 相等时保留更早出现的最值
+                if extremes["min"][0] is None or value < extremes["min"][0]:
+                    extremes["min"] = (value, self.first_time[b])
+                if extremes["max"][0] is None or value > extremes["max"][0]:
+                    extremes["max"] = (value, self.first_time[b])
+
+            result["count"].append(count)
+            result["sum"].append(self._cast(position, total))
+            result["mean"].append(total / count if count else np.nan)
+            for key in ("min", "max"):
+                value, time = extremes[key]
+                result[f"{key}_value"].append(None if value is None else self._cast(position, value))
+                result[f"{key}_time"].append(np.int64(time).view("datetime64[ns]"))
+        return {key: np.array(values) for key, values in result.items()}
+
+    def integrals(self, columns, start_times, end_times, sample_seconds=None):
+        """
+        计算多个对齐窗口 [开始时间, 结束时间) 内各列的积分，与 IntegralIndex.window_integrals 一致。
+        Args:
+            columns (list): 数值列名。
+            start_times (list): 各窗口的开始时间（包含），需对齐到桶边界。
+            end_times (list): 各窗口的结束时间（不包含），需对齐到桶边界。
+            sample_seconds (float): 每条记录固定代表的时长（秒），为 None 时按相邻记录的时间差积分。
+        Returns:
+            np.ndarray: 形状为 (窗口数, 列数) 的积分值（单位：值的单位 × 小时），窗口为空的行为 NaN。
+        """
+        positions = [self._positions[column] for column in columns]
+        values = np.full((len(start_times), len(positions)), np.nan)
+        for i, (start_time, end_time) in enumerate(zip(start_times, end_times)):
+            a, b = self._buckets(start_time, end_time)
+            last = self._last_nonempty[b - 1] if b > 0 else -1
+            if last < a:
+                continue
+            if sample_seconds is not None:
+                total = self.arrays["sum"][a:b, positions].sum(axis=0) * sample_seconds
+            else:
+                total = self.arrays["integral"][a:b, positions].sum(axis=0) - self.arrays["tail"][last, positions]
+            values[i] = total / 3600
+        return values
+
+
+def write_rollup(rollup, path, source_path=None):
+    """
+    将汇总结果保存为 .npz 文件。
+    Args:
+        rollup (Rollup): 汇总结果。
+        path (str): 保存路径。
+        source_path (str): 源 CSV 文件路径，用于判断汇总是否过期。
+    Returns:
+        None
+    """
+    arrays = {
+        "freq": np.array(rollup.freq),
+        "origin": np.array(rollup.origin.astype(np.int64)),
+        "rows": rollup.rows,
+        "first_time": rollup.first_time,
+        "last_time": rollup.last_time,
+        "columns": np.array(rollup.columns, dtype=str),
+        **rollup.arrays,
+    }
+    if source_path is not None:
+        stat = os.stat(source_path)
+        arrays["source"] = np.array([stat.st_mtime_ns, stat.st_size], dtype=np.int64)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def read_rollup(path, source_path=None):
+    """
+    读取汇总结果。
+    Args:
+        path (str): 汇总文件路径。
+        source_path (str): 源 CSV 文件路径，若汇总生成后 CSV 被修改则视为过期。
+    Returns:
+        Rollup: 汇总结果；文件不存在或已过期时返回 None。
+    """
+    try:
+        data = np.load(path)
+    except FileNotFoundError:
+        return None
+
+    with data:
+        if source_path is not None:
+            stat = os.stat(source_path)
+            if "source" not in data or list(data["source"]) != [
+                stat.st_mtime_ns,
+                stat.st_size,
+            ]:
+                return None
+        freq = str(data["freq"])
+        return Rollup(
+            freq,
+            np.datetime64(int(data["origin"]), ROLLUP_FREQS[freq][0]),
+            data["rows"],
+            data["first_time"],
+            data["last_time"],
+            [str(column) for column in data["columns"]],
+            {key: data[key] for key in ("integer", "count", "min_time", "max_time", *Rollup.STATS)},
+        )
+
+
+def export_rollups(data_path=USE_DATA_PATH, bin_path=BIN_DATA_PATH):
+    """
+    为文件夹中的全部 CSV 数据表生成按小时和按天的汇总，保存在对应的二进制列存目录中。
+    Args:
+        data_path (str): CSV 数据表所在的文件夹路径。
+        bin_path (str): 二进制列存所在的文件夹路径。
+    Returns:
+        None
+    """
+    for file_name in sorted(os.listdir(data_path)):
+        if not file_name.endswith(".csv"):
+            continue
+        path = os.path.join(data_path, file_name)
+        df = read_table(path, bin_path)
+        if "csvTime" not in df.columns or not rollup_columns(df):
+            continue
+        print(f"生成汇总：{file_name}")
+        table_dir = binary_table_dir(path, bin_path)
+        os.makedirs(table_dir, exist_ok=True)
+        for freq in ROLLUP_FREQS:
+            write_rollup(
+                Rollup.from_table(df, freq),
+                os.path.join(table_dir, ROLLUP_FILE_NAME.format(freq)),
+                source_path=path,
+            )
+
+
+_rollups = {}  # (文件路径, 汇总粒度) -> (修改时间, Rollup 或 None)
+_rollup_lock = threading.Lock()
+
+
+def rollup(table_name, freq):
+    """
+    获取数据表预处理生成的汇总，不需要加载数据表。
+    Args:
+        table_name (str): 数据表名或 CSV 文件路径。
+        freq (str): 汇总粒度，'hour' 或 'day'。
+    Returns:
+        Rollup: 汇总结果；没有生成或已过期时返回 None。
+    Raises:
+        FileNotFoundError: 如果数据表文件不存在。
+    """
+    path = resolve_table_path(table_name)
+    mtime = os.stat(path).st_mtime_ns
+    key = (path, freq)
+    with _rollup_lock:
+        cached = _rollups.get(key)
+    if cached is None or cached[0] != mtime:
+        cached = (
+            mtime,
+            read_rollup(
+                os.path.join(binary_table_dir(path), ROLLUP_FILE_NAME.format(freq)),
+                source_path=path,
+            ),
+        )
+        with _rollup_lock:
+            _rollups[key] = cached
+    return cached[1]
+
+
+def aligned_rollup(table_name, times):
+    """
+    选择所有时间都对齐到其桶边界的最粗粒度汇总。
+    Args:
+        table_name (str): 数据表名或 CSV 文件路径。
+        times (list): 窗口的开始、结束时间，None 表示不限制。
+    Returns:
+        Rollup: 可用的汇总；时间未对齐到整点或汇总不可用时返回 None。
+    Raises:
+        FileNotFoundError: 如果数据表文件不存在。
+    """
+    times = [None if time is None else pd.Timestamp(time) for time in times]
+    for freq, (_, floor) in ROLLUP_FREQS.items():
+        if all(time is None or time == time.floor(floor) for time in times):
+            result = rollup(table_name, freq)
+            if result is not None:
+                return result
+    return None
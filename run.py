@@ -1,3 +1,5 @@
+import argparse
+import asyncio
 import concurrent.futures as cf
 import json
 import time
@@ -5,6 +7,15 @@ import time
 import dotenv
 
 import ai_brain
+from llm_cache import CACHE_MODES, configure_llm_cache, llm_cache
+from llm_client import configure_async_client, configure_client
+from tool_cache import TOOL_CACHE_MAX_ENTRIES, configure_tool_cache
+
+
+# 并发处理问题的线程数，大模型客户端的连接池按此大小保留长连接
+MAX_WORKERS = 20
+# 异步模式下同时处理的问题数，实际吞吐受 API 的速率限制约束
+MAX_CONCURRENCY = 200
 
 
 def process_one(question_json):
@@ -21,20 +32,62 @@ def process_one(question_json):
         return {"id": line["id"], "question": query, "answer": "Error: " + str(e)}
 
 
-def main():
+async def process_one_async(question_json, semaphore):
+    line = question_json
+    query = line["question"]
+    async with semaphore:
+        try:
+            print(f"Processing question ID {line['id']}: {query}")
+            answer = await ai_brain.get_answer_async(question=query)
+            ans = str(answer)
+            print(f"Answer for question ID {line['id']}: {ans}")
+            return {"id": line["id"], "question": query, "answer": ans}
+        except Exception as e:
+            print(f"Error processing question ID {line['id']}: {e}")
+            return {"id": line["id"], "question": query, "answer": "Error: " + str(e)}
+
+
+async def run_async(q_json_list, max_concurrency=MAX_CONCURRENCY):
+    """
+    在一个事件循环中处理全部问题，最多同时处理 max_concurrency 个。
+    """
+    # 所有问题共用一个连接池大小与并发数相同的异步客户端
+    configure_async_client(max_concurrency)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    return await asyncio.gather(*(process_one_async(q_json, semaphore) for q_json in q_json_list))
+
+
+def run_threads(q_json_list, max_workers=MAX_WORKERS):
+    """
+    使用线程池处理全部问题。
+    """
+    result_json_list = []
+    # 所有线程共用一个连接池大小与线程数相同的客户端
+    configure_client(max_workers)
+    # 使用 ThreadPoolExecutor 处理问题
+    with cf.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        future_list = [executor.submit(process_one, q_json) for q_json in q_json_list]
+        for future in cf.as_completed(future_list):
+            result_json_list.append(future.result())
+    return result_json_list
+
+
+def main(mode="thread", concurrency=None, cache_mode=None):
     q_path = "question.jsonl"
     result_path = "NexAI_result.jsonl"
-    result_json_list = []
 
     # 读取问题文件
     with open(q_path, "r", encoding="utf-8") as f:
         q_json_list = [json.loads(line.strip()) for line in f]
     # q_json_list=q_json_list[:1]
-    # 使用 ThreadPoolExecutor 处理问题
-    with cf.ThreadPoolExecutor(max_workers=20) as executor:
-        future_list = [executor.submit(process_one, q_json) for q_json in q_json_list]
-        for future in cf.as_completed(future_list):
-            result_json_list.append(future.result())
+    # 大模型回复缓存，cache_mode 为 None 时取自环境变量 LLM_CACHE_MODE
+    configure_llm_cache(cache_mode)
+    # 同一批问题经常以相同参数调用工具函数，结果在各问题之间共享
+    tool_results = configure_tool_cache(TOOL_CACHE_MAX_ENTRIES)
+    if mode == "async":
+        result_json_list = asyncio.run(run_async(q_json_list, concurrency or MAX_CONCURRENCY))
+    else:
+        result_json_list = run_threads(q_json_list, concurrency or MAX_WORKERS)
 
     # 按 ID 排序结果
     result_json_list.sort(key=lambda x: x["id"])
@@ -44,12 +97,37 @@ def main():
         for result in result_json_list:
             f.write(json.dumps(result, ensure_ascii=False) + "\n")
 
+    print(f"工具结果缓存: {tool_results.stats()}")
+    if llm_cache().enabled:
+        print(f"大模型回复缓存: {llm_cache().stats()}")
+
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="批量回答 question.jsonl 中的问题")
+    parser.add_argument(
+        "--mode",
+        choices=["thread", "async"],
+        default="thread",
+        help="thread 为线程池，async 为单个事件循环内的异步流水线",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help=f"同时处理的问题数，默认 thread 模式 {MAX_WORKERS}、async 模式 {MAX_CONCURRENCY}",
+    )
+    parser.add_argument(
+        "--llm-cache",
+        choices=CACHE_MODES,
+        default=None,
+        help="大模型回复缓存模式，默认取自环境变量 LLM_CACHE_MODE，未设置时为 off",
+    )
+    args = parser.parse_args()
+
     dotenv.load_dotenv()
 
     start_time = time.time()  # 记录开始时间
-    main()
+    main(args.mode, args.concurrency, args.llm_cache)
     end_time = time.time()  # 记录结束时间
     elapsed_time = end_time - start_time  # 计算耗时
     elapsed_time_minutes = elapsed_time / 60  # 将秒转换为分钟
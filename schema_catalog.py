@@ -0,0 +1,100 @@
+import copy
+import json
+import re
+import threading
+
+
+SCHEMA_PATH = "dict.json"
+
+# 字段含义中的单位，例如 "A架右舷角度,单位:°"
+UNIT_PATTERN = re.compile(r"单位[:：]\s*([^,，;；\s]+)")
+
+
+class SchemaCatalog:
+    """
+    字段注释（dict.json）的只读目录。
+    首次使用时解析一次，保存数据表 -> 字段、字段 -> 数据表的反向索引、各字段的单位，
+    以及提示词中使用的文本形式，之后的请求不再读取文件。
+    """
+
+    def __init__(self, tables):
+        self.tables = tables
+        # 数据表名 -> {字段名: 字段含义}
+        self.fields = {
+            table["数据表名"]: {field["字段名"]: field["字段含义"] for field in table["字段列表"]} for table in tables
+        }
+        # 字段名 -> 包含该字段的数据表名列表
+        self.column_tables = {}
+        # (数据表名, 字段名) -> 单位
+        self.units = {}
+        for table_name, fields in self.fields.items():
+            for column, meaning in fields.items():
+                self.column_tables.setdefault(column, []).append(table_name)
+                match = UNIT_PATTERN.search(str(meaning))
+                if match:
+                    self.units[(table_name, column)] = match.group(1)
+        # 提示词中使用的整个字段注释的文本形式
+        self.text = str(tables)
+
+    @classmethod
+    def load(cls, path=SCHEMA_PATH):
+        """
+        读取并解析字段注释文件。
+        """
+        with open(path, "r", encoding="utf-8") as file:
+            return cls(json.load(file))
+
+    def tables_in(self, text):
+        """
+        查找名称出现在文本中的数据表，例如大模型返回的数据表名列表。
+        Returns:
+            list: 字段注释中的数据表条目，按 dict.json 中的顺序排列。
+        """
+        return [table for table in self.tables if table["数据表名"] in text]
+
+    def tables_with(self, column):
+        """
+        包含指定字段的数据表名列表，按 dict.json 中的顺序排列。
+        """
+        return list(self.column_tables.get(column, []))
+
+    def unit(self, table_name, column):
+        """
+        字段的单位，没有标注单位时返回 None。
+        """
+        return self.units.get((table_name, column))
+
+    def to_dict(self):
+        """
+        字段注释的副本，与 dict.json 的内容一致。
+        """
+        return copy.deepcopy(self.tables)
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def schema_catalog():
+    """
+    获取进程内共享的字段注释目录，首次调用时读取 dict.json。
+    Returns:
+        SchemaCatalog: 字段注释目录。
+    """
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = SchemaCatalog.load()
+    return _catalog
+
+
+def reload_schema_catalog(path=SCHEMA_PATH):
+    """
+    重新读取字段注释文件，例如预处理重新生成 dict.json 之后。
+    """
+    global _catalog
+    catalog = SchemaCatalog.load(path)
+    with _catalog_lock:
+        _catalog = catalog
+    return catalog
@@ -0,0 +1,189 @@
+import numpy as np
+
+
+def find_runs(mask):
+    """
+    游程编码：找出布尔数组中所有连续为 True 的段。
+    Args:
+        mask (np.ndarray): 布尔数组。
+    Returns:
+        tuple: (开始下标数组, 结束下标数组)，结束下标不包含。
+    """
+    mask = np.asarray(mask, dtype=bool)
+    padded = np.concatenate(([False], mask, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return edges[0::2], edges[1::2]
+
+
+def difference_runs(left, right, threshold, invalid="break", drop_open=True):
+    """
+    找出两组读数之差的绝对值持续超过阈值的时间段。
+    Args:
+        left (np.ndarray): 第一组读数，无效值（如 'error'）应已转换为 NaN。
+        right (np.ndarray): 第二组读数。
+        threshold (float): 阈值，差值的绝对值大于该值视为异常。
+        invalid (str): 无效值的处理方式。'break' 表示无效值打断异常段，
+            'skip' 表示忽略无效值，其前后的异常记录可连成一段。
+        drop_open (bool): 是否丢弃到最后一条记录仍未结束的异常段。
+    Returns:
+        tuple: (开始下标数组, 结束下标数组)，均为原数组中的下标，结束下标为异常段最后一条记录（包含）。
+    Raises:
+        ValueError: 如果 invalid 取值未知。
+    """
+    if invalid not in ("break", "skip"):
+        raise ValueError(f"未知的无效值处理方式: {invalid}")
+    left = np.asarray(left, dtype=float)
+    right = np.asarray(right, dtype=float)
+    valid = np.isfinite(left) & np.isfinite(right)
+    positions = np.arange(len(left)) if invalid == "break" else np.flatnonzero(valid)
+
+    with np.errstate(invalid="ignore"):
+        anomaly = np.abs(left - right) > threshold
+    anomaly = anomaly[positions] & valid[positions]
+
+    starts, ends = find_runs(anomaly)
+    if drop_open and len(ends) and ends[-1] == len(anomaly):
+        starts, ends = starts[:-1], ends[:-1]
+    return positions[starts], positions[ends - 1]
+
+
+def _direction_steps(values):
+    """
+    找出序列中数值发生变化的步（第 i 步为 values[i] 到 values[i + 1]），忽略数值不变的步。
+    Returns:
+        tuple: (步下标数组, 方向数组, 是否为同方向段第一步的布尔数组)。
+    """
+    steps = np.flatnonzero(np.diff(values) != 0)
+    directions = np.sign(values[steps + 1] - values[steps])
+    run_start = np.ones(len(steps), dtype=bool)
+    run_start[1:] = directions[1:] != directions[:-1]
+    return steps, directions, run_start
+
+
+def threshold_swings(values, threshold):
+    """
+    按幅度阈值识别摆动：同一方向上连续变化的一段为一次摆动，幅度不小于阈值时计数。
+    与逐点比较的实现一致，最后一段尚未换向的摆动不计数。
+    Args:
+        values (np.ndarray): 角度序列。
+        threshold (float): 摆动幅度的阈值。
+    Returns:
+        np.ndarray: 每次计数的摆动到达转折点时的下标。
+    """
+    values = np.asarray(values, dtype=float)
+    steps, _, run_start = _direction_steps(values)
+    if len(steps) == 0:
+        return np.array([], dtype=np.int64)
+    starts = np.flatnonzero(run_start)
+    # 每段第一步的起点到最后一步的终点即为该段的摆动幅度
+    first = steps[starts]
+    last = np.append(steps[starts[1:] - 1], steps[-1]) + 1
+    amplitude = np.abs(values[last] - values[first])
+    counted = amplitude[:-1] >= threshold
+    return last[:-1][counted]
+
+
+def rule_swings(values, front_angle, back_angle):
+    """
+    按正负向阈值识别摆动：从超过正向阈值到超过负向阈值（或反之）记为一次完整的摆动。
+    与逐点比较的实现一致：以第一次变化的起点初始化所处位置，每次换向后的第一步不参与判断，
+    此后正向变化超过正向阈值记为到达正向、负向变化低于负向阈值记为到达负向，
+    相邻两次到达的方向不同即计一次摆动。
+    Args:
+        values (np.ndarray): 角度序列。
+        front_angle (float): 正向摆动阈值。
+        back_angle (float): 负向摆动阈值。
+    Returns:
+        np.ndarray: 每次计数的摆动到达阈值时的下标。
+    """
+    values = np.asarray(values, dtype=float)
+    steps, directions, run_start = _direction_steps(values)
+    if len(steps) == 0:
+        return np.array([], dtype=np.int64)
+
+    # 初始位置：1 为超过正向阈值，-1 为超过负向阈值，0 为在摆动范围内
+    initial = values[steps[0]]
+    if back_angle <= initial <= front_angle:
+        initial_mark = 0
+    elif initial > front_angle:
+        initial_mark = 1
+    else:
+        initial_mark = -1
+
+    after = values[steps + 1]
+    checked = ~run_start
+    front = checked & (directions > 0) & (after > front_angle)
+    back = checked & (directions < 0) & (after < back_angle)
+    reached = np.flatnonzero(front | back)
+    marks = np.where(front[reached], 1, -1)
+    positions = steps[reached] + 1
+
+    if initial_mark != 0:
+        marks = np.concatenate(([initial_mark], marks))
+        positions = np.concatenate(([-1], positions))
+    counted = np.flatnonzero(marks[1:] != marks[:-1]) + 1
+    return positions[counted]
+
+
+def band_entry_counts(values, bands, lo, hi):
+    """
+    统计序列在多个时间窗口内进入多个数值区间的次数。
+    每个窗口内第一个落在区间内的点算作一次进入，此后每次从区间外回到区间内再算一次。
+    先对整个序列做一次边沿检测并求前缀和，每个窗口的次数只需一次相减和一次首点修正。
+    Args:
+        values (np.ndarray): 数值序列，不含无效值。
+        bands (list): (下限, 上限) 列表，区间两端均包含。
+        lo (np.ndarray): 各窗口在序列中的起始下标。
+        hi (np.ndarray): 各窗口在序列中的结束下标（不包含）。
+    Returns:
+        np.ndarray: 形状为 (区间数, 窗口数) 的进入次数矩阵。
+    """
+    values = np.asarray(values, dtype=float)
+    lo = np.asarray(lo, dtype=np.int64)
+    hi = np.asarray(hi, dtype=np.int64)
+    bands = np.asarray(bands, dtype=float).reshape(-1, 2)
+
+    inside = (values >= bands[:, :1]) & (values <= bands[:, 1:])
+    entries = inside.copy()
+    entries[:, 1:] &= ~inside[:, :-1]
+    cumulative = np.zeros((len(bands), len(values) + 1), dtype=np.int64)
+    np.cumsum(entries, axis=1, out=cumulative[:, 1:])
+
+    counts = cumulative[:, hi] - cumulative[:, lo]
+    # 窗口第一个点在区间内、但在整个序列中不是进入点时，窗口内仍算作一次进入
+    nonempty = hi > lo
+    first = np.minimum(lo, max(len(values) - 1, 0))
+    if len(values):
+        counts += nonempty & inside[:, first] & ~entries[:, first]
+    return counts
+
+
+def minmax_downsample(values, buckets):
+    """
+    最值保留降采样：将序列均分为若干桶，每桶保留每一列最小值和最大值第一次出现的下标，
+    峰值、谷值不会因降采样而丢失。首尾两点始终保留。
+    Args:
+        values (np.ndarray): 数值序列，或形状为 (记录数, 列数) 的数值矩阵，NaN 不参与比较。
+        buckets (int): 桶数，返回的下标不超过 桶数 × 列数 × 2 + 2 个。
+    Returns:
+        np.ndarray: 升序排列、不重复的下标数组。
+    """
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 1:
+        values = values[:, None]
+    n = len(values)
+    if n == 0:
+        return np.array([], dtype=np.int64)
+
+    edges = np.unique(np.linspace(0, n, max(int(buckets), 1) + 1).astype(np.int64))
+    starts = edges[:-1]
+    segment = np.repeat(np.arange(len(starts)), np.diff(edges))
+    rows = np.arange(n)[:, None]
+    missing = np.isnan(values)
+    picks = [np.array([0, n - 1])]
+    for fill, reduce in ((np.inf, np.minimum), (-np.inf, np.maximum)):
+        keys = np.where(missing, fill, values)
+        extreme = reduce.reduceat(keys, starts, axis=0)
+        hit = np.where(keys == extreme[segment], rows, n)
+        picks.append(np.minimum.reduceat(hit, starts, axis=0).ravel())
+    return np.unique(np.concatenate(picks)).astype(np.int64)
@@ -0,0 +1,267 @@
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from llm_cache import LLMCache, LLMCacheMiss, normalize_completion, request_fingerprint
+
+
+# 默认脚本，与 ai_brain 的对话流程对应：按最后一条消息的角色与内容依次匹配，使用第一条匹配的规则。
+# 规则字段：
+#   role: 最后一条消息的角色，省略时不限。
+#   contains: 最后一条消息内容中包含的文本，省略时不限。
+#   content: 回复内容。
+#   tool_calls: 工具调用列表，每项为 {"name": 函数名, "arguments": 参数}。
+DEFAULT_SCRIPT = [
+    # choose_table：选择数据表
+    {"role": "user", "contains": "我有如下数据表", "content": "Ajia_plc_1"},
+    # get_answer_2：第一次调用，规划并调用工具函数
+    {
+        "role": "user",
+        "contains": "现在需要回答这个问题",
+        "tool_calls": [
+            {
+                "name": "get_work_time",
+                "arguments": {
+                    "start_time": "2024-08-15 00:00:00",
+                    "end_time": "2024-08-16 00:00:00",
+                },
+            }
+        ],
+    },
+    # get_answer_2：总结最终答案
+    {
+        "role": "user",
+        "contains": "请根据上述回答过程",
+        "content": "2024/08/15 的作业时间已按工具函数结果给出。",
+    },
+    # 工具函数结果返回后，或要求继续解答时，结束解答
+    {"content": "已完成回答"},
+]
+
+
+def parse_latency(spec):
+    """
+    解析延迟分布，单位为秒：
+        fixed:0.5           固定延迟
+        uniform:0.2,1.5     均匀分布
+        normal:1.0,0.3      正态分布（均值, 标准差），小于 0 时取 0
+        lognormal:1.0,0.5   对数正态分布（中位数, 对数标准差）
+    Args:
+        spec (str): 分布描述，为空时没有延迟。
+    Returns:
+        callable: 接收 random.Random、返回延迟秒数的函数。
+    """
+    if not spec:
+        return lambda rng: 0.0
+    name, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",") if v.strip()]
+    if name == "fixed" and len(values) == 1:
+        return lambda rng: values[0]
+    if name == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if name == "normal" and len(values) == 2:
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if name == "lognormal" and len(values) == 2:
+        mu = math.log(values[0])
+        return lambda rng: rng.lognormvariate(mu, values[1])
+    raise ValueError(f"无法解析的延迟分布: {spec}")
+
+
+def load_script(path=None):
+    """
+    读取脚本文件（JSON 规则列表，格式同 DEFAULT_SCRIPT），未指定时使用默认脚本。
+    """
+    if path is None:
+        return DEFAULT_SCRIPT
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+class StandInLLM:
+    """
+    本地的大模型替身，按照与智谱（OpenAI 兼容）接口相同的格式返回回复。
+    先在录制的回复（llm_cache.py 记录的 SQLite 文件）中按请求指纹查找，
+    未录制的请求按脚本生成回复；每次回复前按延迟分布等待。
+    """
+
+    def __init__(self, script=None, recording=None, latency=None, seed=None):
+        self.script = script if script is not None else DEFAULT_SCRIPT
+        self.recording = None if recording is None else LLMCache(recording, "replay")
+        self.latency = parse_latency(latency)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counts = {"requests": 0, "recorded": 0, "scripted": 0}
+        self.total_delay = 0.0
+
+    def delay(self):
+        with self._lock:
+            seconds = self.latency(self._rng)
+            self.total_delay += seconds
+        return seconds
+
+    def respond(self, request):
+        """
+        生成一次 chat.completions 请求的回复。
+        Args:
+            request (dict): 请求体。
+        Returns:
+            dict: 回复体。
+        """
+        model = request.get("model", "glm-4-plus")
+        messages = request.get("messages", [])
+        with self._lock:
+            self.counts["requests"] += 1
+        if self.recording is not None:
+            try:
+                response = self.recording.get(request_fingerprint(model, messages, request.get("tools")))
+            except LLMCacheMiss:
+                response = None
+            if response is not None:
+                with self._lock:
+                    self.counts["recorded"] += 1
+                return normalize_completion(response, model)
+        with self._lock:
+            self.counts["scripted"] += 1
+        return self.scripted(model, messages)
+
+    def scripted(self, model, messages):
+        last = messages[-1] if messages else {}
+        text = last.get("content") or ""
+        rule = next(
+            (
+                rule
+                for rule in self.script
+                if rule.get("role", last.get("role")) == last.get("role") and rule.get("contains", "") in text
+            ),
+            {"content": "已完成回答"},
+        )
+        message = {"role": "assistant", "content": rule.get("content")}
+        finish_reason = "stop"
+        if rule.get("tool_calls"):
+            message["tool_calls"] = [
+                {
+                    "id": f"call_{uuid.uuid4().hex[:24]}",
+                    "type": "function",
+                    "function": {
+                        "name": call["name"],
+                        "arguments": json.dumps(call["arguments"], ensure_ascii=False),
+                    },
+                }
+                for call in rule["tool_calls"]
+            ]
+            finish_reason = "tool_calls"
+        prompt_tokens = sum(len(str(m.get("content") or "")) for m in messages)
+        completion_tokens = len(str(message["content"] or ""))
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "finish_reason": finish_reason, "message": message}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    def stats(self):
+        with self._lock:
+            return {**self.counts, "total_delay": round(self.total_delay, 3)}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # 使用长连接，与真实 API 一样复用客户端连接池中的连接
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/stats"):
+            self._send_json(200, self.server.llm.stats())
+        else:
+            self._send_json(404, {"error": {"message": f"未知路径: {self.path}"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError as e:
+            self._send_json(400, {"error": {"message": f"请求体不是 JSON: {e}"}})
+            return
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"未知路径: {self.path}"}})
+            return
+        time.sleep(self.server.llm.delay())
+        self._send_json(200, self.server.llm.respond(request))
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # 异步模式下可能同时有数百个连接
+    request_queue_size = 1024
+
+    def __init__(self, address, llm):
+        super().__init__(address, _Handler)
+        self.llm = llm
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/"
+
+
+def start_server(host="127.0.0.1", port=0, **options):
+    """
+    在后台线程中启动替身服务，用于在同一进程内进行基准测试。
+    Args:
+        host (str): 监听地址。
+        port (int): 监听端口，0 表示随机端口。
+        options: 传给 StandInLLM 的参数（script、recording、latency、seed）。
+    Returns:
+        StandInServer: 服务，base_url 属性为 ZHIPUAI_BASE_URL 应设置的地址，
+            使用完毕后调用 shutdown()。
+    """
+    server = StandInServer((host, port), StandInLLM(**options))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="本地大模型替身服务，兼容智谱（OpenAI）chat.completions 接口")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--script", default=None, help="脚本文件（JSON 规则列表）")
+    parser.add_argument("--recording", default=None, help="llm_cache.py 录制的 SQLite 文件")
+    parser.add_argument(
+        "--latency",
+        default=None,
+        help="延迟分布，例如 fixed:0.5、uniform:0.2,1.5、normal:1.0,0.3、lognormal:1.0,0.5",
+    )
+    parser.add_argument("--seed", type=int, default=None, help="延迟的随机种子")
+    args = parser.parse_args()
+
+    llm = StandInLLM(load_script(args.script), args.recording, args.latency, args.seed)
+    server = StandInServer((args.host, args.port), llm)
+    print(f"替身服务已启动: ZHIPUAI_BASE_URL={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"请求统计: {llm.stats()}")
+        server.server_close()
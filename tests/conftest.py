@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 项目模块位于仓库根目录
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(autouse=True)
+def in_repo_root(monkeypatch):
+    # api.py 使用相对路径读取数据表
+    monkeypatch.chdir(ROOT)
@@ -0,0 +1,271 @@
+"""
+A 架角度相关的工具函数与原始 pandas 实现的结果对比。
+参考实现摘自改写前的 api.py，直接读取 database_in_use 下的 CSV 文件逐行计算。
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+import api
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_PATH = os.path.join(ROOT, "database_in_use")
+
+if not os.path.isdir(DATA_PATH):
+    pytest.skip("缺少 database_in_use 数据表", allow_module_level=True)
+
+
+def read_table(table_name):
+    df = pd.read_csv(os.path.join(DATA_PATH, f"{table_name}.csv"))
+    df["csvTime"] = pd.to_datetime(df["csvTime"])
+    return df
+
+
+def reference_check_ajia_angle(start_time, end_time, threshold=5):
+    df = read_table("Ajia_plc_1")
+    filtered_data = df[(df["csvTime"] >= start_time) & (df["csvTime"] < end_time)].copy()
+    if filtered_data.empty:
+        return None
+
+    error_time = []
+    error_status = False
+    error_start_time = ""
+    for index, row in filtered_data.iterrows():
+        if row["Ajia-0_v"] == "error" or row["Ajia-1_v"] == "error":
+            if error_status:
+                error_time.append((error_start_time, filtered_data.loc[index - 1, "csvTime"]))
+                error_status = False
+            continue
+        if abs(float(row["Ajia-0_v"]) - float(row["Ajia-1_v"])) > threshold:
+            if not error_status:
+                error_status = True
+                error_start_time = row["csvTime"]
+        elif error_status:
+            error_time.append((error_start_time, filtered_data.loc[index - 1, "csvTime"]))
+            error_status = False
+    return error_time
+
+
+ANGLE_WINDOWS = [
+    ("2024-05-23 00:00:00", "2024-05-24 00:00:00"),
+    ("2024-08-15 00:00:00", "2024-08-16 00:00:00"),
+    ("2024-08-23 00:00:00", "2024-08-24 00:00:00"),
+    ("2024-05-24 00:00:00", "2024-05-29 00:00:00"),
+    ("2024-05-16 00:00:00", "2024-09-15 00:00:00"),
+    ("2025-01-01 00:00:00", "2025-01-02 00:00:00"),
+]
+
+
+@pytest.mark.parametrize("start_time,end_time", ANGLE_WINDOWS)
+def test_check_ajia_angle(start_time, end_time):
+    assert api.check_ajia_angle(start_time, end_time) == reference_check_ajia_angle(start_time, end_time)
+
+
+def test_check_ajia_angle_threshold():
+    start_time, end_time = ANGLE_WINDOWS[3]
+    expected = reference_check_ajia_angle(start_time, end_time, threshold=10)
+    assert api.check_ajia_angle(start_time, end_time, threshold=10) == expected
+
+
+def reference_angles(start_time, end_time, side):
+    df = read_table("Ajia_plc_1")
+    angle_column = "Ajia-1_v" if side == "左舷" else "Ajia-0_v"
+    df = df[(df["csvTime"] >= pd.to_datetime(start_time)) & (df["csvTime"] <= pd.to_datetime(end_time))]
+    return pd.to_numeric(df[angle_column], errors="coerce").dropna().values
+
+
+def reference_swing_with_threshold(start_time, end_time, side, threshold):
+    angles = reference_angles(start_time, end_time, side)
+
+    swing_count = 0  # 摆动次数
+    swing_direction = None  # 摆动方向，1 为正向，-1 为负向
+    start_angle = None  # 摆动开始角度
+    end_angle = None  # 摆动结束角度
+
+    for i in range(len(angles) - 1):
+        current_angle = angles[i]  # 当前角度
+        next_angle = angles[i + 1]  # 下一个角度
+        if next_angle - current_angle > 0:  # 即将正向摆动
+            if swing_direction is None:  # 如果尚未确定摆动方向
+                swing_direction = 1
+                start_angle = current_angle
+                end_angle = next_angle
+            elif swing_direction == 1:  # 如果当前方向为正向
+                end_angle = next_angle
+            elif swing_direction == -1:  # 如果当前方向为负向
+                if abs(end_angle - start_angle) >= threshold:  # 如果摆动幅度超过阈值
+                    swing_count += 1
+                swing_direction = 1
+                start_angle = current_angle
+                end_angle = next_angle
+        elif next_angle - current_angle < 0:  # 即将负向摆动
+            if swing_direction is None:  # 如果尚未确定摆动方向
+                swing_direction = -1
+                start_angle = current_angle
+                end_angle = next_angle
+            elif swing_direction == -1:  # 如果当前方向为负向
+                end_angle = next_angle
+            elif swing_direction == 1:  # 如果当前方向为正向
+                if abs(end_angle - start_angle) >= threshold:  # 如果摆动幅度超过阈值
+                    swing_count += 1
+                swing_direction = -1
+                start_angle = current_angle
+                end_angle = next_angle
+        else:  # 角度未发生变化
+            continue
+
+    return {"摆动次数": swing_count}
+
+
+def reference_swing_with_rule(start_time, end_time, side, front_angle, back_angle):
+    # 减小阈值
+    front_angle = front_angle - 5
+    angles = reference_angles(start_time, end_time, side)
+
+    swing_count = 0  # 摆动次数
+    swing_direction = None  # 摆动方向，1 为正向，-1 为负向
+    at_front = None  # 是否到达正向摆动阈值
+    at_back = None  # 是否到达负向摆动阈值
+
+    for i in range(len(angles) - 1):
+        current_angle = angles[i]
+        next_angle = angles[i + 1]
+        if next_angle - current_angle > 0:  # 即将正向摆动
+            if swing_direction is None or at_front is None or at_back is None:  # 如果尚未初始化
+                swing_direction = 1
+                if back_angle <= current_angle <= front_angle:  # 如果在摆动范围内
+                    at_front = False
+                    at_back = False
+                elif current_angle > front_angle:  # 如果超过正向摆动阈值
+                    at_front = True
+                    at_back = False
+                elif current_angle < back_angle:  # 如果超过负向摆动阈值
+                    at_back = True
+                    at_front = False
+            elif swing_direction == 1:  # 如果当前方向为正向
+                if next_angle > front_angle:  # 如果超过正向摆动阈值
+                    if at_back:  # 如果到达过负向摆动阈值
+                        swing_count += 1
+                        at_back = False
+                    at_front = True
+                else:
+                    continue
+            elif swing_direction == -1:  # 如果当前方向为负向
+                swing_direction = 1
+        elif next_angle - current_angle < 0:  # 即将负向摆动
+            if swing_direction is None or at_front is None or at_back is None:  # 如果尚未初始化
+                swing_direction = -1
+                if back_angle <= current_angle <= front_angle:  # 如果在摆动范围内
+                    at_front = False
+                    at_back = False
+                elif current_angle > front_angle:  # 如果超过正向摆动阈值
+                    at_front = True
+                    at_back = False
+                elif current_angle < back_angle:  # 如果超过负向摆动阈值
+                    at_back = True
+                    at_front = False
+            elif swing_direction == -1:  # 如果当前方向为负向
+                if next_angle < back_angle:  # 如果超过负向摆动阈值
+                    if at_front:  # 如果到达过正向摆动阈值
+                        swing_count += 1
+                        at_front = False
+                    at_back = True
+                else:
+                    continue
+            elif swing_direction == 1:  # 如果当前方向为正向
+                swing_direction = -1
+        else:  # 角度未发生变化
+            continue
+
+    return {"摆动次数": swing_count}
+
+
+@pytest.mark.parametrize("start_time,end_time", ANGLE_WINDOWS)
+@pytest.mark.parametrize("side", ["左舷", "右舷"])
+@pytest.mark.parametrize("threshold", [1, 10, 35])
+def test_count_swing_with_threshold(start_time, end_time, side, threshold):
+    expected = reference_swing_with_threshold(start_time, end_time, side, threshold)
+    actual = api.count_swing_with_threshold(start_time, end_time, side, threshold)
+    # 改写后额外返回各次摆动的时间，次数应与原实现一致
+    assert actual["摆动次数"] == expected["摆动次数"]
+
+
+@pytest.mark.parametrize("start_time,end_time", ANGLE_WINDOWS)
+@pytest.mark.parametrize("side", ["左舷", "右舷"])
+@pytest.mark.parametrize("front_angle,back_angle", [(35, -35), (40, -43), (10, -10)])
+def test_count_swing_with_rule(start_time, end_time, side, front_angle, back_angle):
+    expected = reference_swing_with_rule(start_time, end_time, side, front_angle, back_angle)
+    actual = api.count_swing_with_rule(start_time, end_time, side, front_angle, back_angle)
+    assert actual["摆动次数"] == expected["摆动次数"]
+
+
+def test_count_swing_both_sides():
+    start_time, end_time = ANGLE_WINDOWS[3]
+    both = api.count_swing_with_threshold(start_time, end_time, "两舷", 10)
+    assert both == {side: api.count_swing_with_threshold(start_time, end_time, side, 10) for side in ("左舷", "右舷")}
+    times = both["左舷"]["摆动时间"]
+    assert len(times) == min(both["左舷"]["摆动次数"], api.SWING_TIMES_LIMIT)
+    assert times == sorted(times)
+    assert all(start_time <= time <= end_time for time in times)
+
+
+@pytest.mark.parametrize("start_time,end_time", [ANGLE_WINDOWS[0], ANGLE_WINDOWS[3], ANGLE_WINDOWS[4]])
+def test_count_swing_caps_times(start_time, end_time, monkeypatch):
+    monkeypatch.setattr(api, "SWING_TIMES_LIMIT", 10**9)
+    full = api.count_swing_with_rule(start_time, end_time, "右舷", 30, -30)
+    monkeypatch.undo()
+    actual = api.count_swing_with_rule(start_time, end_time, "右舷", 30, -30)
+    count = full["摆动次数"]
+    assert actual["摆动次数"] == count == len(full["摆动时间"])
+    if count <= api.SWING_TIMES_LIMIT:
+        assert actual == full
+    else:
+        # 只列出最早和最晚的各一半
+        half = api.SWING_TIMES_LIMIT // 2
+        assert actual["摆动时间"] == full["摆动时间"][:half] + full["摆动时间"][-half:]
+        assert actual["省略的摆动时间数"] == count - api.SWING_TIMES_LIMIT
+
+
+def reference_count_oscillations(start_time, end_time, name, angle_range_start, angle_range_end):
+    df = read_table("Ajia_plc_1")
+    angle_column = "Ajia-1_v" if name == "左舷" else "Ajia-0_v"
+    df = df[(df["csvTime"] >= pd.to_datetime(start_time)) & (df["csvTime"] <= pd.to_datetime(end_time))]
+    angles = pd.to_numeric(df[angle_column], errors="coerce").dropna().values
+
+    oscillation_count = 0
+    in_range = False
+    for angle in angles:
+        if angle_range_start <= angle <= angle_range_end:
+            if not in_range:
+                oscillation_count += 1
+                in_range = True
+        else:
+            in_range = False
+    return {"count": oscillation_count}
+
+
+ANGLE_RANGES = [(-1, 1), (30, 60), (-45, -30), (100, 120)]
+
+
+@pytest.mark.parametrize("start_time,end_time", ANGLE_WINDOWS)
+@pytest.mark.parametrize("name", ["左舷", "右舷"])
+@pytest.mark.parametrize("angle_range", ANGLE_RANGES)
+def test_count_oscillations(start_time, end_time, name, angle_range):
+    expected = reference_count_oscillations(start_time, end_time, name, *angle_range)
+    assert api.count_oscillations(start_time, end_time, name, *angle_range) == expected
+
+
+@pytest.mark.parametrize("name", ["左舷", "右舷"])
+def test_count_oscillations_batch(name):
+    time_ranges = [{"start_time": start, "end_time": end} for start, end in ANGLE_WINDOWS]
+    result = api.count_oscillations_batch(time_ranges, name, [list(band) for band in ANGLE_RANGES])
+    # 第 i 行第 j 列为第 i 个角度范围在第 j 个时间范围内的次数，与逐个调用 count_oscillations 一致
+    assert result["count"] == [
+        [api.count_oscillations(start, end, name, *band)["count"] for start, end in ANGLE_WINDOWS]
+        for band in ANGLE_RANGES
+    ]
+    assert result["角度范围"] == [list(band) for band in ANGLE_RANGES]
+    assert result["时间范围"] == time_ranges
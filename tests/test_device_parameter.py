@@ -0,0 +1,61 @@
+"""
+query_device_parameter 与原始 pandas 实现的结果对比。
+参考实现摘自改写前的 api.py，按顺序包含全部关键字的正则表达式在中文参数名中查找。
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+import api
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_PATH = os.path.join(ROOT, "database_in_use")
+
+if not os.path.isdir(DATA_PATH):
+    pytest.skip("缺少 database_in_use 数据表", allow_module_level=True)
+
+
+def reference_query_device_parameter(parameter_name_cn):
+    df = pd.read_csv(os.path.join(DATA_PATH, "设备参数详情表.csv"))
+    parameter_name_cn = ".*".join(parameter_name_cn.split(" "))
+    matched = df["Channel_Text_CN"].str.contains(parameter_name_cn)
+    if not matched.any():
+        return None
+    return df[matched]["Channel_Text_CN"].tolist()
+
+
+@pytest.mark.parametrize(
+    "parameter_name_cn",
+    ["转速", "发电机 电压", "一号柴油发电机组 转速", "一号 柴油 温度", "230V 绝缘", "停泊/应急", "主配电板B排"],
+)
+def test_query_device_parameter(parameter_name_cn):
+    expected = reference_query_device_parameter(parameter_name_cn)
+    actual = api.query_device_parameter(parameter_name_cn)
+    assert [parameter_info["参数中文名"] for parameter_info in actual] == expected
+    assert all("匹配度" not in parameter_info for parameter_info in actual)
+
+
+def test_query_device_parameter_by_english_name():
+    actual = api.query_device_parameter("DG1 Active Power")
+    assert [parameter_info["参数名"] for parameter_info in actual] == ["DG1 Active Power"]
+
+
+@pytest.mark.parametrize("parameter_name", ["主推 功率", "舵桨 温度"])
+def test_query_device_parameter_fuzzy_without_match(parameter_name):
+    # 只有部分关键字相近的参数不算匹配，返回原来的提示
+    assert api.query_device_parameter(parameter_name) == {
+        "result": f"未找到包含 '{'.*'.join(parameter_name.split())}' 的参数，请减少关键字再查询。"
+    }
+
+
+def test_query_device_parameter_fuzzy_matches_every_keyword():
+    actual = api.query_device_parameter("二号发电机 转速")
+    assert actual[0]["参数中文名"] == "二号柴油发电机组转速"
+    for parameter in actual:
+        # 每个关键字都至少命中一个二元组
+        assert "转速" in parameter["参数中文名"]
+        assert any(gram in parameter["参数中文名"] for gram in ("二号", "号发", "发电", "电机"))
+        assert 0.5 <= parameter["匹配度"] <= 1
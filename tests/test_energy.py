@@ -0,0 +1,192 @@
+"""
+能耗积分与原始 pandas 实现的结果对比。
+参考实现摘自改写前的 api.py，直接读取 database_in_use 下的 CSV 文件计算。
+"""
+
+import os
+from fractions import Fraction
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import api
+from indexes import IntegralIndex, integral_index
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_PATH = os.path.join(ROOT, "database_in_use")
+
+if not os.path.isdir(DATA_PATH):
+    pytest.skip("缺少 database_in_use 数据表", allow_module_level=True)
+
+
+def read_table(table_name):
+    df = pd.read_csv(os.path.join(DATA_PATH, f"{table_name}.csv"))
+    df["csvTime"] = pd.to_datetime(df["csvTime"])
+    return df
+
+
+def reference_total_energy(start_time, end_time, table_name, power_column):
+    df = read_table(table_name)
+    filtered_data = df[(df["csvTime"] >= start_time) & (df["csvTime"] < end_time)].copy()
+    if filtered_data.empty:
+        return None
+    diff_seconds = filtered_data["csvTime"].diff().dt.total_seconds().shift(-1)
+    return round((diff_seconds * filtered_data[power_column] / 3600).sum(), 2)
+
+
+def reference_rudder_energy(start_time, end_time):
+    files_and_columns = {
+        "一号舵桨A": ("device_1_2_meter_102", "1-2-6_v"),
+        "一号舵桨B": ("device_1_3_meter_103", "1-3-6_v"),
+        "二号舵桨A": ("device_13_2_meter_1302", "13-2-6_v"),
+        "二号舵桨B": ("device_13_3_meter_1303", "13-3-6_v"),
+    }
+    energy_results = {}
+    for rudder_name, (table_name, power_column) in files_and_columns.items():
+        df = read_table(table_name)
+        df = df[df["csvTime"] >= pd.to_datetime(start_time)]
+        df = df[df["csvTime"] < pd.to_datetime(end_time)]
+        if df.empty:
+            energy_results[rudder_name] = 0.00
+            continue
+        energy_results[rudder_name] = round((df[power_column] / 60).sum(), 2)
+    energy_results["总能耗"] = round(sum(energy_results.values()), 2)
+    return energy_results
+
+
+WINDOWS = [
+    ("2024-05-16 00:00:00", "2024-05-17 00:00:00"),
+    ("2024-08-15 00:00:00", "2024-08-16 00:00:00"),
+    ("2024-08-23 07:30:00", "2024-08-23 19:45:30"),
+    ("2024-08-15 16:12:00", "2024-08-15 16:12:00"),
+    ("2024-06-01 00:00:00", "2024-07-01 00:00:00"),
+    ("2025-01-01 00:00:00", "2025-01-02 00:00:00"),
+]
+
+DEVICES = {
+    "折臂吊车": ("device_13_11_meter_1311", "13-11-6_v"),
+    "一号门架": ("device_1_5_meter_105", "1-5-6_v"),
+    "二号门架": ("device_13_14_meter_1314", "13-14-6_v"),
+    "绞车": ("device_1_15_meter_115", "1-15-6_v"),
+}
+
+
+@pytest.mark.parametrize("start_time,end_time", WINDOWS)
+@pytest.mark.parametrize("device_name", list(DEVICES))
+def test_calculate_total_energy(device_name, start_time, end_time):
+    expected = reference_total_energy(start_time, end_time, *DEVICES[device_name])
+    assert api.calculate_total_energy(start_time, end_time, device_name) == expected
+
+
+@pytest.mark.parametrize("start_time,end_time", WINDOWS)
+def test_calculate_total_rudder_energy(start_time, end_time):
+    assert api.calculate_total_rudder_energy(start_time, end_time) == reference_rudder_energy(start_time, end_time)
+
+
+def exact_integral(start_time, end_time, table_name, column):
+    # 按 CSV 中的十进制文本精确求左黎曼和
+    df = pd.read_csv(os.path.join(DATA_PATH, f"{table_name}.csv"), dtype={column: str})
+    df["csvTime"] = pd.to_datetime(df["csvTime"])
+    df = df[(df["csvTime"] >= pd.to_datetime(start_time)) & (df["csvTime"] < pd.to_datetime(end_time))]
+    if df.empty:
+        return None
+    seconds = df["csvTime"].diff().dt.total_seconds().shift(-1).iloc[:-1]
+    values = df[column].iloc[:-1]
+    total = sum(
+        (Fraction(int(second)) * Fraction(value) for second, value in zip(seconds, values) if isinstance(value, str)),
+        Fraction(0),
+    )
+    return total / 3600
+
+
+@pytest.mark.parametrize("start_time,end_time", WINDOWS + [("2024-05-01 00:00:00", "2024-10-01 00:00:00")])
+@pytest.mark.parametrize(
+    "table_name,column",
+    [("Port3_ksbg_8", "P3_15"), ("Port1_ksbg_1", "P1_3"), ("device_13_14_meter_1314", "13-14-6_v")],
+)
+def test_integral_index_is_exact(table_name, column, start_time, end_time):
+    expected = exact_integral(start_time, end_time, table_name, column)
+    actual = integral_index(os.path.join(DATA_PATH, f"{table_name}.csv"), [column]).window_integral(
+        pd.to_datetime(start_time), pd.to_datetime(end_time)
+    )
+    if expected is None:
+        assert actual is None
+    else:
+        # 精确和只做一次除法，结果是最接近精确值的浮点数
+        assert actual[0] == float(expected)
+
+
+def test_integral_index_decimal_values():
+    times = pd.date_range("2024-08-15", periods=100_000, freq="min").to_numpy()
+    values = np.full((len(times), 2), [0.1, 12.3456])
+    index = IntegralIndex(times, values, sample_seconds=60)
+    for lo, hi in [(0, len(times)), (12_345, 98_765), (50_000, 50_001)]:
+        assert index.integral(lo, hi).tolist() == [
+            float(Fraction("0.1") * 60 * (hi - lo) / 3600),
+            float(Fraction("12.3456") * 60 * (hi - lo) / 3600),
+        ]
+
+
+def reference_group_integral(start_time, end_time, devices):
+    results = {}
+    for device_name, (table_name, column) in devices.items():
+        df = read_table(table_name)
+        df = df[(df["csvTime"] >= start_time) & (df["csvTime"] < end_time)]
+        if df.empty:
+            return None
+        diff_seconds = df["csvTime"].diff().dt.total_seconds().shift(-1)
+        results[device_name] = (diff_seconds * df[column] / 3600).sum()
+    return results
+
+
+@pytest.mark.parametrize("start_time,end_time", WINDOWS)
+@pytest.mark.parametrize("group", ["甲板机械", "推进系统", "发电机", "燃油"])
+def test_calculate_group_integral(group, start_time, end_time):
+    config = api.INTEGRAL_GROUPS[group]
+    devices = {device: (table_name, column) for device, (table_name, column, _) in config["devices"].items()}
+    expected = reference_group_integral(start_time, end_time, devices)
+    actual = api.calculate_group_integral(start_time, end_time, group)
+    if expected is None:
+        assert actual is None
+        return
+    # 各设备的积分不做舍入，合计值舍入到两位小数
+    assert {device: round(actual[device], 2) for device in devices} == {
+        device: round(value, 2) for device, value in expected.items()
+    }
+    assert actual[config["total_key"]] == round(sum(expected.values()), 2)
+
+
+def test_calculate_group_integral_by_time_ranges():
+    time_ranges = [
+        {"start_time": "2024-08-23 07:30:00", "end_time": "2024-08-23 19:45:30"},
+        {"作业开始": "2024-05-16 00:00:00", "作业结束": "2024-05-17 00:00:00"},
+        ["2025-01-01 00:00:00", "2025-01-02 00:00:00"],
+        ("2024-08-15 16:12:00", "2024-08-15 16:12:00"),
+    ]
+    result = api.calculate_group_integral_by_time_ranges(time_ranges, "发电机")
+
+    # 每个时间范围的结果与单独调用 calculate_group_integral 一致
+    singles = [
+        api.calculate_group_integral(*api._parse_time_range(time_range), "发电机") for time_range in time_ranges
+    ]
+    assert [segment["结果"] for segment in result["分段结果"]] == singles
+    assert [(segment["开始时间"], segment["结束时间"]) for segment in result["分段结果"]] == [
+        api._parse_time_range(time_range) for time_range in time_ranges
+    ]
+
+    # 合计为所有非空时间范围之和
+    devices = list(api.INTEGRAL_GROUPS["发电机"]["devices"])
+    valid = [single for single in singles if single is not None]
+    for device in devices:
+        assert result["合计"][device] == round(sum(single[device] for single in valid), 2)
+    assert result["合计"]["总能耗"] == round(sum(single[device] for single in valid for device in devices), 2)
+    assert result["合计"]["无数据时间段数"] == len(singles) - len(valid)
+
+
+def test_calculate_group_integral_by_time_ranges_rejects_bad_input():
+    with pytest.raises(ValueError):
+        api.calculate_group_integral_by_time_ranges([["2024-08-23 07:30:00"]], "发电机")
+    with pytest.raises(ValueError):
+        api.calculate_group_integral_by_time_ranges([], "未知设备组")
@@ -0,0 +1,170 @@
+"""
+大模型回复缓存的各模式与回放。
+用返回固定回复的假客户端代替智谱接口，不需要网络与 API_KEY。
+"""
+
+import asyncio
+
+import pytest
+from openai.types.chat import ChatCompletion
+from zhipuai.types.chat.chat_completion import Completion
+
+import llm_cache
+from llm_cache import LLMCache, LLMCacheMiss, cached_completion, cached_completion_async, request_fingerprint
+
+
+MODEL = "glm-4-plus"
+MESSAGES = [{"role": "user", "content": "2024/08/15 A架的作业时间是多久？"}]
+
+
+def completion_data(content, finish_reason="stop"):
+    return {
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 1723680000,
+        "model": MODEL,
+        "choices": [
+            {"index": 0, "finish_reason": finish_reason, "message": {"role": "assistant", "content": content}}
+        ],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 2, "total_tokens": 12},
+    }
+
+
+class FakeCompletions:
+    def __init__(self, response):
+        self.response = response
+        self.calls = 0
+
+    def create(self, model, messages, **params):
+        self.calls += 1
+        return self.response
+
+
+class FakeAsyncCompletions(FakeCompletions):
+    async def create(self, model, messages, **params):
+        return super().create(model, messages, **params)
+
+
+class FakeClient:
+    def __init__(self, completions):
+        self.chat = type("Chat", (), {"completions": completions})()
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    yield str(tmp_path / "llm_cache.sqlite3")
+    llm_cache.configure_llm_cache("off")
+
+
+def test_request_fingerprint():
+    key = request_fingerprint(MODEL, MESSAGES)
+    assert key == request_fingerprint(MODEL, [dict(reversed(list(MESSAGES[0].items())))])
+    # 值为 None 的字段不参与指纹
+    assert key == request_fingerprint(MODEL, [{**MESSAGES[0], "tool_calls": None}])
+    assert key == request_fingerprint(MODEL, MESSAGES, tools=[])
+    assert key != request_fingerprint("glm-4-flash", MESSAGES)
+    assert key != request_fingerprint(MODEL, MESSAGES, tools=[{"type": "function"}])
+    assert key != request_fingerprint(MODEL, [{**MESSAGES[0], "content": "2024/08/16"}])
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        LLMCache(mode="write_only")
+
+
+def test_off_mode(cache_path):
+    cache = LLMCache(cache_path, "off")
+    assert not cache.enabled
+    cache.put("key", MODEL, Completion.model_validate(completion_data("a")))
+    assert cache.get("key") is None
+
+
+def test_read_through_mode(cache_path):
+    cache = LLMCache(cache_path, "read_through")
+    assert cache.get("key") is None
+    cache.put("key", MODEL, Completion.model_validate(completion_data("a")))
+    assert cache.get("key")["choices"][0]["message"]["content"] == "a"
+    assert cache.stats() == {"mode": "read_through", "hits": 1, "misses": 1}
+    cache.close()
+
+
+def test_record_then_replay(cache_path):
+    record = LLMCache(cache_path, "record")
+    record.put("key", MODEL, Completion.model_validate(completion_data("a")))
+    # record 模式总是请求大模型，并覆盖旧回复
+    assert record.get("key") is None
+    record.put("key", MODEL, Completion.model_validate(completion_data("b")))
+    record.close()
+
+    replay = LLMCache(cache_path, "replay")
+    assert replay.get("key")["choices"][0]["message"]["content"] == "b"
+    with pytest.raises(LLMCacheMiss):
+        replay.get("other")
+    # replay 模式不写入
+    replay.put("other", MODEL, Completion.model_validate(completion_data("c")))
+    with pytest.raises(LLMCacheMiss):
+        replay.get("other")
+    replay.close()
+
+
+def test_cached_completion(cache_path):
+    completions = FakeCompletions(Completion.model_validate(completion_data("a")))
+    client = FakeClient(completions)
+
+    llm_cache.configure_llm_cache("read_through", cache_path)
+    first = cached_completion(client, MODEL, MESSAGES)
+    second = cached_completion(client, MODEL, MESSAGES)
+    assert completions.calls == 1
+    assert isinstance(second, Completion)
+    assert second.choices[0].message.content == first.choices[0].message.content == "a"
+
+    llm_cache.configure_llm_cache("replay", cache_path)
+    assert cached_completion(client, MODEL, MESSAGES).choices[0].message.content == "a"
+    assert completions.calls == 1
+    with pytest.raises(LLMCacheMiss):
+        cached_completion(client, MODEL, [{"role": "user", "content": "未录制的问题"}])
+
+    llm_cache.configure_llm_cache("off", cache_path)
+    cached_completion(client, MODEL, MESSAGES)
+    assert completions.calls == 2
+
+
+def test_cached_completion_async(cache_path):
+    completions = FakeAsyncCompletions(ChatCompletion.model_validate(completion_data("a")))
+    client = FakeClient(completions)
+
+    llm_cache.configure_llm_cache("read_through", cache_path)
+    asyncio.run(cached_completion_async(client, MODEL, MESSAGES))
+    second = asyncio.run(cached_completion_async(client, MODEL, MESSAGES))
+    assert completions.calls == 1
+    assert isinstance(second, ChatCompletion)
+    assert second.choices[0].message.content == "a"
+
+
+def test_replay_across_clients(cache_path):
+    # 同步客户端录制的智谱回复没有 object 字段，回放给异步客户端时需要补全
+    recorded = completion_data("a", finish_reason="sensitive")
+    del recorded["object"]
+    llm_cache.configure_llm_cache("record", cache_path)
+    cached_completion(FakeClient(FakeCompletions(Completion.model_validate(recorded))), MODEL, MESSAGES)
+
+    llm_cache.configure_llm_cache("replay", cache_path)
+    replayed = asyncio.run(cached_completion_async(FakeClient(FakeAsyncCompletions(None)), MODEL, MESSAGES))
+    assert isinstance(replayed, ChatCompletion)
+    assert replayed.choices[0].finish_reason == "content_filter"
+
+    # 异步客户端录制的回复可能没有 usage，回放给同步客户端时需要补全
+    recorded = completion_data("b")
+    recorded["usage"] = None
+    llm_cache.configure_llm_cache("record", cache_path)
+    asyncio.run(
+        cached_completion_async(
+            FakeClient(FakeAsyncCompletions(ChatCompletion.model_validate(recorded))), MODEL, MESSAGES
+        )
+    )
+
+    llm_cache.configure_llm_cache("replay", cache_path)
+    replayed = cached_completion(FakeClient(FakeCompletions(None)), MODEL, MESSAGES)
+    assert isinstance(replayed, Completion)
+    assert replayed.choices[0].message.content == "b"
+    assert replayed.usage.total_tokens == 0
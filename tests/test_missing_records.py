@@ -0,0 +1,99 @@
+"""
+find_missing_records 与原始 pandas 实现的结果对比。
+参考实现摘自改写前的 api.py，用 pd.date_range(freq='min') 生成完整的分钟序列后逐个查找。
+"""
+
+import functools
+import os
+
+import pandas as pd
+import pytest
+
+import api
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_PATH = os.path.join(ROOT, "database_in_use")
+
+if not os.path.isdir(DATA_PATH):
+    pytest.skip("缺少 database_in_use 数据表", allow_module_level=True)
+
+
+@functools.lru_cache(maxsize=None)
+def existing_times(table_name):
+    df = pd.read_csv(os.path.join(DATA_PATH, f"{table_name}.csv"), parse_dates=["csvTime"])
+    return frozenset(df["csvTime"].dt.strftime("%Y-%m-%d %H:%M"))
+
+
+def reference_missing_minutes(table_name, start_time, end_time):
+    full_time_range = pd.date_range(start=pd.to_datetime(start_time), end=pd.to_datetime(end_time), freq="min")
+    return [t for t in full_time_range if t.strftime("%Y-%m-%d %H:%M") not in existing_times(table_name)]
+
+
+def reference_missing_by_day(table_name, start_time, end_time):
+    full_time_range = pd.date_range(start=pd.to_datetime(start_time), end=pd.to_datetime(end_time), freq="min")
+    result = dict.fromkeys(full_time_range.strftime("%Y-%m-%d"), 0)
+    for t in reference_missing_minutes(table_name, start_time, end_time):
+        result[t.strftime("%Y-%m-%d")] += 1
+    return result
+
+
+def reference_missing_gaps(table_name, start_time, end_time):
+    gaps = []
+    for t in reference_missing_minutes(table_name, start_time, end_time):
+        if gaps and t - gaps[-1][1] == pd.Timedelta(minutes=1):
+            gaps[-1][1] = t
+            gaps[-1][2] += 1
+        else:
+            gaps.append([t, t, 1])
+    return [
+        {"start": start.strftime("%Y-%m-%d %H:%M"), "end": end.strftime("%Y-%m-%d %H:%M"), "minutes": minutes}
+        for start, end, minutes in gaps
+    ]
+
+
+TABLES = ["Ajia_plc_1", "device_13_11_meter_1311", "Port3_ksbg_9"]
+
+WINDOWS = [
+    ("2024-05-16 00:00:00", "2024-05-17 00:00:00"),
+    ("2024-08-15 07:30:30", "2024-08-15 19:45:10"),
+    ("2024-08-22 12:00:00", "2024-08-25 00:00:00"),
+    ("2024-08-15 16:12:00", "2024-08-15 16:12:00"),
+    ("2024-09-14 20:00:00", "2024-09-16 00:00:00"),
+    ("2025-01-01 00:00:00", "2025-01-02 00:00:00"),
+]
+
+
+@pytest.mark.parametrize("start_time,end_time", WINDOWS)
+@pytest.mark.parametrize("table_name", TABLES)
+def test_find_missing_records(table_name, start_time, end_time):
+    expected = len(reference_missing_minutes(table_name, start_time, end_time))
+    assert api.find_missing_records(table_name, start_time, end_time) == {"missing_count": expected}
+
+
+@pytest.mark.parametrize("start_time,end_time", WINDOWS)
+@pytest.mark.parametrize("table_name", TABLES)
+def test_find_missing_records_by_day(table_name, start_time, end_time):
+    result = api.find_missing_records(table_name, start_time, end_time, by_day=True)
+    assert result["missing_by_day"] == reference_missing_by_day(table_name, start_time, end_time)
+    assert sum(result["missing_by_day"].values()) == result["missing_count"]
+
+
+@pytest.mark.parametrize("start_time,end_time", WINDOWS)
+@pytest.mark.parametrize("table_name", TABLES)
+def test_find_missing_records_with_gaps(table_name, start_time, end_time):
+    expected = reference_missing_gaps(table_name, start_time, end_time)
+    result = api.find_missing_records(table_name, start_time, end_time, with_gaps=True)
+    assert result["gap_count"] == len(expected)
+    assert result["missing_gaps"] == expected[: api.MISSING_GAPS_LIMIT]
+    assert sum(gap["minutes"] for gap in result["missing_gaps"]) <= result["missing_count"]
+
+
+def test_find_missing_records_caps_gaps():
+    # 整个航次内有数百个缺失段，只返回最早的若干段
+    start_time, end_time = "2024-05-01 00:00:00", "2024-10-01 00:00:00"
+    expected = reference_missing_gaps("Ajia_plc_1", start_time, end_time)
+    result = api.find_missing_records("Ajia_plc_1", start_time, end_time, with_gaps=True)
+    assert len(expected) > api.MISSING_GAPS_LIMIT
+    assert result["gap_count"] == len(expected)
+    assert result["missing_gaps"] == expected[: api.MISSING_GAPS_LIMIT]
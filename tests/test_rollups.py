@@ -0,0 +1,123 @@
+"""
+按小时、按天汇总的查询结果与不使用汇总时（区间聚合索引、前缀积分索引）的结果对比。
+汇总由数据表直接构建，不依赖 data_process.py 预先生成的文件。
+"""
+
+import os
+
+import pytest
+
+import api
+import rollups
+from data_store import load_table
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_PATH = os.path.join(ROOT, "database_in_use")
+
+if not os.path.isdir(DATA_PATH):
+    pytest.skip("缺少 database_in_use 数据表", allow_module_level=True)
+
+
+_built = {}
+
+
+def built_rollup(table_name, freq):
+    key = (rollups.resolve_table_path(table_name), freq)
+    if key not in _built:
+        _built[key] = rollups.Rollup.from_table(load_table(table_name), freq)
+    return _built[key]
+
+
+def use_rollups(monkeypatch):
+    """
+    用由数据表构建的汇总代替预处理生成的文件，返回读取汇总的记录。
+    """
+    calls = []
+
+    def rollup(table_name, freq):
+        calls.append((rollups.resolve_table_path(table_name), freq))
+        return built_rollup(table_name, freq)
+
+    monkeypatch.setattr(rollups, "rollup", rollup)
+    return calls
+
+
+def without_rollups(monkeypatch):
+    monkeypatch.setattr(api, "aligned_rollup", lambda table_name, times: None)
+
+
+def test_aligned_rollup_picks_coarsest_granularity(monkeypatch):
+    use_rollups(monkeypatch)
+    table_name = "Port1_ksbg_3"
+    assert rollups.aligned_rollup(table_name, ["2024-08-15", "2024-08-17"]).freq == "day"
+    assert rollups.aligned_rollup(table_name, ["2024-08-15 07:00:00", "2024-08-17"]).freq == "hour"
+    assert rollups.aligned_rollup(table_name, [None, "2024-08-17"]).freq == "day"
+    assert rollups.aligned_rollup(table_name, ["2024-08-15 07:30:00", "2024-08-17"]) is None
+
+
+ALIGNED_WINDOWS = [
+    ("2024-05-16 00:00:00", "2024-05-17 00:00:00"),
+    ("2024-08-15 07:00:00", "2024-08-15 20:00:00"),
+    ("2024-08-15 16:00:00", "2024-08-15 17:00:00"),
+    ("2024-06-01 00:00:00", "2024-07-01 00:00:00"),
+    ("2024-05-01 00:00:00", "2024-10-01 00:00:00"),
+    ("2025-01-01 00:00:00", "2025-01-02 00:00:00"),
+]
+
+
+def range_statistics(table_name, columns):
+    time_ranges = [{"start_time": start, "end_time": end} for start, end in ALIGNED_WINDOWS]
+    return api.find_range_statistics(table_name, columns, time_ranges)
+
+
+@pytest.mark.parametrize(
+    "table_name,columns",
+    [
+        ("Ajia_plc_1", ["Ajia-3_v", "Ajia-5_v"]),
+        ("Port1_ksbg_3", ["P1_66", "P1_75"]),
+        ("device_13_11_meter_1311", ["13-11-6_v"]),
+    ],
+)
+def test_range_statistics_from_rollups(table_name, columns, monkeypatch):
+    without_rollups(monkeypatch)
+    expected = range_statistics(table_name, columns)
+    monkeypatch.undo()
+    calls = use_rollups(monkeypatch)
+    actual = range_statistics(table_name, columns)
+    # 对齐的时间窗口经由汇总计算
+    assert calls and all(path == rollups.resolve_table_path(table_name) for path, _ in calls)
+
+    for column in columns:
+        for a, b in zip(actual[column], expected[column]):
+            # 汇总按桶求和，与前缀和的累加顺序不同
+            assert a.pop("sum") == pytest.approx(b.pop("sum"), rel=1e-12)
+            assert a.pop("mean") == pytest.approx(b.pop("mean"), rel=1e-12, nan_ok=True)
+            assert a == b
+
+
+@pytest.mark.parametrize("start_time,end_time", ALIGNED_WINDOWS)
+@pytest.mark.parametrize("group", ["甲板机械", "推进系统", "发电机", "燃油"])
+def test_group_integral_from_rollups(group, start_time, end_time, monkeypatch):
+    without_rollups(monkeypatch)
+    expected = api.calculate_group_integral(start_time, end_time, group)
+    monkeypatch.undo()
+    calls = use_rollups(monkeypatch)
+    actual = api.calculate_group_integral(start_time, end_time, group)
+    assert calls
+    if expected is None:
+        assert actual is None
+        return
+    assert {device: round(value, 2) for device, value in actual.items()} == {
+        device: round(value, 2) for device, value in expected.items()
+    }
+
+
+@pytest.mark.parametrize("start_time,end_time", ALIGNED_WINDOWS)
+def test_rudder_energy_from_rollups(start_time, end_time, monkeypatch):
+    without_rollups(monkeypatch)
+    expected = api.calculate_total_rudder_energy(start_time, end_time)
+    monkeypatch.undo()
+    calls = use_rollups(monkeypatch)
+    assert api.calculate_total_rudder_energy(start_time, end_time) == expected
+    assert calls
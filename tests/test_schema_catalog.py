@@ -0,0 +1,48 @@
+"""
+字段注释目录与 dict.json 内容的对比。
+"""
+
+import json
+
+import pytest
+
+from schema_catalog import SCHEMA_PATH, SchemaCatalog, schema_catalog
+
+
+@pytest.fixture(scope="module")
+def tables():
+    with open(SCHEMA_PATH, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def test_schema_catalog_matches_dict_json(tables):
+    catalog = schema_catalog()
+    assert catalog is schema_catalog()
+    assert catalog.to_dict() == tables
+    assert catalog.text == str(tables)
+    for table in tables:
+        for field in table["字段列表"]:
+            assert catalog.fields[table["数据表名"]][field["字段名"]] == field["字段含义"]
+            assert table["数据表名"] in catalog.tables_with(field["字段名"])
+
+
+def test_schema_catalog_units():
+    catalog = SchemaCatalog(
+        [
+            {
+                "数据表名": "Ajia_plc_1",
+                "字段列表": [
+                    {"字段名": "Ajia-0_v", "字段含义": "A架右舷角度,单位:°"},
+                    {"字段名": "Ajia-3_v", "字段含义": "A架右舷主液压泵电流，单位：A，说明"},
+                    {"字段名": "status", "字段含义": "A架动作"},
+                ],
+            },
+            {"数据表名": "Port1_ksbg_3", "字段列表": [{"字段名": "status", "字段含义": "推进器状态"}]},
+        ]
+    )
+    assert catalog.unit("Ajia_plc_1", "Ajia-0_v") == "°"
+    assert catalog.unit("Ajia_plc_1", "Ajia-3_v") == "A"
+    assert catalog.unit("Ajia_plc_1", "status") is None
+    assert catalog.tables_with("status") == ["Ajia_plc_1", "Port1_ksbg_3"]
+    assert catalog.tables_with("未知字段") == []
+    assert catalog.tables_in("['Port1_ksbg_3']") == [catalog.tables[1]]
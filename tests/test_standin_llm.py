@@ -0,0 +1,81 @@
+"""
+本地大模型替身服务：延迟分布解析，以及脚本回复与录制回复的一次完整请求。
+"""
+
+import json
+import random
+import urllib.request
+
+import pytest
+from zhipuai import ZhipuAI
+from zhipuai.types.chat.chat_completion import Completion
+
+from llm_cache import LLMCache, request_fingerprint
+from standin_llm import parse_latency, start_server
+
+
+MODEL = "glm-4-plus"
+
+
+def test_parse_latency():
+    rng = random.Random(0)
+    assert parse_latency(None)(rng) == 0.0
+    assert parse_latency("fixed:0.5")(rng) == 0.5
+    assert all(0.2 <= parse_latency("uniform:0.2,1.5")(rng) <= 1.5 for _ in range(100))
+    assert all(parse_latency("normal:0.1,1.0")(rng) >= 0 for _ in range(100))
+    assert all(parse_latency("lognormal:1.0,0.5")(rng) > 0 for _ in range(100))
+    for spec in ("fixed", "uniform:1", "gamma:1,2", "fixed:abc"):
+        with pytest.raises(ValueError):
+            parse_latency(spec)
+
+
+@pytest.fixture
+def server(tmp_path):
+    # 录制一条回复，其余请求按默认脚本回复
+    recording = str(tmp_path / "llm_cache.sqlite3")
+    cache = LLMCache(recording, "record")
+    cache.put(
+        request_fingerprint(MODEL, [{"role": "user", "content": "录制过的问题"}]),
+        MODEL,
+        Completion.model_validate(
+            {
+                "id": "recorded",
+                "created": 1723680000,
+                "model": MODEL,
+                "choices": [
+                    {"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "录制的回答"}}
+                ],
+                "usage": {"prompt_tokens": 4, "completion_tokens": 5, "total_tokens": 9},
+            }
+        ),
+    )
+    cache.close()
+
+    server = start_server(recording=recording, latency="fixed:0.01", seed=0)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_round_trip(server):
+    client = ZhipuAI(api_key="local.standin", base_url=server.base_url)
+
+    # 脚本回复：按默认脚本返回工具调用
+    scripted = client.chat.completions.create(
+        model=MODEL, messages=[{"role": "user", "content": "现在需要回答这个问题：2024/08/15 的作业时间"}]
+    )
+    assert scripted.choices[0].finish_reason == "tool_calls"
+    tool_call = scripted.choices[0].message.tool_calls[0]
+    assert tool_call.function.name == "get_work_time"
+    assert json.loads(tool_call.function.arguments)["start_time"] == "2024-08-15 00:00:00"
+
+    # 录制回复：按请求指纹原样回放
+    recorded = client.chat.completions.create(model=MODEL, messages=[{"role": "user", "content": "录制过的问题"}])
+    assert recorded.choices[0].message.content == "录制的回答"
+
+    with urllib.request.urlopen(server.base_url + "stats") as response:
+        stats = json.load(response)
+    assert stats["requests"] == 2
+    assert stats["recorded"] == 1
+    assert stats["scripted"] == 1
+    assert stats["total_delay"] == pytest.approx(0.02)
@@ -0,0 +1,115 @@
+"""
+最小值、最大值、平均值查询与原始 pandas 实现的结果对比。
+参考实现摘自改写前的 api.py，直接读取 database_in_use 下的 CSV 文件计算。
+"""
+
+import functools
+import os
+
+import pandas as pd
+import pytest
+
+import api
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_PATH = os.path.join(ROOT, "database_in_use")
+
+if not os.path.isdir(DATA_PATH):
+    pytest.skip("缺少 database_in_use 数据表", allow_module_level=True)
+
+
+@functools.lru_cache(maxsize=None)
+def read_table(table_name):
+    return pd.read_csv(os.path.join(DATA_PATH, f"{table_name}.csv"), parse_dates=["csvTime"])
+
+
+def reference_window(start_time, end_time, table_name):
+    df = read_table(table_name)
+    return df[(df["csvTime"] >= pd.to_datetime(start_time)) & (df["csvTime"] <= pd.to_datetime(end_time))]
+
+
+COLUMNS = [
+    ("Ajia_plc_1", "Ajia-3_v"),
+    ("Ajia_plc_1", "Ajia-5_v"),
+    ("device_13_11_meter_1311", "13-11-6_v"),
+    ("Port1_ksbg_3", "P1_66"),
+    ("Port3_ksbg_9", "P3_18"),
+]
+
+WINDOWS = [
+    ("2024-05-16 00:00:00", "2024-05-17 00:00:00"),
+    ("2024-08-15 07:30:30", "2024-08-15 19:45:10"),
+    ("2024-08-15 16:12:00", "2024-08-15 16:13:00"),
+    ("2024-06-01 00:00:00", "2024-07-01 00:00:00"),
+    ("2024-05-16 00:00:00", "2024-09-15 00:00:00"),
+]
+
+EMPTY_WINDOW = ("2025-01-01 00:00:00", "2025-01-02 00:00:00")
+
+
+def non_empty(table_name, windows=WINDOWS):
+    return [window for window in windows if not reference_window(*window, table_name).empty]
+
+
+@pytest.mark.parametrize("table_name,column_name", COLUMNS)
+def test_find_min_value(table_name, column_name):
+    for start_time, end_time in non_empty(table_name):
+        df = reference_window(start_time, end_time, table_name)
+        expected = {"min_value": df[column_name].min(), "min_time": df.loc[df[column_name].idxmin(), "csvTime"]}
+        assert api.find_min_value(start_time, end_time, table_name, column_name) == expected
+
+
+@pytest.mark.parametrize("table_name,column_name", COLUMNS)
+def test_find_max_value(table_name, column_name):
+    for start_time, end_time in non_empty(table_name):
+        df = reference_window(start_time, end_time, table_name)
+        # 原实现返回的键名即为 min_value、min_time
+        expected = {"min_value": df[column_name].max(), "min_time": df.loc[df[column_name].idxmax(), "csvTime"]}
+        assert api.find_max_value(start_time, end_time, table_name, column_name) == expected
+
+
+@pytest.mark.parametrize("table_name,column_name", COLUMNS)
+def test_find_avg_value(table_name, column_name):
+    for start_time, end_time in non_empty(table_name):
+        expected = reference_window(start_time, end_time, table_name)[column_name].mean()
+        actual = api.find_avg_value(start_time, end_time, table_name, column_name)["avg_value"]
+        # 前缀和与 pandas 的累加顺序不同，只比较到相对误差 1e-12
+        assert actual == pytest.approx(expected, rel=1e-12)
+
+
+@pytest.mark.parametrize("function", [api.find_min_value, api.find_max_value])
+def test_empty_window_raises(function):
+    with pytest.raises(ValueError):
+        function(*EMPTY_WINDOW, "Port1_ksbg_3", "P1_66")
+
+
+def test_non_numeric_column():
+    start_time, end_time = WINDOWS[0]
+    df = reference_window(start_time, end_time, "Ajia_plc_1")
+    result = api.find_min_value(start_time, end_time, "Ajia_plc_1", "Ajia-0_v")
+    assert result == {"min_value": df["Ajia-0_v"].min(), "min_time": df.loc[df["Ajia-0_v"].idxmin(), "csvTime"]}
+
+
+@pytest.mark.parametrize("table_name", ["Ajia_plc_1", "Port1_ksbg_3"])
+def test_find_range_statistics(table_name):
+    columns = [column for table, column in COLUMNS if table == table_name]
+    windows = WINDOWS + [EMPTY_WINDOW]
+    time_ranges = [{"start_time": start, "end_time": end} for start, end in windows]
+    result = api.find_range_statistics(table_name, columns, time_ranges)
+
+    for column_name in columns:
+        assert len(result[column_name]) == len(windows)
+        for (start_time, end_time), statistics in zip(windows, result[column_name]):
+            df = reference_window(start_time, end_time, table_name)
+            assert (statistics["start_time"], statistics["end_time"]) == (start_time, end_time)
+            assert statistics["count"] == len(df)
+            if df.empty:
+                assert statistics["min_value"] is None and statistics["max_value"] is None
+                continue
+            assert statistics["sum"] == pytest.approx(df[column_name].sum(), rel=1e-12)
+            assert statistics["mean"] == pytest.approx(df[column_name].mean(), rel=1e-12)
+            assert statistics["min_value"] == df[column_name].min()
+            assert statistics["max_value"] == df[column_name].max()
+            assert statistics["min_time"] == df.loc[df[column_name].idxmin(), "csvTime"].strftime("%Y-%m-%d %H:%M:%S")
+            assert statistics["max_time"] == df.loc[df[column_name].idxmax(), "csvTime"].strftime("%Y-%m-%d %H:%M:%S")
@@ -0,0 +1,165 @@
+"""
+状态事件相关的工具函数与原始 pandas 实现的结果对比。
+参考实现摘自改写前的 api.py，直接读取 database_in_use 下的 CSV 文件逐行计算。
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+import api
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_PATH = os.path.join(ROOT, "database_in_use")
+
+if not os.path.isdir(DATA_PATH):
+    pytest.skip("缺少 database_in_use 数据表", allow_module_level=True)
+
+
+def read_table(table_name):
+    df = pd.read_csv(os.path.join(DATA_PATH, f"{table_name}.csv"))
+    df["csvTime"] = pd.to_datetime(df["csvTime"])
+    return df
+
+
+def reference_status_changes(start_time, end_time, table_name):
+    df = read_table(table_name)
+    filtered_data = df[
+        (df["csvTime"] >= pd.to_datetime(start_time))
+        & (df["csvTime"] <= pd.to_datetime(end_time))
+        & (df["status"] != "False")
+    ]
+    return [
+        {"csvTime": time.strftime("%Y-%m-%d %H:%M:%S"), "status": status}
+        for time, status in zip(filtered_data["csvTime"], filtered_data["status"])
+    ]
+
+
+DEVICE_TABLES = {
+    "A架": "Ajia_plc_1",
+    "折臂吊车": "device_13_11_meter_1311",
+    "定位设备": "Port3_ksbg_9",
+}
+
+WINDOWS = [
+    ("2024-05-16 00:00:00", "2024-05-17 00:00:00"),
+    ("2024-08-15 00:00:00", "2024-08-16 00:00:00"),
+    ("2024-08-23 07:30:00", "2024-08-23 19:45:30"),
+    ("2024-06-01 00:00:00", "2024-07-01 00:00:00"),
+    ("2025-01-01 00:00:00", "2025-01-02 00:00:00"),
+]
+
+
+@pytest.mark.parametrize("start_time,end_time", WINDOWS)
+@pytest.mark.parametrize("device_name", list(DEVICE_TABLES))
+def test_get_device_status_by_time_range(device_name, start_time, end_time):
+    expected = reference_status_changes(start_time, end_time, DEVICE_TABLES[device_name])
+    actual = api.get_device_status_by_time_range(start_time, end_time, device_name)
+    if not expected:
+        assert "error" in actual
+        return
+    assert actual["设备名称"] == device_name
+    assert [
+        {"csvTime": pd.Timestamp(action["csvTime"]).strftime("%Y-%m-%d %H:%M:%S"), "status": action["status"]}
+        for action in actual["正在进行的关键动作"]
+    ] == expected
+
+
+def reference_pairs(start_time, end_time, table_name, column, start_status, end_status):
+    df = read_table(table_name)
+    df_filtered = df[(df["csvTime"] >= pd.to_datetime(start_time)) & (df["csvTime"] <= pd.to_datetime(end_time))]
+    pairs = []
+    start_uptime = None
+    for _, row in df_filtered.iterrows():
+        if row[column] == start_status:
+            start_uptime = row["csvTime"]
+        elif row[column] == end_status and start_uptime is not None:
+            pairs.append((start_uptime, row["csvTime"]))
+            start_uptime = None
+    return pairs
+
+
+def reference_uptime(start_time, end_time, table_name, start_status, end_status):
+    pairs = reference_pairs(start_time, end_time, table_name, "status", start_status, end_status)
+    total_duration = sum((end - start for start, end in pairs), pd.Timedelta(0))
+    return {
+        "开机次数": len(pairs),
+        "总开机时长": int(total_duration.total_seconds() / 60),
+        "开机时长列表": [
+            {f"第{i}次开机时长": int((end - start).total_seconds() / 60)}
+            for i, (start, end) in enumerate(pairs, start=1)
+        ],
+    }
+
+
+UPTIME_DEVICES = {
+    "折臂吊车": ("device_13_11_meter_1311", "折臂吊车开机", "折臂吊车关机"),
+    "A架": ("Ajia_plc_1", "开机", "关机"),
+    "DP": ("Port3_ksbg_9", "ON_DP", "OFF_DP"),
+}
+
+
+@pytest.mark.parametrize("start_time,end_time", WINDOWS)
+@pytest.mark.parametrize("device_name", list(UPTIME_DEVICES))
+def test_calculate_uptime(device_name, start_time, end_time):
+    expected = reference_uptime(start_time, end_time, *UPTIME_DEVICES[device_name])
+    assert api.calculate_uptime(start_time, end_time, device_name) == expected
+
+
+def test_calculate_uptime_unknown_device():
+    assert "result" in api.calculate_uptime(*WINDOWS[0], "未知设备")
+
+
+@pytest.mark.parametrize("start_time,end_time", WINDOWS)
+def test_compute_operational_duration(start_time, end_time):
+    pairs = reference_pairs(start_time, end_time, "Ajia_plc_1", "check_current_presence", "有电流", "无电流")
+    seconds = sum((end - start for start, end in pairs), pd.Timedelta(0)).total_seconds()
+    expected = (
+        f"运行时长：{seconds}秒",
+        f"运行时长：{int(seconds / 60)}分钟",
+        f"运行时长：{int(seconds // 3600):02d}小时{int((seconds % 3600) // 60):02d}分钟",
+    )
+    assert api.compute_operational_duration(start_time, end_time) == expected
+
+
+def reference_work_time(start_time, end_time):
+    time_section = []
+    for table_name, start_status, end_status in (
+        ("Ajia_plc_1", "开机", "关机"),
+        ("Port3_ksbg_9", "ON_DP", "OFF_DP"),
+    ):
+        if not reference_status_changes(start_time, end_time, table_name):
+            return {"result": "没有进行作业。"}
+        time_section.extend(reference_pairs(start_time, end_time, table_name, "status", start_status, end_status))
+    time_section.sort(key=lambda x: x[0])
+
+    merged_time_section = []
+    current_start, current_end = time_section[0]
+    for start, end in time_section[1:]:
+        if start <= current_end:
+            current_end = max(current_end, end)
+        else:
+            merged_time_section.append({"作业开始": current_start, "作业结束": current_end})
+            current_start, current_end = start, end
+    merged_time_section.append({"作业开始": current_start, "作业结束": current_end})
+    return merged_time_section
+
+
+@pytest.mark.parametrize(
+    "start_time,end_time",
+    [
+        ("2024-05-16 00:00:00", "2024-05-17 00:00:00"),
+        ("2024-08-15 00:00:00", "2024-08-16 00:00:00"),
+        ("2024-08-23 00:00:00", "2024-08-24 00:00:00"),
+        ("2025-01-01 00:00:00", "2025-01-02 00:00:00"),
+    ],
+)
+def test_get_work_time(start_time, end_time):
+    assert api.get_work_time(start_time, end_time) == reference_work_time(start_time, end_time)
+
+
+def test_get_work_time_without_pairs():
+    # A架在该时间段内只有动作记录，没有成对的开机、关机状态
+    assert api.get_work_time("2024-08-24 09:00:00", "2024-08-24 12:00:00") == {"result": "没有进行作业。"}
@@ -0,0 +1,144 @@
+"""
+get_table_data 与原始 pandas 实现的结果对比。
+参考实现摘自改写前的 api.py，直接读取 database_in_use 下的 CSV 文件筛选。
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+import api
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_PATH = os.path.join(ROOT, "database_in_use")
+
+if not os.path.isdir(DATA_PATH):
+    pytest.skip("缺少 database_in_use 数据表", allow_module_level=True)
+
+
+def read_table(table_name):
+    df = pd.read_csv(os.path.join(DATA_PATH, f"{table_name}.csv"))
+    df["csvTime"] = pd.to_datetime(df["csvTime"])
+    return df
+
+
+def reference_get_table_data(table_name, start_time, end_time, columns=None, status=None):
+    df = read_table(table_name)
+    start_time = pd.to_datetime(start_time)
+    end_time = pd.to_datetime(end_time)
+    if start_time.minute == end_time.minute and start_time.hour == end_time.hour and start_time.day == end_time.day:
+        start_time = start_time.replace(second=0)
+        end_time = end_time.replace(second=59)
+    filtered_data = df[(df["csvTime"] >= start_time) & (df["csvTime"] <= end_time)]
+    if filtered_data.empty:
+        return None
+    if status is not None:
+        filtered_data = filtered_data[filtered_data["status"] == status]
+        if filtered_data.empty:
+            return None
+    if columns is None:
+        columns = filtered_data.columns.tolist()
+    result = {}
+    for column in columns:
+        if column == "csvTime":
+            result[column] = filtered_data[column].dt.strftime("%Y-%m-%d %H:%M:%S").tolist()
+        else:
+            result[column] = filtered_data[column].values.tolist()
+    return result
+
+
+WINDOWS = [
+    ("2024-05-16 00:00:00", "2024-05-17 00:00:00"),
+    ("2024-08-15 00:00:00", "2024-08-16 00:00:00"),
+    ("2024-08-23 07:30:00", "2024-08-23 19:45:30"),
+    ("2024-08-15 16:12:00", "2024-08-15 16:12:00"),
+    ("2024-06-01 00:00:00", "2024-07-01 00:00:00"),
+    ("2025-01-01 00:00:00", "2025-01-02 00:00:00"),
+]
+
+
+@pytest.mark.parametrize("start_time,end_time", WINDOWS)
+@pytest.mark.parametrize(
+    "table_name,columns,status",
+    [
+        ("Ajia_plc_1", None, None),
+        ("Ajia_plc_1", ["csvTime", "status"], "开机"),
+        ("device_13_11_meter_1311", ["csvTime", "13-11-6_v"], None),
+        ("Port3_ksbg_9", ["csvTime", "status"], "ON_DP"),
+    ],
+)
+def test_get_table_data(table_name, start_time, end_time, columns, status):
+    expected = reference_get_table_data(table_name, start_time, end_time, columns, status)
+    actual = api.get_table_data(table_name, start_time, end_time, columns, status, max_points=None)
+    if expected is None:
+        assert "error" in actual
+    else:
+        assert actual["result"] == expected
+
+
+def test_get_table_data_pages_cover_full_result():
+    start_time, end_time = "2024-08-15 00:00:00", "2024-08-16 00:00:00"
+    expected = reference_get_table_data("Ajia_plc_1", start_time, end_time)
+    pages, cursor = [], 0
+    while cursor is not None:
+        page = api.get_table_data("Ajia_plc_1", start_time, end_time, max_points=200, cursor=cursor)
+        pages.append(page["result"])
+        cursor = page["metadata"]["next_cursor"]
+    assert {column: sum((page[column] for page in pages), []) for column in expected} == expected
+
+
+def test_get_table_data_reports_bad_input():
+    window = WINDOWS[1]
+    assert "error" in api.get_table_data("不存在的数据表", *window)
+    assert "error" in api.get_table_data("Ajia_plc_1", *window, columns=["csvTime", "不存在的列"])
+    # 没有状态列的数据表按状态筛选
+    actual = api.get_table_data("Port1_ksbg_3", *window, columns=["csvTime", "P1_66"], status="开机")
+    assert actual == {
+        "error": "列名 ['status'] 在数据表 Port1_ksbg_3 中不存在",
+        "metadata": {
+            "table_name": "Port1_ksbg_3",
+            "start_time": window[0],
+            "end_time": window[1],
+            "columns": ["csvTime", "P1_66"],
+            "status": "开机",
+        },
+    }
+
+
+def test_get_table_data_downsamples_long_windows():
+    start_time, end_time = "2024-08-15 00:00:00", "2024-08-16 00:00:00"
+    columns = ["csvTime", "Ajia-3_v", "Ajia-5_v"]
+    expected = reference_get_table_data("Ajia_plc_1", start_time, end_time, columns)
+    actual = api.get_table_data("Ajia_plc_1", start_time, end_time, columns, max_points=50)
+
+    assert actual["metadata"]["downsampled"]
+    assert actual["metadata"]["total_rows"] == len(expected["csvTime"])
+    assert actual["metadata"]["returned_rows"] == len(actual["result"]["csvTime"]) <= 50
+    # 降采样保留各列的最值所在记录
+    for column in columns[1:]:
+        assert min(actual["result"][column]) == min(expected[column])
+        assert max(actual["result"][column]) == max(expected[column])
+        assert actual["summary"][column]["count"] == len(expected[column])
+    assert set(actual["result"]["csvTime"]) <= set(expected["csvTime"])
+
+
+@pytest.mark.parametrize("max_points", [1, 2, 3, 7])
+def test_get_table_data_downsample_respects_small_limits(max_points):
+    # 数值列较多时每桶的最值个数超过 max_points，结果仍不超过上限
+    start_time, end_time = "2024-08-15 00:00:00", "2024-08-16 00:00:00"
+    columns = ["csvTime", "Ajia-0_v", "Ajia-1_v", "Ajia-2_v", "Ajia-3_v", "Ajia-5_v"]
+    actual = api.get_table_data("Ajia_plc_1", start_time, end_time, columns, max_points=max_points)
+    assert actual["metadata"]["downsampled"]
+    assert actual["metadata"]["returned_rows"] == len(actual["result"]["csvTime"]) <= max_points
+    assert actual["result"]["csvTime"] == sorted(actual["result"]["csvTime"])
+
+
+@pytest.mark.parametrize("max_points", [0, -5, "100"])
+def test_get_table_data_rejects_bad_max_points(max_points):
+    window = WINDOWS[1]
+    for cursor in (None, 0):
+        actual = api.get_table_data("Ajia_plc_1", *window, max_points=max_points, cursor=cursor)
+        assert "error" in actual
+        assert "result" not in actual
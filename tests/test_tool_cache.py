@@ -0,0 +1,101 @@
+"""
+跨问题共享的工具调用结果缓存。
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import tool_cache
+from tool_cache import ToolResultCache, canonical_arguments
+
+
+def get_work_time(start_time, end_time, device="A架"):
+    return {"device": device, "start_time": start_time, "end_time": end_time, "sections": []}
+
+
+def test_canonical_arguments():
+    expected = canonical_arguments(get_work_time, {"start_time": "a", "end_time": "b"})
+    assert canonical_arguments(get_work_time, {"end_time": "b", "start_time": "a"}) == expected
+    assert canonical_arguments(get_work_time, {"start_time": "a", "end_time": "b", "device": "A架"}) == expected
+    assert canonical_arguments(get_work_time, {"start_time": "a", "end_time": "b", "device": "DP"}) != expected
+    # 参数与函数签名不符时不缓存
+    assert canonical_arguments(get_work_time, {"start_time": "a"}) is None
+    assert canonical_arguments(get_work_time, {"start_time": "a", "end_time": "b", "side": "左舷"}) is None
+
+
+def test_call_returns_cached_copy():
+    calls = []
+
+    def function(start_time, end_time, device="A架"):
+        calls.append(start_time)
+        return get_work_time(start_time, end_time, device)
+
+    cache = ToolResultCache()
+    first = cache.call("get_work_time", function, {"start_time": "a", "end_time": "b"})
+    first["sections"].append("调用方的修改")
+    second = cache.call("get_work_time", function, {"end_time": "b", "start_time": "a", "device": "A架"})
+    assert len(calls) == 1
+    assert second == get_work_time("a", "b")
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1, "evictions": 0}
+
+
+def test_lru_eviction():
+    cache = ToolResultCache(max_entries=2)
+    for start_time in ("a", "b", "a", "c"):
+        cache.call("get_work_time", get_work_time, {"start_time": start_time, "end_time": "z"})
+    # 最近使用过的 a 保留，最久未使用的 b 被淘汰
+    assert cache.stats() == {"entries": 2, "hits": 1, "misses": 3, "evictions": 1}
+    cache.call("get_work_time", get_work_time, {"start_time": "a", "end_time": "z"})
+    cache.call("get_work_time", get_work_time, {"start_time": "b", "end_time": "z"})
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 4
+
+
+def test_errors_are_not_cached():
+    calls = []
+
+    def function(start_time, end_time):
+        calls.append(start_time)
+        raise ValueError("数据表不存在")
+
+    cache = ToolResultCache()
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            cache.call("get_work_time", function, {"start_time": "a", "end_time": "b"})
+    assert len(calls) == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_concurrent_calls_run_once():
+    calls = []
+    lock = threading.Lock()
+
+    def function(start_time, end_time):
+        with lock:
+            calls.append(start_time)
+        time.sleep(0.2)
+        return {"start_time": start_time}
+
+    cache = ToolResultCache()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(
+            executor.map(
+                lambda _: cache.call("get_work_time", function, {"start_time": "a", "end_time": "b"}), range(8)
+            )
+        )
+    assert calls == ["a"]
+    assert results == [{"start_time": "a"}] * 8
+
+
+def test_configure_tool_cache():
+    try:
+        assert tool_cache.configure_tool_cache(0) is None
+        assert tool_cache.tool_cache() is None
+        cache = tool_cache.configure_tool_cache(16)
+        assert tool_cache.tool_cache() is cache
+        assert cache.max_entries == 16
+    finally:
+        tool_cache.configure_tool_cache(None)
@@ -0,0 +1,123 @@
+import copy
+import inspect
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+# 批量运行时缓存的工具调用结果条数
+TOOL_CACHE_MAX_ENTRIES = 1024
+
+
+def canonical_arguments(function, args):
+    """
+    工具调用参数的规范形式：补全默认参数后按参数名排序的 JSON，
+    省略默认参数与显式传入默认值、参数顺序不同的调用得到相同的结果。
+    Args:
+        function (callable): 工具函数。
+        args (dict): 模型给出的参数。
+    Returns:
+        str: 规范化的参数；参数与函数签名不符时返回 None。
+    """
+    try:
+        bound = inspect.signature(function).bind(**args)
+    except TypeError:
+        return None
+    bound.apply_defaults()
+    return json.dumps(bound.arguments, ensure_ascii=False, sort_keys=True, default=str)
+
+
+class ToolResultCache:
+    """
+    跨问题共享的工具调用结果缓存，键为 (函数名, 规范化的参数)，按条数进行 LRU 淘汰。
+    多个问题同时以相同参数调用时，只有一个线程执行工具函数，其余线程等待结果。
+    执行出错的调用不缓存。
+    """
+
+    def __init__(self, max_entries=TOOL_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # (函数名, 参数) -> Future
+        self._lock = threading.Lock()
+
+    def call(self, function_name, function, args):
+        """
+        执行工具函数，相同的调用直接返回缓存的结果。
+        Args:
+            function_name (str): 工具函数名。
+            function (callable): 工具函数。
+            args (dict): 模型给出的参数。
+        Returns:
+            object: 工具函数的返回值（副本，调用方修改不影响缓存）。
+        """
+        arguments = canonical_arguments(function, args)
+        if arguments is None:
+            return function(**args)
+        key = (function_name, arguments)
+        with self._lock:
+            future = self._entries.get(key)
+            if future is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                owner = False
+            else:
+                future = Future()
+                self._entries[key] = future
+                self.misses += 1
+                owner = True
+                self._evict()
+        if owner:
+            try:
+                future.set_result(function(**args))
+            except BaseException as e:
+                with self._lock:
+                    if self._entries.get(key) is future:
+                        del self._entries[key]
+                future.set_exception(e)
+        return copy.deepcopy(future.result())
+
+    def _evict(self):
+        # 调用时已持有锁
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        """
+        缓存命中情况。
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = None
+
+
+def configure_tool_cache(max_entries=TOOL_CACHE_MAX_ENTRIES):
+    """
+    为一次批量运行创建共享的工具结果缓存，max_entries 为 None 或 0 时关闭缓存。
+    Returns:
+        ToolResultCache: 缓存，关闭时为 None。
+    """
+    global _cache
+    _cache = ToolResultCache(max_entries) if max_entries else None
+    return _cache
+
+
+def tool_cache():
+    """
+    获取当前的工具结果缓存，未开启时返回 None。
+    """
+    return _cache
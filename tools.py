@@ -3,7 +3,7 @@ tools_all = [
         "type": "function",
         "function": {
             "name": "get_table_data",
-            "description": "根据数据表名、开始时间、结束时间、列名和状态获取指定时间范围内的相关数据。返回值为包含指定列名和对应值的字典。若要查询某个状态所在时间，请给出status参数。",
+            "description": "根据数据表名、开始时间、结束时间、列名和状态获取指定时间范围内的相关数据。返回值为包含指定列名和对应值的字典。若要查询某个状态所在时间，请给出status参数。记录数超过 max_points 时返回降采样结果和统计摘要，需要原始记录时用 cursor 分页读取。",
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -32,6 +32,15 @@ tools_all = [
                         "description": "需要筛选的状态（例如 '开机'、'关机'）。如果未提供，则不筛选状态。",
                         "default": "",
                     },
+                    "max_points": {
+                        "type": "integer",
+                        "description": "返回记录数的上限，默认 200。超出时返回最值保留的降采样结果（包含 csvTime）和各列的统计摘要 summary。",
+                        "default": 200,
+                    },
+                    "cursor": {
+                        "type": "integer",
+                        "description": "分页读取原始记录的起始位置，从 0 开始，每页最多 max_points 条。返回的 metadata.next_cursor 为下一页的起始位置，为 null 时表示没有下一页。",
+                    },
                 },
                 "required": ["table_name", "start_time", "end_time"],
             },
@@ -237,6 +246,45 @@ tools_all = [
             },
         },
     },
+    {
+        "type": "function",
+        "function": {
+            "name": "calculate_group_integral_by_time_ranges",
+            "description": "一次计算多个时间范围内某设备组（甲板机械、推进系统、发电机、燃油、舵桨）的能耗或燃油消耗量。适用于作业能耗、DP过程能耗等需要分段计算再求和的问题，不需要再逐段调用能耗函数和sum_two。返回值为字典，'分段结果'包含每个时间范围内各设备的能耗（kWh）或燃油消耗量（L）及总值（数据为空时为 None），'合计'包含所有时间范围的总和。",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "time_ranges": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "start_time": {
+                                    "type": "string",
+                                    "format": "date-time",
+                                    "description": "时间范围的开始时间，格式为 'YYYY-MM-DD HH:MM:SS'。",
+                                },
+                                "end_time": {
+                                    "type": "string",
+                                    "format": "date-time",
+                                    "description": "时间范围的结束时间，格式为 'YYYY-MM-DD HH:MM:SS'。",
+                                },
+                            },
+                            "required": ["start_time", "end_time"],
+                        },
+                        "description": "需要计算的时间范围列表，例如 get_work_time 返回的所有作业时间范围或所有 ON_DP 到 OFF_DP 的时间范围。",
+                    },
+                    "group": {
+                        "type": "string",
+                        "description": "设备组名称。'发电机'为四个发电机的能耗，'燃油'为四个发电机组的燃油消耗量。",
+                        "enum": ["甲板机械", "推进系统", "发电机", "燃油", "舵桨"],
+                        "default": "发电机",
+                    },
+                },
+                "required": ["time_ranges", "group"],
+            },
+        },
+    },
     {
         "type": "function",
         "function": {
@@ -255,6 +303,11 @@ tools_all = [
                         "format": "date-time",
                         "description": "结束时间，格式为 'YYYY-MM-DD HH:MM:SS'。",
                     },
+                    "threshold": {
+                        "type": "number",
+                        "description": "左右舷角度之差的阈值，差值的绝对值大于该值视为异常，默认为 5。",
+                        "default": 5,
+                    },
                 },
                 "required": ["start_time", "end_time"],
             },
@@ -389,7 +442,7 @@ tools_all = [
         "type": "function",
         "function": {
             "name": "find_missing_records",
-            "description": "在指定时间范围内查找缺失的记录。返回值为字典，包含缺失记录的数量。",
+            "description": "在指定时间范围内查找缺失的记录（按分钟计）。返回值为字典，包含缺失记录的数量，可选包含每天的缺失数量和连续缺失的时间段。",
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -407,6 +460,16 @@ tools_all = [
                         "format": "date-time",
                         "description": "要查找缺失记录的时间范围的结束时间，格式为 'YYYY-MM-DD HH:MM:SS'。",
                     },
+                    "by_day": {
+                        "type": "boolean",
+                        "description": "是否同时返回每天的缺失记录数量。",
+                        "default": False,
+                    },
+                    "with_gaps": {
+                        "type": "boolean",
+                        "description": "是否同时返回连续缺失的时间段，最多返回最早的 20 段，gap_count 为总段数。",
+                        "default": False,
+                    },
                 },
                 "required": ["start_time", "end_time"],
             },
@@ -454,6 +517,54 @@ tools_all = [
             },
         },
     },
+    {
+        "type": "function",
+        "function": {
+            "name": "count_oscillations_batch",
+            "description": "一次查询A架在多个时间范围内、多个角度范围的摆动次数。返回值为字典，'count'为角度范围×时间范围的摆动次数矩阵，第i行第j列为第i个角度范围在第j个时间范围内的摆动次数。如果是超过角度X，则摆动角度范围取(X, 999)。",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "time_ranges": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "start_time": {
+                                    "type": "string",
+                                    "format": "date-time",
+                                    "description": "时间范围的开始时间，格式为 'YYYY-MM-DD HH:MM:SS'。",
+                                },
+                                "end_time": {
+                                    "type": "string",
+                                    "format": "date-time",
+                                    "description": "时间范围的结束时间，格式为 'YYYY-MM-DD HH:MM:SS'。",
+                                },
+                            },
+                            "required": ["start_time", "end_time"],
+                        },
+                        "description": "要查找摆动次数的时间范围列表。",
+                    },
+                    "name": {
+                        "type": "string",
+                        "description": "用来判断摆动，输入'左舷'或'右舷'。",
+                        "enum": ["左舷", "右舷"],
+                    },
+                    "angle_ranges": {
+                        "type": "array",
+                        "items": {
+                            "type": "array",
+                            "items": {"type": "number"},
+                            "minItems": 2,
+                            "maxItems": 2,
+                        },
+                        "description": "摆动角度范围列表，每项为 [起始值, 结束值]。",
+                    },
+                },
+                "required": ["time_ranges", "name", "angle_ranges"],
+            },
+        },
+    },
     {
         "type": "function",
         "function": {
@@ -547,6 +658,48 @@ tools_all = [
             },
         },
     },
+    {
+        "type": "function",
+        "function": {
+            "name": "find_range_statistics",
+            "description": "一次查询指定数据表中多个列在多个时间范围内的统计值（包含结束时间）。返回值为列名到各时间范围统计值列表的字典，每项包含记录数 count、总和 sum、平均值 mean、最小值 min_value 及其时间 min_time、最大值 max_value 及其时间 max_time；非数值列不含总和与平均值，没有数据的时间范围最值为 None。",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "table_name": {
+                        "type": "string",
+                        "description": "要查询的数据表名，需要加上'.csv'，例如 'Ajia_plc_1.csv'。",
+                    },
+                    "columns": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "要查询的列名列表。",
+                    },
+                    "time_ranges": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "start_time": {
+                                    "type": "string",
+                                    "format": "date-time",
+                                    "description": "时间范围的开始时间，格式为 'YYYY-MM-DD HH:MM:SS'。",
+                                },
+                                "end_time": {
+                                    "type": "string",
+                                    "format": "date-time",
+                                    "description": "时间范围的结束时间，格式为 'YYYY-MM-DD HH:MM:SS'。",
+                                },
+                            },
+                            "required": ["start_time", "end_time"],
+                        },
+                        "description": "要查询的时间范围列表。",
+                    },
+                },
+                "required": ["table_name", "columns", "time_ranges"],
+            },
+        },
+    },
     {
         "type": "function",
         "function": {
@@ -595,7 +748,7 @@ tools_all = [
         "type": "function",
         "function": {
             "name": "count_swing_with_rule",
-            "description": "计算在给定时间范围内，A架的摆动次数，从超过正向摆动阈值到超过负向摆动阈值可以记为一次完整的摆动（反之亦然）。返回值为包含摆动次数的字典。",
+            "description": "计算在给定时间范围内，A架的摆动次数，从超过正向摆动阈值到超过负向摆动阈值可以记为一次完整的摆动（反之亦然）。返回值为包含摆动次数和摆动时间的字典（超过 10 次时只列出最早和最晚各 5 次），两舷时按舷侧分别返回。",
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -611,8 +764,8 @@ tools_all = [
                     },
                     "side": {
                         "type": "string",
-                        "description": "用来判断摆动的位置，输入'左舷'或'右舷'。",
-                        "enum": ["左舷", "右舷"],
+                        "description": "用来判断摆动的位置，输入'左舷'或'右舷'，输入'两舷'时同时计算两侧并分别返回。",
+                        "enum": ["左舷", "右舷", "两舷"],
                     },
                     "front_angle": {
                         "type": "float",
@@ -622,7 +775,13 @@ tools_all = [
                         "type": "float",
                         "description": "反向摆动阈值，应该输入小于0的值。",
                     },
-                    "required": ["start_time", "end_time", "side", "front_angle", "back_angle"],
+                    "required": [
+                        "start_time",
+                        "end_time",
+                        "side",
+                        "front_angle",
+                        "back_angle",
+                    ],
                 },
             },
         },
@@ -631,7 +790,7 @@ tools_all = [
         "type": "function",
         "function": {
             "name": "count_swing_with_threshold",
-            "description": "计算在给定时间范围内，A架的摆动次数，同一方向上摆动超过指定阈值算作一次摆动。返回值为包含摆动次数的字典。",
+            "description": "计算在给定时间范围内，A架的摆动次数，同一方向上摆动超过指定阈值算作一次摆动。返回值为包含摆动次数和摆动时间的字典（超过 10 次时只列出最早和最晚各 5 次），两舷时按舷侧分别返回。",
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -647,8 +806,8 @@ tools_all = [
                     },
                     "side": {
                         "type": "string",
-                        "description": "用来判断摆动的位置，输入'左舷'或'右舷'。",
-                        "enum": ["左舷", "右舷"],
+                        "description": "用来判断摆动的位置，输入'左舷'或'右舷'，输入'两舷'时同时计算两侧并分别返回。",
+                        "enum": ["左舷", "右舷", "两舷"],
                     },
                     "threshold": {
                         "type": "float",